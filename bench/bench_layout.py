@@ -0,0 +1,172 @@
+# bench_layout.py
+"""
+悬浮窗文本排版微基准：旧的逐词 measure() 与带缓存的 TextLayout 对比
+用法（项目根目录）: python -m bench.bench_layout [--repeat 20]
+有显示环境时使用真实 Tk 字体测量；否则使用模拟测量器，每次调用附加固定开销模拟 Tcl 往返
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ui_layout import TextLayout, is_cjk, tk_bulk_measurer
+
+ZH_PARAGRAPH = (
+    "勇者啊，你终于来到了这里。自从魔王的军队越过北方的山脉以来，王国已经失去了三座城池和无数的村庄。"
+    "国王陛下命令我把这把传承了七代的圣剑交给你，希望你能在月圆之夜之前找到封印魔王的三块水晶碎片。"
+    "第一块碎片据说藏在东方沼泽的古代神殿里，那里被剧毒的雾气笼罩，没有解毒药剂的人一步也无法前进。"
+)
+EN_PARAGRAPH = (
+    "Brave hero, you have finally arrived. Ever since the Demon King's army crossed the northern mountains, "
+    "the kingdom has lost three cities and countless villages. His Majesty ordered me to hand you this holy "
+    "sword, passed down for seven generations, in the hope that you will find the three crystal shards that "
+    "can seal the Demon King before the night of the full moon. The first shard is said to be hidden in the "
+    "ancient temple of the eastern swamp, shrouded in poisonous mist."
+)
+TEXTS = [
+    ("zh_long", "\n".join([ZH_PARAGRAPH] * 3)),
+    ("en_long", "\n".join([EN_PARAGRAPH] * 3)),
+    ("mixed", f"{ZH_PARAGRAPH}\n{EN_PARAGRAPH}"),
+]
+
+
+class SimulatedFont:
+    """模拟字体：中日韩字符 15px，其它 7px；每次 measure 调用附加 call_cost_us 的开销"""
+    def __init__(self, call_cost_us):
+        self.call_cost = call_cost_us / 1e6
+        self.calls = 0
+
+    def _spin(self):
+        self.calls += 1
+        deadline = time.perf_counter() + self.call_cost
+        while time.perf_counter() < deadline:
+            pass
+
+    def measure(self, text):
+        self._spin()
+        return sum(15 if is_cjk(char) else 7 for char in text)
+
+    def measure_many(self, strings):
+        self._spin()
+        return [sum(15 if is_cjk(char) else 7 for char in text) for text in strings]
+
+
+class CountingTkFont:
+    """真实 Tk 字体，统计 Tcl 调用次数"""
+    def __init__(self, root, font):
+        self.font = font
+        self.calls = 0
+        self._measure_many = tk_bulk_measurer(root, font)
+
+    def measure(self, text):
+        self.calls += 1
+        return self.font.measure(text)
+
+    def measure_many(self, strings):
+        self.calls += 1
+        return self._measure_many(strings)
+
+
+def legacy_layout(font, text, max_width):
+    """ui_transparent.set_text 原有的逐词测量换行逻辑"""
+    def split_text(text, max_width):
+        lines, current_line, current_width = [], [], 0
+        words = []
+        for segment in text.split(' '):
+            if any('\u4e00' <= c <= '\u9fff' for c in segment):
+                words.extend(list(segment))
+            else:
+                words.append(segment)
+
+        for word in words:
+            word_width = font.measure(word)
+            if word_width > max_width:
+                for char in word:
+                    char_width = font.measure(char)
+                    if current_width + char_width > max_width:
+                        lines.append(''.join(current_line))
+                        current_line = [char]
+                        current_width = char_width
+                    else:
+                        current_line.append(char)
+                        current_width += char_width
+                continue
+
+            if current_width + word_width <= max_width:
+                current_line.append(word)
+                current_width += word_width + font.measure(' ')
+            else:
+                lines.append(' '.join(current_line).strip())
+                current_line = [word]
+                current_width = word_width
+
+        if current_line:
+            lines.append(' '.join(current_line).strip())
+        return lines
+
+    final_lines = []
+    for para in [p.strip() for p in text.split('\n') if p.strip()]:
+        final_lines.extend(split_text(para, max_width))
+    text_width = max(font.measure(line) for line in final_lines) if final_lines else 0
+    return final_lines, text_width
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def make_font_factory(call_cost_us):
+    try:
+        import tkinter as tk
+        from tkinter import font as tkfont
+        root = tk.Tk()
+        root.withdraw()
+        font = tkfont.Font(root=root, family="Microsoft YaHei", size=11)
+        return "tk", lambda: CountingTkFont(root, font)
+    except Exception:
+        return f"simulated({call_cost_us}us/call)", lambda: SimulatedFont(call_cost_us)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="悬浮窗文本排版微基准")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--width", type=int, default=380)
+    parser.add_argument("--call-cost-us", type=int, default=20, help="模拟测量器每次调用的开销")
+    args = parser.parse_args()
+
+    mode, font_factory = make_font_factory(args.call_cost_us)
+    print(f"测量器: {mode}  宽度: {args.width}px  重复: {args.repeat}")
+    print(f"{'text':<10}{'legacy':>12}{'calls':>8}{'cold':>12}{'calls':>8}{'warm':>12}{'calls':>8}")
+    for name, text in TEXTS:
+        font = font_factory()
+        legacy_ms = timed(lambda: legacy_layout(font, text, args.width), args.repeat)
+        legacy_calls = font.calls // args.repeat
+
+        # 冷启动：每次新建排版器（字宽缓存为空）
+        font = font_factory()
+        cold_ms = timed(lambda: TextLayout(font.measure_many, 20).layout(text, args.width), args.repeat)
+        cold_calls = font.calls // args.repeat
+
+        # 热缓存：同一排版器重复排版相同文本
+        font = font_factory()
+        layout = TextLayout(font.measure_many, 20)
+        layout.layout(text, args.width)
+        font.calls = 0
+        warm_ms = timed(lambda: layout.layout(text, args.width), args.repeat)
+        warm_calls = font.calls // args.repeat
+
+        print(f"{name:<10}{legacy_ms:>10.2f}ms{legacy_calls:>8}{cold_ms:>10.2f}ms{cold_calls:>8}"
+              f"{warm_ms:>10.3f}ms{warm_calls:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# bench_logging.py
+"""
+日志开销微基准：调用线程上每条日志的耗时
+对比同步写文件+控制台（旧实现）与队列 + 后台线程写入，以及 log_text 关闭、事件采样的效果
+用法（项目根目录）: python -m bench.bench_logging [--records 20000]
+控制台输出写入 os.devnull，避免终端速度影响结果
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import argparse
+import tempfile
+import threading
+from logging.handlers import RotatingFileHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import logger as log_module
+from utils.logger import LOG_FORMAT, BackgroundListener, DroppingQueueHandler, log_event, log_text, settings
+
+SAMPLE_TEXT = "Brave hero, you have finally arrived. The kingdom has lost three cities and countless villages."
+SAMPLE_DST = "勇者啊，你终于来到了这里。王国已经失去了三座城池和无数的村庄。"
+
+
+def make_handlers(log_dir, devnull):
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(os.path.join(log_dir, "bench.log"), maxBytes=1 * 1024 * 1024,
+                                       backupCount=5, encoding="utf-8")
+    stream_handler = logging.StreamHandler(devnull)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+    return [file_handler, stream_handler]
+
+
+def use_handlers(handlers):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def emit_legacy(index):
+    # 旧实现的写法：每次翻译成功记录完整原文和译文
+    log_module.logger.info(f"翻译成功: {SAMPLE_TEXT} → {SAMPLE_DST}")
+
+
+def emit_event(index):
+    log_event("translate.ok", engine="baidu", src=log_text(SAMPLE_TEXT), dst=log_text(SAMPLE_DST))
+
+
+def emit_sampled(index):
+    log_event("realtime.skip", reason="same_text")
+
+
+def measure(emit, records, threads):
+    """返回调用线程上每条日志的平均耗时(微秒)"""
+    per_thread = records // threads
+
+    def worker(out):
+        start = time.perf_counter()
+        for i in range(per_thread):
+            emit(i)
+        out.append(time.perf_counter() - start)
+
+    elapsed = []
+    workers = [threading.Thread(target=worker, args=(elapsed,)) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(elapsed) / (per_thread * threads) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志开销微基准")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4, help="同时写日志的线程数")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="采样场景的采样比例")
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp(prefix="gt_bench_log_")
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    scenarios = [
+        # 名称, 写入方式, 日志函数, log_text, 采样比例
+        ("sync_text", "sync", emit_legacy, True, 1.0),
+        ("queue_text", "queue", emit_legacy, True, 1.0),
+        ("queue_event", "queue", emit_event, True, 1.0),
+        ("queue_no_text", "queue", emit_event, False, 1.0),
+        ("queue_sampled", "queue", emit_sampled, True, args.sample_rate),
+    ]
+
+    # 关闭模块导入时启动的后台线程，每个场景单独建立处理器
+    log_module.shutdown_logging()
+    print(f"{args.records} 条日志，{args.threads} 个线程，调用线程上每条日志的平均耗时:")
+    for name, mode, emit, text_enabled, sample_rate in scenarios:
+        handlers = make_handlers(log_dir, devnull)
+        listener = None
+        dropped = 0
+        if mode == "queue":
+            queue_handler = DroppingQueueHandler(queue.Queue(10000))
+            listener = BackgroundListener(queue_handler.queue, *handlers, respect_handler_level=True)
+            listener.start()
+            use_handlers([queue_handler])
+        else:
+            use_handlers(handlers)
+        settings.log_text = text_enabled
+        settings.sample_rate = 1.0
+        settings.sample_events = {"realtime.skip": sample_rate}
+
+        per_record = measure(emit, args.records, args.threads)
+        drain_start = time.perf_counter()
+        if listener is not None:
+            listener.stop()
+            dropped = queue_handler.dropped
+        drain = (time.perf_counter() - drain_start) * 1000
+        for handler in handlers:
+            handler.close()
+        print(f"  {name:<14} {per_record:8.2f}us/条  后台写完剩余日志:{drain:8.1f}ms  丢弃:{dropped}")
+
+    devnull.close()
+    for name in os.listdir(log_dir):
+        os.remove(os.path.join(log_dir, name))
+    os.rmdir(log_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# bench_ocr.py
+"""
+OCR 引擎单次识别延迟对比，大区域整幅识别与分块并行识别的对比，
+以及自适应 OCR 参数（每个样本视为一个区域）学习前后的识别延迟
+用法（项目根目录）: python -m bench.bench_ocr [--repeat 10] [--workers 4] [--full-lang chi_sim+eng]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytesseract
+from bench.fixtures import load_fixtures
+from utils.utils_capture import image_to_frame
+from utils.utils_ocr import recognize_tiled, recognize_image
+from utils.utils_ocr_profile import OCRProfile, OCRProfiler, profile_name
+from utils.utils_ocr_engine import OCREnginePool, SubprocessOCREngine, TesserocrEngine
+from utils.utils_ocr_tiles import find_bands
+
+
+def find_tessdata():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    local = os.path.join(base_dir, "tools", "Tesseract-OCR")
+    if os.name == "nt" and os.path.exists(os.path.join(local, "tesseract.exe")):
+        pytesseract.pytesseract.tesseract_cmd = os.path.join(local, "tesseract.exe")
+        return os.path.join(local, "tessdata")
+    # Linux 使用系统安装的 tesseract
+    return os.environ.get("TESSDATA_PREFIX")
+
+
+def bench_engine(engine, fixtures, repeat):
+    latencies = {}
+    for name, img, _ in fixtures:
+        engine.recognize(img)  # 预热
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            engine.recognize(img)
+            samples.append((time.perf_counter() - start) * 1000)
+        latencies[name] = statistics.median(samples)
+    return latencies
+
+
+def median_ms(func, repeat):
+    func()  # 预热
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench_bands(fixtures, repeat):
+    """文字带检测本身的开销（不需要 tesseract）"""
+    print(f"{'fixture':<16}{'size':>12}{'bands':>8}{'detect':>12}")
+    for name, img, _ in fixtures:
+        frame = image_to_frame(img)
+        bands = find_bands(frame)
+        latency = median_ms(lambda: find_bands(frame), repeat)
+        print(f"{name:<16}{f'{img.width}x{img.height}':>12}{len(bands):>8}{latency:>10.2f}ms")
+
+
+def bench_tiled(name, factory, fixtures, repeat, workers):
+    """整幅识别与分块并行识别（tile_min_height=1，所有样本都分块）"""
+    pool = OCREnginePool(factory, workers)
+    try:
+        print(f"\n{name} 引擎，{workers} 个并行引擎:")
+        print(f"{'fixture':<16}{'whole':>12}{'tiled':>12}")
+        for fixture, img, _ in fixtures:
+            frame = image_to_frame(img)
+            whole = median_ms(lambda: pool.recognize(img), repeat)
+            tiled = median_ms(lambda: recognize_tiled(pool, frame, 1), repeat)
+            print(f"{fixture:<16}{whole:>10.1f}ms{tiled:>10.1f}ms")
+    finally:
+        pool.close()
+
+
+def bench_profiles(name, factory, fixtures, repeat, full_lang):
+    """
+    每个样本视为一个区域，重复截图直到参数固定（最多 20 次），
+    比较完整参数与固定后参数的识别延迟及识别结果
+    """
+    pool = OCREnginePool(factory, 1)
+    profiler = OCRProfiler()
+    full = OCRProfile(full_lang, 6, 1.0)
+    try:
+        print(f"\n{name} 引擎，自适应 OCR 参数（完整参数 {profile_name(full)}）:")
+        print(f"{'fixture':<16}{'profile':>26}{'full':>12}{'adaptive':>12}  same_text")
+        for fixture, img, _ in fixtures:
+            region = profiler.get(fixture, full)
+            for _ in range(20):
+                region.recognize(lambda profile: recognize_image(pool, img, profile))
+                if region.state == "locked":
+                    break
+            chosen = region.current
+            before = median_ms(lambda: recognize_image(pool, img, full), repeat)
+            after = median_ms(lambda: recognize_image(pool, img, chosen), repeat)
+            same = " ".join(recognize_image(pool, img, full)[0].split()) == \
+                " ".join(recognize_image(pool, img, chosen)[0].split())
+            print(f"{fixture:<16}{profile_name(chosen):>26}{before:>10.1f}ms{after:>10.1f}ms  {same}")
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 引擎延迟对比")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="分块识别的并行引擎数")
+    parser.add_argument("--full-lang", default="chi_sim+eng", help="自适应 OCR 参数对比中的完整语言组合")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    bench_bands(fixtures, args.repeat)
+
+    if os.name != "nt" and shutil.which("tesseract") is None:
+        print("未找到 tesseract，跳过 OCR 引擎基准测试")
+        return 0
+
+    tessdata_dir = find_tessdata()
+    engines = [("subprocess", lambda: SubprocessOCREngine(args.lang))]
+    try:
+        import tesserocr  # noqa: F401
+        engines.append(("tesserocr", lambda: TesserocrEngine(tessdata_dir, args.lang)))
+    except ImportError:
+        print("未安装 tesserocr，仅测试 subprocess 引擎")
+
+    results = {}
+    for name, factory in engines:
+        engine = factory()
+        try:
+            results[name] = bench_engine(engine, fixtures, args.repeat)
+        finally:
+            engine.close()
+
+    print(f"{'fixture':<16}" + "".join(f"{name:>14}" for name in results))
+    for fixture, _, _ in fixtures:
+        print(f"{fixture:<16}" + "".join(f"{results[name][fixture]:>12.1f}ms" for name in results))
+
+    large = [fixture for fixture in fixtures if fixture[0].endswith("_large")]
+    for name, factory in engines:
+        bench_tiled(name, factory, large, args.repeat, args.workers)
+    for name, factory in engines:
+        bench_profiles(name, factory, fixtures, args.repeat, args.full_lang)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
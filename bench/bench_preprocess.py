@@ -0,0 +1,122 @@
+# bench_preprocess.py
+"""
+OCR 前处理基准：前处理耗时、送往 tesseract 的像素数，以及前处理前后的识别延迟和准确率
+样本为合成截图，另加一组“画面透过半透明对话框”的版本（背景亮度不均）
+用法（项目根目录）: python -m bench.bench_preprocess [--repeat 10] [--lang eng] [--glyph-height 32]
+准确率 = 1 - 编辑距离 / 原文长度（忽略空白）
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+from bench.fixtures import load_fixtures
+from bench.bench_ocr import find_tessdata, median_ms
+from utils.utils_capture import image_to_frame
+from utils.utils_ocr_engine import SubprocessOCREngine, TesserocrEngine
+from utils.utils_preprocess import preprocess
+from utils.utils_tm import edit_distance
+
+
+def busy_background(img, seed=1):
+    """模拟半透明对话框：明亮、不均匀的游戏画面以 40% 透明度透过文字背景"""
+    rng = np.random.default_rng(seed)
+    height, width = img.height, img.width
+    x = np.linspace(0, 1, width)[None, :, None]
+    y = np.linspace(0, 1, height)[:, None, None]
+    scene = 90 + 110 * x * (1 - y) + rng.normal(0, 18, (height, width, 3))
+    scene[..., 1] *= 0.8
+    frame = image_to_frame(img).astype(np.float32)
+    # 文字（接近白色）保持不变，其余像素与画面混合
+    text = frame.min(axis=2, keepdims=True) > 200
+    mixed = np.where(text, frame, frame * 0.6 + scene * 0.4)
+    return Image.fromarray(np.clip(mixed, 0, 255).astype(np.uint8))
+
+
+def accuracy(text, truth):
+    text, truth = "".join(text.split()), "".join(truth.split())
+    if not truth:
+        return 1.0
+    return max(0.0, 1 - edit_distance(text, truth, len(truth) + len(text)) / len(truth))
+
+
+def load_samples():
+    samples = []
+    for name, img, text in load_fixtures():
+        samples.append((name, img, text))
+        samples.append((f"{name}+scene", busy_background(img), text))
+    return samples
+
+
+def bench_preprocess(samples, repeat, glyph_height):
+    print(f"{'sample':<20}{'size':>12}{'pixels':>10}{'after':>10}{'preprocess':>12}")
+    for name, img, _ in samples:
+        frame = image_to_frame(img)
+        out = preprocess(frame, glyph_height)
+        latency = median_ms(lambda: preprocess(frame, glyph_height), repeat)
+        after = out.width * out.height if out is not None else 0
+        print(f"{name:<20}{f'{img.width}x{img.height}':>12}{img.width * img.height:>10}{after:>10}{latency:>10.2f}ms")
+
+
+def bench_ocr(name, engine, samples, repeat, glyph_height):
+    """原始截图与前处理后（含前处理耗时）的识别延迟和准确率"""
+    print(f"\n{name} 引擎:")
+    print(f"{'sample':<20}{'raw':>10}{'acc':>7}{'prep':>10}{'acc':>7}")
+    totals = {"raw": [], "prep": [], "raw_acc": [], "prep_acc": []}
+    for sample, img, truth in samples:
+        frame = image_to_frame(img)
+
+        def run_prep():
+            out = preprocess(frame, glyph_height)
+            return engine.recognize(out) if out is not None else ""
+
+        raw = median_ms(lambda: engine.recognize(img), repeat)
+        prep = median_ms(run_prep, repeat)
+        raw_acc, prep_acc = accuracy(engine.recognize(img), truth), accuracy(run_prep(), truth)
+        for key, value in (("raw", raw), ("prep", prep), ("raw_acc", raw_acc), ("prep_acc", prep_acc)):
+            totals[key].append(value)
+        print(f"{sample:<20}{raw:>8.1f}ms{raw_acc:>7.2f}{prep:>8.1f}ms{prep_acc:>7.2f}")
+    print(f"{'平均':<18}{statistics.mean(totals['raw']):>10.1f}ms{statistics.mean(totals['raw_acc']):>7.2f}"
+          f"{statistics.mean(totals['prep']):>8.1f}ms{statistics.mean(totals['prep_acc']):>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 前处理基准")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--glyph-height", type=int, default=32)
+    args = parser.parse_args()
+
+    samples = load_samples()
+    bench_preprocess(samples, args.repeat, args.glyph_height)
+
+    if os.name != "nt" and shutil.which("tesseract") is None:
+        print("未找到 tesseract，跳过识别延迟和准确率对比")
+        return 0
+
+    tessdata_dir = find_tessdata()
+    engines = [("subprocess", lambda: SubprocessOCREngine(args.lang))]
+    try:
+        import tesserocr  # noqa: F401
+        engines.append(("tesserocr", lambda: TesserocrEngine(tessdata_dir, args.lang)))
+    except ImportError:
+        pass
+    for name, factory in engines:
+        engine = factory()
+        try:
+            start = time.perf_counter()
+            bench_ocr(name, engine, samples, args.repeat, args.glyph_height)
+            print(f"({time.perf_counter() - start:.1f}s)")
+        finally:
+            engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
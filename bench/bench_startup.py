@@ -0,0 +1,91 @@
+# bench_startup.py
+"""
+启动时间预算：在新的 Python 进程中导入 main.py 启动时导入的模块，统计耗时
+并检查 numpy / PIL / pytesseract / requests 等重量级模块没有在启动时被导入（它们在后台预热线程中加载）
+用法（项目根目录）: python -m bench.bench_startup [--repeat 5] [--budget-ms 150]
+超出预算或启动时导入了重量级模块时返回 1
+"""
+import os
+import ast
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 不应在启动时导入的模块（由 ScreenshotTranslator 的预热线程或首次使用时导入）
+HEAVY_MODULES = ("numpy", "PIL", "pytesseract", "tesserocr", "requests", "aiohttp", "sqlite3", "http.server")
+# 预热线程导入的模块，单独统计耗时作为对比
+WARMUP_MODULES = ("utils.utils_ocr", "utils.utils_translate")
+
+PROBE = """
+import sys, time, json, importlib
+start = time.perf_counter()
+skipped = []
+for name in {modules!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError as e:
+        if not getattr(e, "name", "") or e.name.split(".")[0] == "utils":
+            raise
+        skipped.append(name)
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "skipped": skipped, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def startup_modules():
+    """main.py 顶层导入的模块"""
+    with open(os.path.join(ROOT_DIR, "main.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def probe(modules, heavy=()):
+    """在新进程中导入 modules，返回 {"ms", "skipped", "heavy"}"""
+    code = PROBE.format(modules=list(modules), heavy=list(heavy))
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动时间预算")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=150, help="启动导入耗时上限（中位数）")
+    args = parser.parse_args()
+
+    modules = startup_modules()
+    # 第一次运行生成字节码缓存，不计入
+    first = probe(modules, HEAVY_MODULES)
+    runs = [probe(modules)["ms"] for _ in range(args.repeat)]
+    warmup = [probe(WARMUP_MODULES)["ms"] for _ in range(args.repeat)]
+
+    startup_ms = statistics.median(runs)
+    print(f"启动导入: {startup_ms:.1f}ms (预算 {args.budget_ms:g}ms)，模块: {len(modules)}")
+    if first["skipped"]:
+        print(f"  未安装，跳过: {', '.join(first['skipped'])}")
+    print(f"预热线程导入 (OCR / 翻译): {statistics.median(warmup):.1f}ms")
+
+    failed = False
+    if first["heavy"]:
+        print(f"启动时导入了重量级模块: {', '.join(first['heavy'])}")
+        failed = True
+    if startup_ms > args.budget_ms:
+        print("超出启动时间预算")
+        failed = True
+    if not failed:
+        print("启动时间在预算内")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
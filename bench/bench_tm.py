@@ -0,0 +1,81 @@
+# bench_tm.py
+"""
+翻译记忆微基准：大量条目下的建索引时间、查询延迟和命中率
+用法（项目根目录）: python -m bench.bench_tm [--entries 200000] [--queries 2000]
+查询分三组：已有句子加入 OCR 误差（应命中）、误差把字母识别成了数字（数字不同，不应命中）和新的句子（不应命中）
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.run_bench import add_ocr_noise, percentile
+from utils.utils_tm import TranslationMemory, numbers, _rapid_levenshtein
+
+LETTERS = "etaoinshrdlucmfwypvbgkqjxz"
+# 近似英文字母频率，n-gram 分布接近真实文本
+WEIGHTS = [12, 9, 8, 7.5, 7, 6.7, 6.3, 6.1, 6, 4.3, 4, 2.8, 2.8, 2.4, 2.2, 2.4, 2, 1.9, 1, 1.5, 2, 0.8, 0.1, 0.2, 0.2, 0.1]
+
+
+def make_vocabulary(rng, size):
+    return ["".join(rng.choices(LETTERS, WEIGHTS, k=rng.randint(2, 9))) for _ in range(size)]
+
+
+def make_sentence(rng, vocabulary):
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(5, 14))]
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words)), str(rng.randint(1, 500)))
+    return " ".join(words).capitalize() + rng.choice([".", "!", "?", ""])
+
+
+def time_queries(memory, queries):
+    latencies, hits = [], 0
+    for text in queries:
+        start = time.perf_counter()
+        match = memory.lookup("en", "zh", text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += match is not None
+    return latencies, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="翻译记忆微基准")
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    vocabulary = make_vocabulary(rng, 5000)
+    sentences = list({make_sentence(rng, vocabulary) for _ in range(args.entries)})
+    memory = TranslationMemory(threshold=args.threshold, max_entries=len(sentences))
+
+    start = time.perf_counter()
+    for index, text in enumerate(sentences):
+        memory.add("en", "zh", text, f"译文{index}")
+    build = time.perf_counter() - start
+
+    noisy, digits = [], []
+    for source in rng.sample(sentences, args.queries):
+        text = source
+        for _ in range(rng.randint(1, 2)):
+            text = add_ocr_noise(text, rng)
+        (noisy if numbers(text) == numbers(source) else digits).append(text)
+    known = set(sentences)
+    fresh = [text for text in (make_sentence(rng, vocabulary) for _ in range(args.queries)) if text not in known]
+
+    print(f"{len(sentences)} 条，建索引 {build:.1f}s，编辑距离: {'rapidfuzz' if _rapid_levenshtein else '纯 Python'}")
+    for name, queries in (("noisy", noisy), ("digits", digits), ("fresh", fresh)):
+        latencies, hits = time_queries(memory, queries)
+        print(f"  {name:<6} 命中 {hits}/{len(queries)}  "
+              f"p50={statistics.median(latencies):.3f}ms  p95={percentile(latencies, 95):.3f}ms  "
+              f"max={max(latencies):.2f}ms")
+    print(f"  平均相似度 {memory.stats()['avg_score']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
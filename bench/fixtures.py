@@ -0,0 +1,97 @@
+# fixtures.py
+"""
+基准测试用的合成游戏截图
+图片在运行时按固定参数绘制（不依赖仓库中的二进制文件），保证结果可复现
+"""
+import os
+from PIL import Image, ImageDraw, ImageFont
+
+
+# 依次尝试的字体（Windows / Linux），第一个可用的 CJK 字体用于中文样本
+FONT_CANDIDATES = [
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+]
+LATIN_FONT_CANDIDATES = [
+    "C:/Windows/Fonts/arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+]
+
+# (名称, 文本, 是否需要 CJK 字体, 尺寸, 字号)
+FIXTURES = [
+    ("en_small", "Press E to talk", False, (320, 48), 22),
+    ("en_dialog", "The old knight looks at you. \"You should not have come here, traveler.\"",
+     False, (900, 120), 24),
+    ("zh_small", "按 E 对话", True, (320, 48), 22),
+    ("zh_dialog", "老骑士看着你。“旅行者，你不该来这里。”", True, (900, 120), 24),
+    ("mixed_dialog", "获得物品: Iron Sword x1。HP +20", True, (900, 120), 24),
+    ("en_large", "\n".join([
+        "Quest Log",
+        "Find the missing merchant in the northern woods.",
+        "Talk to the captain of the guard.",
+        "Bring three wolf pelts to the hunter.",
+        "Return to the village before nightfall.",
+        "Reward: 150 gold, Leather Boots",
+    ]), False, (1280, 420), 26),
+    ("zh_large", "\n".join([
+        "任务日志",
+        "在北方森林中找到失踪的商人。",
+        "与卫队长交谈。",
+        "把三张狼皮交给猎人。",
+        "在天黑之前返回村庄。",
+        "奖励：150 金币，皮靴",
+    ]), True, (1280, 420), 26),
+]
+
+
+def find_font(candidates):
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_font(size, cjk=False):
+    path = find_font(FONT_CANDIDATES if cjk else LATIN_FONT_CANDIDATES + FONT_CANDIDATES)
+    if path is None:
+        if cjk:
+            return None
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, size)
+
+
+def render_fixture(text, size, font_size, cjk=False):
+    """
+    绘制一张“游戏对话框”截图：深色半透明背景 + 白色文字 + 轻微背景纹理
+    字体不可用时返回 None
+    """
+    font = load_font(font_size, cjk)
+    if font is None:
+        return None
+    width, height = size
+    img = Image.new("RGB", size, (24, 28, 40))
+    draw = ImageDraw.Draw(img)
+    # 背景纹理，模拟游戏画面透过对话框
+    for x in range(0, width, 16):
+        draw.line([(x, 0), (x + height, height)], fill=(34, 40, 56), width=3)
+    draw.rectangle([4, 4, width - 5, height - 5], outline=(180, 160, 110), width=2)
+    draw.multiline_text((16, 12), text, font=font, fill=(245, 245, 245), spacing=int(font_size * 0.5))
+    return img
+
+
+def load_fixtures(names=None):
+    """
+    返回 [(name, image, text)]，当前环境缺少字体的样本会被跳过
+    """
+    result = []
+    for name, text, cjk, size, font_size in FIXTURES:
+        if names and name not in names:
+            continue
+        img = render_fixture(text, size, font_size, cjk)
+        if img is not None:
+            result.append((name, img, text))
+    return result
@@ -0,0 +1,508 @@
+# run_bench.py
+"""
+端到端基准测试：截图 → OCR → 翻译 → 排版
+截图由样本图片代替，翻译请求发往本地桩服务，可在无网络、无界面的 Linux 上运行
+
+用法（项目根目录）:
+    python -m bench.run_bench                    # 使用 tesseract 识别样本图片
+    python -m bench.run_bench --stub-ocr         # OCR 直接返回样本原文（无需安装 tesseract）
+    python -m bench.run_bench --update-baseline  # 将本次结果写入基准文件
+与基准相比出现性能回退时以退出码 1 结束
+OCR 对比场景（OCR_SCENARIOS）只测识别阶段：改动前后的识别延迟和识别结果的一致性
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import zlib
+import random
+import logging
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from bench.fixtures import load_fixtures
+from bench.stub_server import StubTranslationServer, stub_translate
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# 场景参数:
+#   engine: 主引擎；cache: 是否启用翻译缓存
+#   error_rate / slow_rate / slow_ms: 主引擎桩服务的错误率和长尾延迟
+#   qps: 桩服务和客户端限流的 QPS 上限，0 为不限
+#   fallback: 备用引擎（由另一个正常的桩服务提供）；hedge: 是否启用对冲请求
+#   ocr_noise: --stub-ocr 模式下每次识别加入 OCR 误差的概率；tm: 是否启用翻译记忆
+#   progressive: 逐段翻译（overlay.stream_chunk 句一组并发请求），额外统计第一段译文到达的时间 first
+SCENARIOS = [
+    {"name": "baidu", "engine": "baidu"},
+    {"name": "google", "engine": "google"},
+    {"name": "deepl", "engine": "deepl"},
+    {"name": "youdao", "engine": "youdao"},
+    {"name": "baidu_cached", "engine": "baidu", "cache": True},
+    {"name": "baidu_errors", "engine": "baidu", "error_rate": 0.1},
+    {"name": "baidu_qps_limited", "engine": "baidu", "qps": 20},
+    {"name": "baidu_down_failover", "engine": "baidu", "error_rate": 1.0, "fallback": "google"},
+    {"name": "baidu_slow_hedged", "engine": "baidu", "slow_rate": 0.2, "slow_ms": 300,
+     "fallback": "google", "hedge": True},
+    {"name": "baidu_ocr_noise", "engine": "baidu", "ocr_noise": 0.5},
+    {"name": "baidu_ocr_noise_tm", "engine": "baidu", "ocr_noise": 0.5, "tm": True},
+    {"name": "baidu_glossary", "engine": "baidu", "glossary": True},
+    {"name": "baidu_progressive", "engine": "baidu", "slow_rate": 0.2, "slow_ms": 300, "progressive": True},
+]
+
+# OCR 对比场景：每个样本视为一个区域，before 为原来的识别方式，after 为改进后的方式
+#   profile: 完整参数(ocr.lang/psm) 与自适应参数学习并固定之后的参数（两者都经过前处理）
+#   preprocess: 原始截图与前处理后的图片（after 含前处理耗时）
+# 结果: before_p50 / after_p50 识别延迟，before_acc / after_acc 与原文的字符准确率，
+#       same_text 两种方式识别结果相同的样本比例
+# --stub-ocr 模式下没有真实的识别结果，只测 preprocess 的前处理耗时和送往 tesseract 的像素数
+OCR_SCENARIOS = [
+    {"name": "ocr_profile", "compare": "profile"},
+    {"name": "ocr_preprocess", "compare": "preprocess"},
+]
+
+# glossary 场景使用的术语表：界面标签和物品名
+BENCH_GLOSSARY = {
+    "Quest Log": "任务日志",
+    "Reward": "奖励",
+    "Gold": "金币",
+    "Leather Boots": "皮靴",
+    "Iron Sword": "铁剑",
+    "HP": "生命值",
+    "Press E to talk": "按 E 对话",
+    "Knight": "骑士",
+}
+
+# 模拟 OCR 误差：形近字符、多余的标点、漏掉的空格
+OCR_NOISE = [("l", "1"), ("I", "l"), ("o", "0"), (". ", ".. "), (", ", ","), (" ", ""),
+             ("rn", "m"), ("e", "c"), ("h", "b")]
+
+
+def image_digest(img):
+    return img.size, zlib.adler32(img.tobytes())
+
+
+def add_ocr_noise(text, rng):
+    """在 text 的随机位置加入一处 OCR 误差"""
+    candidates = [(old, new) for old, new in OCR_NOISE if old in text]
+    if not candidates:
+        return text
+    old, new = rng.choice(candidates)
+    positions = [i for i in range(len(text)) if text.startswith(old, i)]
+    pos = rng.choice(positions)
+    return text[:pos] + new + text[pos + len(old):]
+
+
+class TruthOCREngine:
+    """--stub-ocr 模式下的 OCR 引擎：直接返回样本原文，可按概率加入 OCR 误差"""
+    name = "stub"
+
+    def __init__(self, truth, noise=None):
+        self.truth = truth  # 图像内容摘要 -> text
+        self.noise = noise  # {"rate": 概率, "random": random.Random}，各引擎共用
+
+    def recognize(self, img):
+        text = self.truth[image_digest(img)]
+        if self.noise and self.noise["random"].random() < self.noise["rate"]:
+            text = add_ocr_noise(text, self.noise["random"])
+        return text
+
+    def close(self):
+        pass
+
+
+def write_config(path, ocr_backend, scenario, log_level="CRITICAL", tiling=True):
+    """
+    以仓库中的配置为模板生成基准测试配置
+    tiling: 是否分块识别和前处理（--stub-ocr 模式按整幅原始图片查找原文，不能分块或前处理）
+    """
+    from utils.utils_config import ENGINE_REQUIRED_KEYS
+    with open(os.path.join(ROOT_DIR, "config", "api_config.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    engine, qps = scenario["engine"], scenario.get("qps", 0)
+    config["engine"] = engine
+    # 模板中的占位凭据含中文，无法放入 HTTP 请求头
+    for section, keys in ENGINE_REQUIRED_KEYS.values():
+        config[section] = dict(config.get(section, {}), **{key: f"bench-{key}" for key in keys})
+    config["cache"] = dict(config.get("cache", {}), enabled=scenario.get("cache", False))
+    config["tm"] = dict(config.get("tm", {}), enabled=scenario.get("tm", False))
+    config["glossary"] = dict(config.get("glossary", {}), game="bench" if scenario.get("glossary") else "")
+    if scenario.get("glossary"):
+        glossary_dir = os.path.join(os.path.dirname(path), "glossary")
+        os.makedirs(glossary_dir, exist_ok=True)
+        with open(os.path.join(glossary_dir, "bench.json"), "w", encoding="utf-8") as f:
+            json.dump({"from": "en", "to": "zh", "terms": BENCH_GLOSSARY}, f, ensure_ascii=False)
+    # 加入 OCR 误差时每次都要重新识别
+    config["ocr_cache"] = dict(config.get("ocr_cache", {}), enabled=not scenario.get("ocr_noise"))
+    config["metrics"] = dict(config.get("metrics", {}), enabled=False)
+    config["logging"] = dict(config.get("logging", {}), level=log_level)
+    config["ocr"] = dict(config.get("ocr", {}), backend=ocr_backend)
+    if not tiling:
+        config["ocr"]["tile_min_height"] = 0
+        config["ocr"]["preprocess"] = False
+    config["rate_limit"] = {"enabled": bool(qps), "max_wait": 10,
+                            "engines": {engine: {"qps": qps, "burst": 1}} if qps else {}}
+    fallback = scenario.get("fallback")
+    config["router"] = dict(config.get("router", {}), fallbacks=[fallback] if fallback else [],
+                            hedge=scenario.get("hedge", False), hedge_min_ms=60)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def create_layout():
+    """有显示环境时使用真实的悬浮窗排版，否则跳过排版阶段"""
+    try:
+        import tkinter as tk
+        from utils.ui_transparent import TransparentTranslator
+        root = tk.Tk()
+        root.withdraw()
+        window = TransparentTranslator(root)
+        return window.set_text
+    except Exception:
+        return None
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def expected_translation(seg, glossary=None):
+    """桩服务的译文；使用术语表时术语替换为固定译名（完全由术语组成的片段不经过桩服务）"""
+    if glossary is None:
+        return stub_translate(seg, "zh")
+    return glossary.translate_full(seg) or stub_translate(glossary.apply(seg), "zh")
+
+
+def run_scenario(fixtures, iterations, concurrency, layout, check=True, glossary=None, progressive=False):
+    """
+    check: 是否逐条核对译文（加入 OCR 误差时译文来自翻译记忆中的相似句子，不核对）
+    glossary: 场景使用的术语表（Glossary），核对译文时按术语替换
+    progressive: 与逐段显示相同的翻译方式，first 为截图开始到第一段译文到达的时间
+    """
+    from utils import utils_ocr
+    from utils.utils_config import config_service
+    from utils.utils_translate import translate_text, translate_segments, split_segments
+
+    stages = {"grab": [], "ocr": [], "translate": [], "first": [], "layout": [], "total": []}
+    chunk_size = config_service.get().get("overlay", {}).get("stream_chunk", 2)
+
+    def translate_progressive(text, timings):
+        def on_result(index, result):
+            timings.setdefault("first", time.perf_counter())
+
+        segments = split_segments(text) or [text]
+        return "\n".join(translate_segments(segments, on_result=on_result, chunk_size=chunk_size))
+    errors = mismatches = 0
+
+    def pipeline(index):
+        timings = {}
+        start = time.perf_counter()
+        img = utils_ocr.grab_image((index, 0, 0, 0))
+        timings["grab"] = time.perf_counter()
+        text = utils_ocr.ocr_image(None, img)
+        timings["ocr"] = time.perf_counter()
+        translated = translate_progressive(text, timings) if progressive else translate_text(text)
+        timings["translate"] = time.perf_counter()
+        return start, timings, text, translated
+
+    def record(start, timings, text, translated):
+        nonlocal errors, mismatches
+        previous = start
+        for stage in ("grab", "ocr", "translate"):
+            stages[stage].append((timings[stage] - previous) * 1000)
+            previous = timings[stage]
+        if "first" in timings:
+            stages["first"].append((timings["first"] - start) * 1000)
+        if layout is not None:
+            layout_start = time.perf_counter()
+            layout(translated)
+            stages["layout"].append((time.perf_counter() - layout_start) * 1000)
+        stages["total"].append((time.perf_counter() - start) * 1000)
+
+        if "[翻译错误]" in translated:
+            errors += 1
+        elif check and translated != "\n".join(expected_translation(seg, glossary) for seg in split_segments(text)):
+            mismatches += 1
+
+    # 单请求延迟（串行）
+    for _ in range(iterations):
+        for index in range(len(fixtures)):
+            record(*pipeline(index))
+
+    # 吞吐量（并发），排版仍在主线程执行，与程序运行时一致
+    jobs = iterations * len(fixtures)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(pipeline, i % len(fixtures)) for i in range(jobs)]
+        for future in as_completed(futures):
+            _, _, _, translated = future.result()
+            if layout is not None:
+                layout(translated)
+    throughput = jobs / (time.perf_counter() - start)
+
+    result = {"throughput": round(throughput, 2), "errors": errors, "mismatches": mismatches}
+    for stage, samples in stages.items():
+        if samples:
+            result[f"{stage}_p50"] = round(statistics.median(samples), 3)
+            result[f"{stage}_p95"] = round(percentile(samples, 95), 3)
+    return result
+
+
+def _median_ms(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def run_ocr_compare(kind, fixtures, iterations, pool=None, glyph_height=32, profile_cfg=None, full=None):
+    """
+    OCR 对比场景（见 OCR_SCENARIOS）；pool 为 None 时（--stub-ocr）只测前处理
+    每个样本先识别一次作为预热，延迟取 iterations 次的中位数
+    """
+    from bench.bench_preprocess import accuracy
+    from utils.utils_capture import image_to_frame
+    from utils.utils_ocr import recognize_image
+    from utils.utils_ocr_profile import OCRProfiler, profile_name
+    from utils.utils_preprocess import preprocess
+
+    result = {}
+    if kind == "preprocess":
+        prep, before, after = [], 0, 0
+        for _, img, _ in fixtures:
+            frame = image_to_frame(img)
+            ms, out = _median_ms(lambda: preprocess(frame, glyph_height), iterations)
+            prep.append(ms)
+            before += img.width * img.height
+            after += out.width * out.height if out is not None else 0
+        result.update(preprocess_p50=round(statistics.median(prep), 3),
+                      pixels_before=before, pixels_after=after)
+        if pool is None:
+            return result
+
+    profiler = OCRProfiler()
+    if profile_cfg is not None:
+        profiler.configure(profile_cfg)
+    chosen = []
+    stats = {"before": [], "after": [], "before_acc": [], "after_acc": []}
+    same = 0
+    for name, img, truth in fixtures:
+        frame = image_to_frame(img)
+        if kind == "preprocess":
+            def run_before():
+                return recognize_image(pool, img)[0]
+
+            def run_after():
+                out = preprocess(frame, glyph_height)
+                return recognize_image(pool, out)[0] if out is not None else ""
+        else:
+            # 两种参数识别同一张前处理后的图片，只比较参数的差别
+            prepared = preprocess(frame, glyph_height)
+            region = profiler.get(name, full)
+            # 重复识别直到参数固定（最多 20 次）
+            for _ in range(20):
+                region.recognize(lambda profile: recognize_image(pool, prepared, profile))
+                if region.state == "locked":
+                    break
+            chosen.append(f"{name}:{profile_name(region.current)}")
+
+            def run_before():
+                return recognize_image(pool, prepared, full)[0]
+
+            def run_after():
+                return recognize_image(pool, prepared, region.current)[0]
+
+        run_before()
+        run_after()
+        before_ms, before_text = _median_ms(run_before, iterations)
+        after_ms, after_text = _median_ms(run_after, iterations)
+        stats["before"].append(before_ms)
+        stats["after"].append(after_ms)
+        stats["before_acc"].append(accuracy(before_text, truth))
+        stats["after_acc"].append(accuracy(after_text, truth))
+        same += " ".join(before_text.split()) == " ".join(after_text.split())
+
+    result.update(before_p50=round(statistics.median(stats["before"]), 3),
+                  after_p50=round(statistics.median(stats["after"]), 3),
+                  before_acc=round(statistics.mean(stats["before_acc"]), 3),
+                  after_acc=round(statistics.mean(stats["after_acc"]), 3),
+                  same_text=round(same / len(fixtures), 3))
+    if chosen:
+        result["profiles"] = " ".join(chosen)
+    return result
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """
+    返回回退项列表
+    只比较 p50 和吞吐量，p95 在样本较少时波动太大
+    """
+    regressions = []
+    for scenario, metrics in results.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        for key, value in metrics.items():
+            if key not in base or not (key == "throughput" or key.endswith("_p50")):
+                continue
+            if key == "throughput":
+                if value < base[key] * (1 - tolerance):
+                    regressions.append(f"{scenario}.{key}: {value} < {base[key]}")
+            elif value > base[key] * (1 + tolerance) and value - base[key] > floor_ms:
+                regressions.append(f"{scenario}.{key}: {value}ms > {base[key]}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GameTranslator 端到端基准测试")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=30, help="桩服务响应延迟")
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--stub-ocr", action="store_true", help="跳过 tesseract，OCR 直接返回样本原文")
+    parser.add_argument("--ocr-backend", default="subprocess", help="tesserocr 或 subprocess")
+    parser.add_argument("--scenario", action="append", help="只运行指定场景（可重复）")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的性能波动比例")
+    parser.add_argument("--floor-ms", type=float, default=2.0, help="小于该值的延迟变化不视为回退")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="将结果写入 JSON 文件")
+    parser.add_argument("--verbose", action="store_true", help="输出程序日志")
+    parser.add_argument("--log-level", help="程序日志级别（如 INFO），用于测量日志开销；默认不输出日志")
+    args = parser.parse_args()
+
+    if not args.stub_ocr and shutil.which("tesseract") is None and os.name != "nt":
+        print("未找到 tesseract，请安装或使用 --stub-ocr")
+        return 2
+
+    workdir = tempfile.mkdtemp(prefix="gt_bench_")
+    config_file = os.path.join(workdir, "config", "api_config.json")
+    os.makedirs(os.path.dirname(config_file))
+    # 必须在导入 utils 之前设置，配置服务在导入时确定配置路径
+    os.environ["GAMETRANSLATOR_CONFIG"] = config_file
+    log_level = (args.log_level or ("DEBUG" if args.verbose else "CRITICAL")).upper()
+    write_config(config_file, args.ocr_backend, SCENARIOS[0], log_level, tiling=not args.stub_ocr)
+
+    from utils import utils_ocr, utils_translate
+    from utils.utils_config import config_service
+    from utils.utils_http import http_pool
+    from utils.utils_router import router
+    from utils.utils_translate_async import engine_loop
+    from utils.utils_ocr_engine import OCREnginePool
+    from utils.utils_capture import image_to_frame, frame_to_image
+    from utils.utils_glossary import Glossary
+    from utils.utils_ocr_profile import OCRProfile
+
+    logging.getLogger().setLevel(getattr(logging, log_level))
+    config_service.check_interval = 0
+
+    fixtures = load_fixtures()
+    frames = [image_to_frame(img) for _, img, _ in fixtures]
+    # 截图替身：bbox[0] 为样本序号
+    utils_ocr.grab_image = lambda bbox: frames[bbox[0]]
+    noise = {"rate": 0.0, "random": random.Random(1)}
+    if args.stub_ocr:
+        truth = {image_digest(frame_to_image(frame)): text for frame, (_, _, text) in zip(frames, fixtures)}
+        stub_pool = OCREnginePool(lambda: TruthOCREngine(truth, noise), args.concurrency)
+        utils_ocr.get_ocr_pool = lambda: stub_pool
+        mode = "stub-ocr"
+    else:
+        utils_ocr.init_ocr()
+        mode = f"tesseract-{args.ocr_backend}"
+
+    layout = create_layout()
+    print(f"模式: {mode}，样本: {[name for name, _, _ in fixtures]}，排版: {'Tk' if layout else '跳过(无显示环境)'}")
+
+    results = {}
+    for scenario in SCENARIOS:
+        name, qps, fallback = scenario["name"], scenario.get("qps", 0), scenario.get("fallback")
+        if args.scenario and name not in args.scenario:
+            continue
+        write_config(config_file, args.ocr_backend, scenario, log_level, tiling=not args.stub_ocr)
+        http_pool.close()
+        engine_loop.close()
+        router.reset()
+        utils_translate._translation_memory = None
+        noise["rate"] = scenario.get("ocr_noise", 0.0) if args.stub_ocr else 0.0
+        noise["random"].seed(1)
+        server = StubTranslationServer(args.latency_ms, args.jitter_ms, scenario.get("error_rate", 0.0), seed=1,
+                                       qps_limit=qps, slow_rate=scenario.get("slow_rate", 0.0),
+                                       slow_ms=scenario.get("slow_ms", 0))
+        backup = StubTranslationServer(args.latency_ms, args.jitter_ms, seed=2)
+        with server, backup:
+            utils_translate.ENGINE_ENDPOINTS.update(server.endpoints())
+            if fallback:
+                utils_translate.ENGINE_ENDPOINTS[fallback] = backup.endpoints()[fallback]
+            glossary = Glossary(BENCH_GLOSSARY) if scenario.get("glossary") else None
+            results[name] = run_scenario(fixtures, args.iterations, args.concurrency, layout,
+                                         check=not noise["rate"], glossary=glossary,
+                                         progressive=scenario.get("progressive", False))
+            results[name]["requests"] = server.requests
+            results[name]["connections"] = server.connections
+            if qps:
+                results[name]["rate_limited"] = server.rate_limited
+            if fallback:
+                results[name]["fallback_requests"] = backup.requests
+            if scenario.get("tm"):
+                memory = utils_translate.get_translation_memory(config_service.get())
+                results[name]["tm_hits"] = memory.stats()["hits"]
+        print(f"{name:<14} " + "  ".join(f"{k}={v}" for k, v in results[name].items()))
+
+    ocr_cfg = config_service.get().get("ocr", {})
+    full = OCRProfile(ocr_cfg.get("lang", "chi_sim+eng"), ocr_cfg.get("psm", 6), 1.0)
+    for scenario in OCR_SCENARIOS:
+        name, kind = scenario["name"], scenario["compare"]
+        if args.scenario and name not in args.scenario:
+            continue
+        if args.stub_ocr and kind != "preprocess":
+            print(f"{name:<14} 跳过（需要 tesseract）")
+            continue
+        pool = None if args.stub_ocr else utils_ocr.get_ocr_pool()
+        results[name] = run_ocr_compare(kind, fixtures, args.iterations, pool,
+                                        ocr_cfg.get("glyph_height", 32),
+                                        config_service.get().get("ocr_profile", {}), full)
+        print(f"{name:<14} " + "  ".join(f"{k}={v}" for k, v in results[name].items()))
+
+    engine_loop.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({mode: results}, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline[mode] = results
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"基准已更新: {args.baseline}")
+        return 0
+
+    if mode not in baseline:
+        print(f"基准文件中没有 {mode} 模式的数据，跳过回退检查")
+        return 0
+    regressions = compare(results, baseline[mode], args.tolerance, args.floor_ms)
+    for item in regressions:
+        print(f"性能回退: {item}")
+    print("未发现性能回退" if not regressions else f"共 {len(regressions)} 项性能回退")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
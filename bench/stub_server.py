@@ -0,0 +1,191 @@
+# stub_server.py
+"""
+本地翻译桩服务
+模拟百度 / 谷歌 / DeepL / 有道接口的请求和响应格式，可配置延迟、长尾延迟、错误率和 QPS 上限，
+用于无网络环境下的基准测试
+"""
+import json
+import time
+import collections
+import random
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def stub_translate(text, to_lang):
+    """确定性的“翻译”结果，便于校验顺序和拼接"""
+    return f"<{to_lang}>{text}"
+
+
+class StubTranslationServer:
+    """
+    用法:
+        with StubTranslationServer(latency_ms=30) as server:
+            ENGINE_ENDPOINTS.update(server.endpoints())
+    """
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=0, port=0, qps_limit=0,
+                 slow_rate=0.0, slow_ms=0):
+        """
+        qps_limit: 每秒请求上限（0 为不限），超出时百度返回 54003，其它引擎返回 429
+        slow_rate, slow_ms: 按 slow_rate 的概率额外延迟 slow_ms（模拟长尾延迟）
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.qps_limit = qps_limit
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.random = random.Random(seed)
+
+        self.requests = 0
+        self.connections = 0
+        self.rate_limited = 0
+        self._accepted = collections.deque()
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # 支持 keep-alive
+            disable_nagle_algorithm = True  # 响应头和正文分两次写出，避免延迟确认带来的 40ms 等待
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                self._handle(urllib.parse.urlsplit(self.path).query)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self._handle(self.rfile.read(length).decode("utf-8"))
+
+            def _handle(self, body):
+                path = urllib.parse.urlsplit(self.path).path
+                with stub._lock:
+                    stub.requests += 1
+                    delay = stub.latency_ms + stub.random.uniform(0, stub.jitter_ms)
+                    if stub.random.random() < stub.slow_rate:
+                        delay += stub.slow_ms
+                    failed = stub.random.random() < stub.error_rate
+                    limited = stub._over_limit()
+                time.sleep(delay / 1000)
+
+                if limited:
+                    if path == "/api/trans/vip/translate":
+                        self._reply(200, {"error_code": "54003", "error_msg": "Invalid Access Limit"})
+                    else:
+                        self._reply(429, {"error": "too many requests"})
+                    return
+                if failed:
+                    self._reply(503, {"error": "stub injected failure"})
+                    return
+                route = ROUTES.get(path)
+                if route is None:
+                    self._reply(404, {"error": f"unknown path {path}"})
+                    return
+                content_type = self.headers.get("Content-Type", "")
+                self._reply(200, route(body, content_type))
+
+            def _reply(self, status, data):
+                payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    def _over_limit(self):
+        """最近 1 秒内接受的请求数达到上限时拒绝（调用方持有 _lock）"""
+        if not self.qps_limit:
+            return False
+        now = time.monotonic()
+        while self._accepted and now - self._accepted[0] >= 1.0:
+            self._accepted.popleft()
+        if len(self._accepted) >= self.qps_limit:
+            self.rate_limited += 1
+            return True
+        self._accepted.append(now)
+        return False
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def endpoints(self):
+        """可直接 update 到 utils_translate.ENGINE_ENDPOINTS 的地址表"""
+        return {
+            "baidu": f"{self.base_url}/api/trans/vip/translate",
+            "google": f"{self.base_url}/language/translate/v2",
+            "youdao": f"{self.base_url}/api",
+            "deepl": f"{self.base_url}/v2/translate",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# -------------------- 各引擎响应格式 --------------------
+def _form(body):
+    return urllib.parse.parse_qs(body, keep_blank_values=True)
+
+
+def baidu_route(body, content_type):
+    params = _form(body)
+    query, to_lang = params["q"][0], params.get("to", ["zh"])[0]
+    return {
+        "from": params.get("from", ["en"])[0],
+        "to": to_lang,
+        "trans_result": [{"src": line, "dst": stub_translate(line, to_lang)} for line in query.split("\n")]
+    }
+
+
+def google_route(body, content_type):
+    data = json.loads(body)
+    texts = data["q"] if isinstance(data["q"], list) else [data["q"]]
+    return {"data": {"translations": [
+        {"translatedText": stub_translate(text, data.get("target", "zh"))} for text in texts
+    ]}}
+
+
+def deepl_route(body, content_type):
+    params = _form(body)
+    to_lang = params.get("target_lang", ["ZH"])[0]
+    return {"translations": [
+        {"detected_source_language": params.get("source_lang", ["EN"])[0], "text": stub_translate(text, to_lang)}
+        for text in params["text"]
+    ]}
+
+
+def youdao_route(body, content_type):
+    params = _form(body)
+    return {"errorCode": "0", "translation": [stub_translate(params["q"][0], params.get("to", ["zh"])[0])]}
+
+
+ROUTES = {
+    "/api/trans/vip/translate": baidu_route,
+    "/language/translate/v2": google_route,
+    "/v2/translate": deepl_route,
+    "/api": youdao_route,
+}
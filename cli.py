@@ -0,0 +1,73 @@
+# cli.py
+"""
+命令行批量翻译（无界面）：截图目录 / 视频帧 → OCR → 翻译 → JSONL
+用法（项目根目录）:
+    python cli.py shots/ -o out.jsonl                  # 目录中的图片按文件名顺序处理
+    python cli.py play.mp4 --video-step 30 -o out.jsonl  # 每 30 帧取一帧（需要 opencv-python）
+    python cli.py shots/ -o out.jsonl --resume         # 中断后继续，已完成的项不再处理
+每行输出: {"id", "source", "frame"(视频), "status": ok/empty/ocr_failed/translate_error, "text", "translation"}
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GameTranslator 命令行批量翻译")
+    parser.add_argument("inputs", nargs="+", help="图片、视频文件或目录")
+    parser.add_argument("-o", "--output", required=True, help="输出 JSONL 文件")
+    parser.add_argument("--from-lang", default="en")
+    parser.add_argument("--to-lang", default="zh")
+    parser.add_argument("--config", help="配置文件路径（默认 config/api_config.json）")
+    parser.add_argument("--ocr-workers", type=int, help="并行 OCR 数（默认为 OCR 引擎池大小）")
+    parser.add_argument("--batch-size", type=int, default=16, help="每批翻译的条数")
+    parser.add_argument("--video-step", type=int, default=1, help="视频每隔多少帧取一帧")
+    parser.add_argument("--min-diff", type=float, default=4, help="视频帧与上一帧的平均灰度差低于该值时跳过")
+    parser.add_argument("--resume", action="store_true", help="断点续传：追加到已有输出，跳过已完成的项")
+    parser.add_argument("--progress", type=float, default=5.0, help="进度输出间隔(秒)，0 为不输出")
+    parser.add_argument("--stats", help="将吞吐量统计写入 JSON 文件")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    if args.config:
+        # 必须在导入 utils 之前设置，配置服务在导入时确定配置路径
+        os.environ["GAMETRANSLATOR_CONFIG"] = args.config
+
+    from utils.utils_ocr import init_ocr, get_ocr_pool
+    from utils.utils_batch import run_batch
+    from utils.utils_translate_async import engine_loop
+
+    logging.getLogger("GameTranslator").setLevel(args.log_level.upper())
+    try:
+        init_ocr()
+    except Exception as e:
+        print(f"OCR 引擎初始化失败: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        stats = run_batch(
+            args.inputs, args.output, args.from_lang, args.to_lang,
+            ocr_workers=args.ocr_workers or get_ocr_pool().size,
+            batch_size=args.batch_size,
+            video_step=max(1, args.video_step),
+            min_diff=args.min_diff,
+            resume=args.resume,
+            progress_interval=args.progress
+        )
+    except KeyboardInterrupt:
+        print("已中断，使用 --resume 继续", file=sys.stderr)
+        return 130
+    finally:
+        engine_loop.close()
+
+    print(stats.format(), file=sys.stderr)
+    if args.stats:
+        with open(args.stats, "w", encoding="utf-8") as f:
+            json.dump(stats.summary(), f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,22 @@
+import time
+
+# 启动计时从导入前开始（打包版的启动时间主要花在导入上）
+_started = time.perf_counter()
+
 import os
+import functools
+import multiprocessing
 import keyboard
-import threading
 import tkinter as tk
-from tkinter import messagebox
-from utils.logger import logger
+from tkinter import messagebox, simpledialog
+from utils.logger import logger, log_event, shutdown_logging
+from utils.utils_config import config_service
+from utils.utils_metrics import metrics, start_metrics_export
+from utils.utils_scheduler import JobScheduler, JobCancelled
+from utils.ui_dispatcher import TkDispatcher
 from utils.ui_transparent import TransparentTranslator
+from utils.ui_overlay_pool import OverlayManager
+from utils.ui_region import RegionSelector
 from utils.utils_corestep import ScreenshotTranslator
 
 
@@ -18,7 +30,34 @@ class EnhancedTranslator:
 
         self.game_lens = ScreenshotTranslator()
 
+        # 任务调度：有界工作线程池，结果通过 dispatcher 回到 Tk 主线程
+        scheduler_cfg = config_service.get().get("scheduler", {})
+        self.scheduler = JobScheduler(
+            workers=scheduler_cfg.get("workers", 2),
+            queue_size=scheduler_cfg.get("queue_size", 4)
+        )
+        self.dispatcher = TkDispatcher(self.root)
+        self.selecting = False  # 正在选择区域时忽略重复的截图快捷键
+        self._select_started = 0.0  # 选择窗口显示的时间，用于统计 stage.select
+
+        # 性能指标导出（本地端点 / 指标文件）
+        start_metrics_export(config_service.get().get("metrics", {}))
+
         self.translator = TransparentTranslator(self.root)
+        # 区域选择窗口预先创建并隐藏，按下快捷键时直接显示
+        self.selector = RegionSelector(self.root)
+
+        # 翻译结果窗口池：同一区域原地更新，限制同时显示的窗口数
+        overlay_cfg = config_service.get().get("overlay", {})
+        self.overlays = OverlayManager(
+            self.root,
+            max_visible=overlay_cfg.get("max_visible", 5),
+            pool_size=overlay_cfg.get("pool_size", 3)
+        )
+
+        # 实时翻译 / 多区域监视状态
+        self.realtime_mode = False
+        self.watch_mode = False
 
         # 注册快捷键
         self.register_hotkeys()
@@ -26,11 +65,20 @@ class EnhancedTranslator:
         # 显示初始指引
         self.show_guide_message()
 
+        elapsed = (time.perf_counter() - _started) * 1000
+        metrics.observe("stage.startup", elapsed)
+        log_event("app.ready", ms=round(elapsed, 1))
+
     def show_guide_message(self):
         """显示操作指引"""
         guide = """翻译工具已就绪
         快捷键:\t
         Ctrl+Alt+S - 截图翻译\t
+        Ctrl+Alt+L - 重新翻译上一次的区域\t
+        Ctrl+Alt+D - 实时翻译开/关\t
+        Ctrl+Alt+R - 保存最后一次截图区域\t
+        Ctrl+Alt+W - 多区域监视开/关\t
+        Ctrl+Alt+M - 显示性能统计\t
         Ctrl+Alt+Q - 退出程序\t
         操作提示:\t
         1.按下截图快捷键后，拖动鼠标选择区域\t
@@ -41,31 +89,91 @@ class EnhancedTranslator:
     def screenshot_translate(self):
         """执行截图翻译"""
         logger.info("用户触发截图翻译")
+        if self.selecting:
+            logger.info("正在选择区域，忽略重复触发")
+            return
+        self.selecting = True
+        self.dispatcher.post(self._show_selector)
+
+    def _show_selector(self):
+        # select_region 只负责显示选择窗口，选择在之后的鼠标事件中完成，耗时在回调里统计
+        self._select_started = time.perf_counter()
+        self.game_lens.select_region(self.selector, self._on_selected)
 
-        def callback(start_coords, result, is_error=False):
-            if is_error:
-                self.translator.show_temp_message(result, is_error=True)
-            elif result:
-                # 创建新翻译窗口
+    def _on_selected(self, bbox, start_coords):
+        metrics.observe("stage.select", (time.perf_counter() - self._select_started) * 1000)
+        self.selecting = False
+        if bbox:
+            self._submit_region(bbox, start_coords)
+
+    def repeat_translate(self):
+        """重新翻译最后一次截图区域，不需要重新选择（画面变化后再按一次即可）"""
+        logger.info("用户触发重新翻译上一次区域")
+        bbox, start_coords = self.game_lens.last_region()
+        if not bbox:
+            self.dispatcher.post(self.translator.show_temp_message, "请先使用截图翻译选择区域", True)
+            return
+        self._submit_region(bbox, start_coords)
+
+    def _submit_region(self, bbox, start_coords):
+        """按区域提交识别翻译任务，同一区域的旧任务会被取消"""
+        progress = None
+        if config_service.get().get("overlay", {}).get("progressive", True):
+            progress = functools.partial(self._on_progress, bbox)
+        if self.scheduler.submit(("region", bbox), self.game_lens.translate_region,
+                                 bbox, start_coords, functools.partial(self._on_result, bbox), progress) is None:
+            self.dispatcher.post(self.translator.show_temp_message, "任务繁忙，请稍后再试", True)
+
+    def _on_progress(self, bbox, start_coords, event, data):
+        # 工作线程（或异步翻译事件循环）中调用，切回 Tk 主线程逐段显示
+        self.dispatcher.post(self._show_progress, bbox, start_coords, event, data)
+
+    def _show_progress(self, bbox, start_coords, event, data):
+        key = ("region", bbox)
+        with metrics.span("stage.render_partial"):
+            if event == "source":
                 x, y = start_coords
-                translator = TransparentTranslator(self.root, x=x, y=y)
-                translator.set_text(result)
+                self.overlays.configure(config_service.get().get("overlay", {}))
+                self.overlays.show_segments(key, x, y, data)
+            elif event == "segment":
+                self.overlays.update_segment(key, *data)
 
-        # 在新线程中执行翻译
-        threading.Thread(
-            target=self.game_lens.update_translation,
-            args=(callback,),
-            daemon=True
-        ).start()
+    def _on_result(self, bbox, start_coords, result, is_error=False):
+        # 工作线程中调用，切回 Tk 主线程显示
+        self.dispatcher.post(self._show_result, bbox, start_coords, result, is_error)
+
+    def _show_result(self, bbox, start_coords, result, is_error=False):
+        if is_error:
+            # 逐段显示到一半的窗口不再有后续结果
+            self.overlays.hide(("region", bbox))
+            self.translator.show_temp_message(result, is_error=True)
+        elif result:
+            # 同一区域更新已有窗口，否则从窗口池取出一个
+            x, y = start_coords
+            with metrics.span("stage.render"):
+                self.overlays.configure(config_service.get().get("overlay", {}))
+                self.overlays.show(("region", bbox), x, y, result)
 
     def register_hotkeys(self):
         """注册全局快捷键"""
         keyboard.add_hotkey('ctrl+alt+s', self.screenshot_translate)
+        keyboard.add_hotkey('ctrl+alt+l', self.repeat_translate)
         keyboard.add_hotkey('ctrl+alt+d', self.toggle_realtime)
+        keyboard.add_hotkey('ctrl+alt+r', self.save_region)
+        keyboard.add_hotkey('ctrl+alt+w', self.toggle_watch)
+        keyboard.add_hotkey('ctrl+alt+m', self.show_metrics)
         keyboard.add_hotkey('ctrl+alt+q', self.exit_app)
 
+    def show_metrics(self):
+        """在单独的悬浮窗口中显示各阶段和各引擎的延迟统计"""
+        self.dispatcher.post(self._show_metrics)
+
+    def _show_metrics(self):
+        # 不复用指引窗口：指引窗口双击关闭后会被销毁，之后再写入会抛出 TclError
+        # 统计窗口由窗口池管理，双击关闭后再次按下快捷键会重新显示
+        self.overlays.show("metrics", 100, 100, metrics.format_summary())
+
     def toggle_realtime(self):
-        # TODO: 实时翻译待填充
         """切换实时翻译模式"""
         self.realtime_mode = not self.realtime_mode
         if self.realtime_mode:
@@ -73,11 +181,109 @@ class EnhancedTranslator:
         else:
             self.stop_realtime()
 
+    def start_realtime(self):
+        """开始监视最后一次截图区域"""
+        logger.info("用户开启实时翻译")
+
+        def callback(start_coords, result):
+            # 切回 Tk 主线程更新窗口
+            self.dispatcher.post(self._show_realtime_result, start_coords, result)
+
+        try:
+            self.game_lens.start_realtime(callback)
+        except Exception as e:
+            logger.warning(f"实时翻译启动失败: {e}")
+            self.realtime_mode = False
+            self.dispatcher.post(self.translator.show_temp_message, str(e), True)
+
+    def stop_realtime(self):
+        """停止实时翻译并关闭实时窗口"""
+        logger.info("用户关闭实时翻译")
+        self.game_lens.stop_realtime()
+        self.dispatcher.post(self._close_realtime_window)
+
+    def _show_realtime_result(self, start_coords, result):
+        if not self.realtime_mode:
+            return
+        # 实时模式只复用一个窗口，避免窗口堆积
+        x, y = start_coords
+        self.overlays.show("realtime", x, y, result)
+
+    def _close_realtime_window(self):
+        self.overlays.hide("realtime")
+
+    # -------------------- 多区域监视 --------------------
+    def save_region(self):
+        """将最后一次截图区域保存为命名区域（在 Tk 主线程中输入名称）"""
+        self.dispatcher.post(self._save_region_dialog)
+
+    def _save_region_dialog(self):
+        if not self.game_lens.last_bbox:
+            self.translator.show_temp_message("请先使用截图翻译选择区域", True)
+            return
+        name = simpledialog.askstring("保存区域", "区域名称:", parent=self.root,
+                                      initialvalue=self.game_lens.default_region_name())
+        if not name or not name.strip():
+            return
+        try:
+            self.game_lens.save_last_region(name.strip())
+        except Exception as e:
+            logger.warning(f"保存区域失败: {e}")
+            self.translator.show_temp_message(f"保存区域失败: {e}", True)
+            return
+        self.translator.show_temp_message(f"已保存区域: {name.strip()}")
+        if self.watch_mode:
+            # 监视中保存的区域立即加入监视
+            self.scheduler.submit("watch", self._start_watch_job)
+
+    def toggle_watch(self):
+        """切换多区域监视"""
+        self.watch_mode = not self.watch_mode
+        if self.watch_mode:
+            logger.info("用户开启多区域监视")
+            if self.scheduler.submit("watch", self._start_watch_job) is None:
+                self.watch_mode = False
+                self.dispatcher.post(self.translator.show_temp_message, "任务繁忙，请稍后再试", True)
+        else:
+            logger.info("用户关闭多区域监视")
+            # 取消还在等待 OCR 初始化的启动任务，否则它会在关闭之后启动监视线程
+            self.scheduler.cancel("watch")
+            self.game_lens.stop_watch()
+            self.dispatcher.post(self._close_watch_windows)
+
+    def _start_watch_job(self, token):
+        def callback(name, start_coords, result):
+            self.dispatcher.post(self._show_watch_result, name, start_coords, result)
+
+        try:
+            names = self.game_lens.start_watch(token, callback)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"多区域监视启动失败: {e}")
+            self.watch_mode = False
+            self.dispatcher.post(self.translator.show_temp_message, str(e), True)
+            return
+        logger.info(f"多区域监视: {', '.join(names)}")
+
+    def _show_watch_result(self, name, start_coords, result):
+        if not self.watch_mode:
+            return
+        # 每个区域一个窗口，原地更新
+        x, y = start_coords
+        self.overlays.show(("watch", name), x, y, result)
+
+    def _close_watch_windows(self):
+        for key in self.overlays.keys():
+            if isinstance(key, tuple) and key[0] == "watch":
+                self.overlays.hide(key)
+
     def exit_app(self):
         """安全退出程序"""
         logger.info("用户请求退出程序")
         if messagebox.askokcancel("退出", "确定要退出翻译工具吗？"):
             self.root.quit()
+            shutdown_logging()
             os._exit(0)
 
     def run(self):
@@ -86,5 +292,6 @@ class EnhancedTranslator:
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # 打包后 OCR 子进程需要
     app = EnhancedTranslator()
     app.run()
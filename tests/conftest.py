@@ -0,0 +1,79 @@
+# conftest.py
+import os
+import sys
+import json
+import itertools
+import tempfile
+import pytest
+
+# 与 bench 相同：从项目根目录导入 utils / bench
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from bench.run_bench import write_config
+from bench.stub_server import StubTranslationServer
+
+# 测试使用临时配置文件（以仓库中的配置为模板），必须在导入 utils 之前设置
+CONFIG_FILE = os.path.join(tempfile.mkdtemp(prefix="gt_test_"), "config", "api_config.json")
+os.makedirs(os.path.dirname(CONFIG_FILE))
+os.environ["GAMETRANSLATOR_CONFIG"] = CONFIG_FILE
+write_config(CONFIG_FILE, "subprocess", {"engine": "baidu"})
+
+# 每次改写配置使用新的修改时间，保证配置服务重新加载
+_mtimes = itertools.count(1_000_000_000 * 10 ** 9, 10 ** 9)
+
+
+@pytest.fixture
+def configure():
+    """
+    configure(scenario=None, **sections) 按 run_bench 的场景参数重写配置，sections 覆盖配置段中的字段
+    返回重新加载后的配置；测试结束后恢复默认配置
+    """
+    from utils.utils_config import config_service
+
+    def apply(scenario=None, **sections):
+        write_config(CONFIG_FILE, "subprocess", dict({"engine": "baidu"}, **(scenario or {})))
+        with open(CONFIG_FILE, encoding="utf-8") as f:
+            config = json.load(f)
+        for name, values in sections.items():
+            config[name] = dict(config.get(name, {}), **values)
+        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False)
+        mtime = next(_mtimes)
+        os.utime(CONFIG_FILE, ns=(mtime, mtime))
+        config_service.check_interval = 0
+        return config_service.get()
+
+    yield apply
+    apply()
+
+
+@pytest.fixture
+def stub_engines(monkeypatch):
+    """
+    stub_engines(**kwargs) 启动本地翻译桩服务（参数同 StubTranslationServer）并把引擎地址指向它
+    可多次调用，后启动的桩服务覆盖 engines 参数中列出的引擎
+    """
+    from utils import utils_translate
+    from utils.utils_http import http_pool
+    from utils.utils_router import router
+    from utils.utils_translate_async import engine_loop
+
+    servers = []
+
+    def start(engines=None, **kwargs):
+        server = StubTranslationServer(**kwargs).start()
+        servers.append(server)
+        for engine, url in server.endpoints().items():
+            if engines is None or engine in engines:
+                monkeypatch.setitem(utils_translate.ENGINE_ENDPOINTS, engine, url)
+        return server
+
+    http_pool.close()
+    router.reset()
+    yield start
+    engine_loop.close()
+    http_pool.close()
+    router.reset()
+    for server in servers:
+        server.stop()
@@ -0,0 +1,37 @@
+# test_cache.py
+"""翻译缓存：只从内存命中的常用条目，其访问时间也会写回磁盘，磁盘 LRU 淘汰时不会被删掉"""
+from utils.utils_cache import TranslationCache
+
+
+def test_memory_hits_keep_entry_on_disk(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = TranslationCache(db_path, memory_size=1000, disk_size=50)
+    cache.put("baidu", "en", "zh", "The gate is locked.", "门锁着。")
+    # 写入 150 条其它译文（第 100 条时检查磁盘容量并淘汰），期间常用条目一直从内存命中
+    for i in range(150):
+        cache.put("baidu", "en", "zh", f"Line {i}.", f"第 {i} 行。")
+        assert cache.get("baidu", "en", "zh", "The gate is locked.") == "门锁着。"
+    assert cache.disk_hits == 0
+    cache.close()
+
+    # 重启后内存缓存为空，只能从磁盘命中
+    cache = TranslationCache(db_path)
+    assert cache.get("baidu", "en", "zh", "The gate is locked.") == "门锁着。"
+    assert cache.get("baidu", "en", "zh", "Line 0.") is None
+    cache.close()
+
+
+def test_access_written_back_when_leaving_memory(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.db"), memory_size=2)
+    cache.put("baidu", "en", "zh", "Hot line.", "常用")
+    cache.put("baidu", "en", "zh", "Cold line.", "冷门")
+    cache.get("baidu", "en", "zh", "Hot line.")
+    accessed = dict(cache._db.execute("SELECT src, accessed FROM translations").fetchall())
+    assert accessed["Hot line."] <= accessed["Cold line."]  # 内存命中尚未写回
+
+    # 再写入两条，常用条目被挤出内存时写回它的访问时间
+    cache.put("baidu", "en", "zh", "New line 1.", "新 1")
+    cache.put("baidu", "en", "zh", "New line 2.", "新 2")
+    accessed = dict(cache._db.execute("SELECT src, accessed FROM translations").fetchall())
+    assert accessed["Hot line."] > accessed["Cold line."]
+    cache.close()
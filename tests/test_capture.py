@@ -0,0 +1,139 @@
+# test_capture.py
+"""GDI 截图后端的句柄管理（用计数的假 GDI 函数代替 Windows API，非 Windows 环境也能运行）"""
+import ctypes
+import threading
+import numpy as np
+from utils.utils_capture import GDICaptureBackend
+
+
+class FakeGDI:
+    """记录仍未释放的 DC 和位图"""
+    def __init__(self):
+        self.live = set()
+        self._next = 0
+        self.blitting = threading.Event()  # 设置 hold 时，BitBlt 开始后通知测试
+        self.hold = None
+
+    def _new(self, kind):
+        self._next += 1
+        handle = (kind, self._next)
+        self.live.add(handle)
+        return handle
+
+    # user32
+    def GetWindowDC(self, hwnd):
+        return self._new("window_dc")
+
+    def ReleaseDC(self, hwnd, dc):
+        self.live.remove(dc)
+
+    # gdi32
+    def CreateCompatibleDC(self, dc):
+        return self._new("mem_dc")
+
+    def CreateCompatibleBitmap(self, dc, width, height):
+        return self._new("bitmap")
+
+    def SelectObject(self, dc, obj):
+        return None
+
+    def DeleteObject(self, obj):
+        self.live.remove(obj)
+
+    def DeleteDC(self, dc):
+        self.live.remove(dc)
+
+    def BitBlt(self, dst, x, y, width, height, src, src_x, src_y, rop):
+        if self.hold is not None:
+            self.blitting.set()
+            self.hold.wait(5)
+        assert dst in self.live and src in self.live, "DC 在截图期间被释放"
+        return 1
+
+    def GetDIBits(self, dc, bitmap, start, lines, bits, bmi, usage):
+        assert dc in self.live and bitmap in self.live, "位图在截图期间被释放"
+        return lines
+
+
+def fake_backend():
+    backend = GDICaptureBackend.__new__(GDICaptureBackend)
+    gdi = FakeGDI()
+    backend._user32 = backend._gdi32 = gdi
+    backend._local = threading.local()
+    backend._all_states = []
+    backend._closed = False
+    backend._lock = threading.Lock()
+    backend._ctypes = ctypes
+
+    # _prepare 需要 BITMAPINFO 结构体，测试中用一个整数代替
+    def prepare(state, width, height):
+        if state["size"] != (width, height):
+            state.update(size=(width, height), bitmap=gdi.CreateCompatibleBitmap(state["src_dc"], width, height),
+                         buffer=np.empty((height, width, 4), dtype=np.uint8), bmi=ctypes.c_int(0))
+    backend._prepare = prepare
+    return backend, gdi
+
+
+def run_in_thread(func):
+    thread = threading.Thread(target=func)
+    thread.start()
+    thread.join()
+
+
+def test_release_thread_frees_handles():
+    backend, gdi = fake_backend()
+
+    def watcher():
+        backend._prepare(backend._state(), 200, 100)
+        assert len(gdi.live) == 3
+        backend.release_thread()
+
+    # 反复开关监视：每次是新线程，句柄不应累积
+    for _ in range(10):
+        run_in_thread(watcher)
+        assert gdi.live == set()
+        assert backend._all_states == []
+
+
+def test_close_releases_remaining_threads():
+    backend, gdi = fake_backend()
+    for _ in range(3):
+        run_in_thread(lambda: backend._prepare(backend._state(), 50, 50))
+    assert len(gdi.live) == 9
+    backend.close()
+    assert gdi.live == set()
+
+
+def test_release_after_close_is_noop():
+    backend, gdi = fake_backend()
+    backend._prepare(backend._state(), 10, 10)
+    local = backend._local
+    backend.close()
+    # 线程在 close 之后才退出：状态已被释放，不能重复释放
+    backend._local = local
+    backend.release_thread()
+    assert gdi.live == set()
+
+
+def test_close_waits_for_grab_in_progress():
+    """配置修改时旧后端被关闭：正在截图的线程的句柄在截图结束后由它自己释放"""
+    backend, gdi = fake_backend()
+    run_in_thread(lambda: backend.grab((0, 0, 20, 10)))  # 空闲线程，close 时直接释放
+    gdi.hold = threading.Event()
+    frames = []
+    grabber = threading.Thread(target=lambda: frames.append(backend.grab((0, 0, 20, 10))))
+    grabber.start()
+    assert gdi.blitting.wait(5)
+
+    backend.close()
+    assert len(gdi.live) == 3  # 只剩正在截图的线程的 DC 和位图
+    gdi.hold.set()
+    grabber.join(5)
+    assert frames and frames[0].shape == (10, 20, 3)
+    assert gdi.live == set()
+
+    # 关闭后仍持有旧后端的线程：每次截图临时创建的句柄用完即释放
+    gdi.hold = None
+    backend.grab((0, 0, 20, 10))
+    backend.grab((0, 0, 20, 10))
+    assert gdi.live == set()
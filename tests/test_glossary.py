@@ -0,0 +1,54 @@
+# test_glossary.py
+"""术语表：术语匹配、完全由术语组成的文本本地翻译、送往引擎前替换为占位符并在译文中还原"""
+import pytest
+from bench.run_bench import BENCH_GLOSSARY
+from bench.stub_server import stub_translate
+from utils.utils_glossary import Glossary
+from utils.utils_translate import translate_segments
+
+
+@pytest.fixture
+def glossary():
+    return Glossary(dict(BENCH_GLOSSARY, Axe="斧头", Sword="剑"))
+
+
+def terms(glossary, text):
+    return [text[start:end] for start, end, _ in glossary.find(text)]
+
+
+def test_find_whole_words_longest_first(glossary):
+    assert terms(glossary, "Taxes are due") == []
+    assert terms(glossary, "Sell the axe and the IRON SWORD") == ["axe", "IRON SWORD"]
+    assert terms(glossary, "Swordsman, take the Sword.") == ["Sword"]
+
+
+def test_translate_full(glossary):
+    assert glossary.translate_full("Reward: 150 Gold, Leather Boots") == "奖励: 150 金币, 皮靴"
+    assert glossary.translate_full("Quest Log") == "任务日志"
+    assert glossary.translate_full("Talk to the Knight") is None
+
+
+def test_protect_and_restore(glossary):
+    text, mapping = glossary.protect("The Knight dropped a Sword and another Sword.")
+    assert text == "The {0} dropped a {1} and another {1}."
+    assert mapping == {0: "骑士", 1: "剑"}
+    # 引擎可能把占位符转为全角或在括号中加空格
+    assert Glossary.restore("{0}掉落了一把｛1｝和另一把{ 1 }。", mapping) == ("骑士掉落了一把剑和另一把剑。", 0)
+    assert Glossary.restore("骑士掉落了一把{1}。", mapping) == ("骑士掉落了一把剑。", 1)
+
+
+def test_existing_placeholder_text_is_not_protected(glossary):
+    assert glossary.protect("Press {0} to equip the Sword") == ("Press {0} to equip the Sword", {})
+
+
+def test_terms_protected_end_to_end(configure, stub_engines):
+    configure({"glossary": True})
+    server = stub_engines()
+    sentence = "Talk to the Knight about the Iron Sword."
+    # 术语以占位符送往引擎（桩服务原样返回），还原后是固定译名，不是引擎对术语的翻译
+    assert translate_segments([sentence]) == [stub_translate("Talk to the 骑士 about the 铁剑.", "zh")]
+    assert server.requests == 1
+
+    # 完全由术语组成的片段不请求引擎
+    assert translate_segments(["Quest Log", "Reward: 150 Gold"]) == ["任务日志", "奖励: 150 金币"]
+    assert server.requests == 1
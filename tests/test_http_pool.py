@@ -0,0 +1,63 @@
+# test_http_pool.py
+"""HTTP 会话池：同一引擎的请求复用 keep-alive 连接，握手次数不随请求数增长；修改连接池参数时不打断进行中的请求"""
+import threading
+from bench.stub_server import StubTranslationServer
+from utils.utils_http import HTTPSessionPool
+
+
+def test_requests_reuse_one_connection():
+    pool = HTTPSessionPool(pool_size=4)
+    with StubTranslationServer() as server:
+        url = server.endpoints()["google"]
+        for i in range(20):
+            response = pool.session("google").post(url, json={"q": [f"line {i}"], "target": "zh"},
+                                                   timeout=pool.timeout)
+            response.raise_for_status()
+            assert response.json()["data"]["translations"][0]["translatedText"] == f"<zh>line {i}"
+        stats = pool.stats()["google"]
+        pool.close()
+
+    assert server.requests == 20
+    assert server.connections == 1
+    assert stats == {"requests": 20, "connections": 1, "reused": 19}
+
+
+def test_engines_use_separate_sessions():
+    pool = HTTPSessionPool(pool_size=4)
+    with StubTranslationServer() as server:
+        endpoints = server.endpoints()
+        for _ in range(5):
+            pool.session("google").post(endpoints["google"], json={"q": ["a"], "target": "zh"}).raise_for_status()
+            pool.session("deepl").post(endpoints["deepl"], data={"text": ["a"], "target_lang": "ZH"}).raise_for_status()
+        pool.close()
+
+    assert server.requests == 10
+    assert server.connections == 2
+
+
+def test_configure_keeps_inflight_request_session_open():
+    pool = HTTPSessionPool(pool_size=4)
+    with StubTranslationServer(latency_ms=300) as server:
+        url = server.endpoints()["google"]
+        old = pool.session("google")
+        closed = []
+        close = old.close
+        old.close = lambda: (closed.append(True), close())
+
+        responses = []
+        request = threading.Thread(target=lambda: responses.append(
+            old.post(url, json={"q": ["slow line"], "target": "zh"}, timeout=pool.timeout)))
+        request.start()
+        request.join(0.1)
+        assert request.is_alive()
+
+        # 请求进行中修改连接池大小：新请求换用新会话，旧会话等请求结束后再关闭
+        pool.configure({"pool_size": 8})
+        assert closed == []
+        new = pool.session("google")
+        assert new is not old
+        request.join(5)
+        assert responses[0].json()["data"]["translations"][0]["translatedText"] == "<zh>slow line"
+        assert closed == [True]
+        new.post(url, json={"q": ["next"], "target": "zh"}, timeout=pool.timeout).raise_for_status()
+        pool.close()
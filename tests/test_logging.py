@@ -0,0 +1,110 @@
+# test_logging.py
+"""后台队列日志：队列满时丢弃不阻塞、结构化事件的格式与采样、log_text 开关"""
+import queue
+import logging
+import threading
+import time
+import pytest
+from utils import logger as logger_module
+from utils.logger import (DroppingQueueHandler, BackgroundListener, EventMessage, settings,
+                          log_event, log_text)
+
+
+def make_record(message):
+    return logging.LogRecord("GameTranslator", logging.INFO, __file__, 0, message, None, None)
+
+
+class SlowHandler(logging.Handler):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.messages = []
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.messages.append(record.getMessage())
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    start = time.perf_counter()
+    for i in range(5):
+        handler.handle(make_record(f"line {i}"))
+    assert time.perf_counter() - start < 0.1
+    assert handler.dropped == 3
+    assert handler.queue.qsize() == 2
+
+
+def test_listener_writes_in_background_and_stops_with_full_queue():
+    log_queue = queue.Queue(3)
+    writer = SlowHandler(0.02)
+    handler = DroppingQueueHandler(log_queue)
+    listener = BackgroundListener(log_queue, writer)
+    listener.start()
+
+    start = time.perf_counter()
+    for i in range(20):
+        handler.handle(make_record(f"line {i}"))
+    # 调用线程只入队：20 条日志的耗时远小于写入耗时 (20 x 20ms)
+    assert time.perf_counter() - start < 0.1
+
+    stopper = threading.Thread(target=listener.stop)
+    stopper.start()
+    stopper.join(5)
+    assert not stopper.is_alive()
+    assert len(writer.messages) + handler.dropped == 20
+    assert writer.messages == sorted(writer.messages, key=lambda m: int(m.split()[1]))
+
+
+def test_event_message_is_logfmt():
+    message = EventMessage("translate.ok", {"engine": "baidu", "ms": 12.345, "src": "Open the door", "n": 3})
+    assert str(message) == 'event=translate.ok engine=baidu ms=12.35 src="Open the door" n=3'
+    assert str(EventMessage("x", {"empty": ""})) == 'event=x empty=""'
+
+
+@pytest.fixture
+def log_settings(monkeypatch):
+    monkeypatch.setattr(settings, "sample_rate", 1.0)
+    monkeypatch.setattr(settings, "sample_events", {})
+    monkeypatch.setattr(settings, "log_text", True)
+    return settings
+
+
+def test_log_event_sampling(log_settings, caplog):
+    caplog.set_level(logging.INFO, logger="GameTranslator")
+    log_settings.sample_events = {"hot": 0.0, "half": 0.5}
+    for _ in range(400):
+        log_event("hot", n=1)
+        log_event("half", n=1)
+        log_event("cold", n=1)
+    counts = {event: sum(1 for r in caplog.records if getattr(r, "event", None) == event)
+              for event in ("hot", "half", "cold")}
+    assert counts["hot"] == 0
+    assert counts["cold"] == 400
+    assert 120 < counts["half"] < 280
+    record = next(r for r in caplog.records if getattr(r, "event", None) == "cold")
+    assert record.fields == {"n": 1}
+
+
+def test_log_event_skips_disabled_level(log_settings, caplog):
+    caplog.set_level(logging.INFO, logger="GameTranslator")
+    log_event("debug.only", level=logging.DEBUG, n=1)
+    assert not caplog.records
+
+
+def test_log_text_switch(log_settings):
+    assert log_text("你好 world") == "你好 world"
+    log_settings.log_text = False
+    assert log_text("你好 world") == "<8字>"
+
+
+def test_configure_logging_applies_settings(log_settings):
+    root = logging.getLogger()
+    level = root.level
+    try:
+        logger_module.configure_logging({"level": "warning", "log_text": False,
+                                         "sample_rate": 0.1, "sample_events": {"a": 0.5}})
+        assert root.level == logging.WARNING
+        assert (settings.log_text, settings.sample_rate, settings.sample_events) == (False, 0.1, {"a": 0.5})
+    finally:
+        root.setLevel(level)
@@ -0,0 +1,47 @@
+# test_ocr_pool.py
+"""OCR 引擎池：关闭时借出中的引擎在归还时关闭，等待归还的调用方不会一直阻塞"""
+import threading
+from utils.utils_ocr_engine import OCREnginePool
+
+
+class FakeEngine:
+    def __init__(self, engines):
+        self.closed = False
+        engines.append(self)
+
+    def recognize(self, img):
+        return img
+
+    def close(self):
+        self.closed = True
+
+
+def test_engines_in_use_closed_on_release():
+    engines = []
+    pool = OCREnginePool(lambda: FakeEngine(engines), size=2)
+    with pool.acquire() as busy:
+        with pool.acquire() as idle:
+            pass
+        pool.close()
+        assert idle.closed and not busy.closed
+    assert busy.closed
+
+    # 关闭后仍持有旧引用的调用方使用临时引擎，用完即关闭
+    assert pool.recognize("text") == "text"
+    assert all(engine.closed for engine in engines)
+
+
+def test_waiter_released_when_pool_closed():
+    engines = []
+    pool = OCREnginePool(lambda: FakeEngine(engines), size=1)
+    result = {}
+    with pool.acquire():
+        waiter = threading.Thread(target=lambda: result.setdefault("text", pool.recognize("text")), daemon=True)
+        waiter.start()
+        waiter.join(0.1)
+        assert waiter.is_alive()  # 唯一的引擎被占用，等待归还
+        pool.close()
+    waiter.join(5)
+
+    assert result == {"text": "text"}
+    assert len(engines) == 2 and all(engine.closed for engine in engines)
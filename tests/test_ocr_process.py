@@ -0,0 +1,35 @@
+# test_ocr_process.py
+"""多进程 OCR：子进程不打开日志文件，日志经队列交给主进程写入"""
+import time
+import logging
+from logging.handlers import QueueHandler
+from utils.utils_ocr_engine import ProcessOCRPool
+
+
+def worker_logging_state():
+    """在 OCR 子进程中执行"""
+    from utils import logger as logger_module
+    root = logging.getLogger()
+    logger_module.logger.warning("worker log line")
+    return [type(handler).__name__ for handler in root.handlers], len(logger_module._listeners)
+
+
+def test_worker_logs_forwarded_without_file_handler(caplog):
+    caplog.set_level(logging.INFO)
+    pool = ProcessOCRPool("subprocess", None, "eng", 6, 3, processes=1)
+    try:
+        pool.warmup()
+        handlers, listeners = pool._get_executor().submit(worker_logging_state).result(30)
+        assert handlers == [QueueHandler.__name__]
+        assert listeners == 0
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and \
+                not any(r.getMessage() == "worker log line" for r in caplog.records):
+            time.sleep(0.05)
+        record = next(r for r in caplog.records if r.getMessage() == "worker log line")
+        assert record.name == "GameTranslator"
+        assert record.levelno == logging.WARNING
+        assert record.processName != "MainProcess"
+    finally:
+        pool.close()
@@ -0,0 +1,36 @@
+# test_preprocess.py
+"""OCR 前处理：去掉对话框边框，紧贴文字截图时不删除首字的竖笔"""
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+from bench.fixtures import load_font, load_fixtures
+from utils.utils_capture import image_to_frame
+from utils.utils_preprocess import to_gray, ink_mask, remove_lines, preprocess
+
+
+def tight_crop(text, x=2):
+    """只框住一行文字的截图：首字距左边缘 x 像素"""
+    img = Image.new("RGB", (200, 24), (24, 28, 40))
+    ImageDraw.Draw(img).text((x, 2), text, font=load_font(18), fill=(245, 245, 245))
+    return image_to_frame(img)
+
+
+@pytest.mark.parametrize("text", ["Bill", "Hello", "Level", "I am here"])
+def test_tight_crop_keeps_first_stem(text):
+    ink = ink_mask(to_gray(tight_crop(text)))
+    stem = np.flatnonzero(np.count_nonzero(ink, axis=0))[0]
+    assert np.array_equal(remove_lines(ink), ink)
+
+    # 前处理结果（裁剪 + 缩放后）左侧第一列文字仍与原图一样高
+    page = np.asarray(preprocess(tight_crop(text), glyph_height=0)) < 128
+    first = np.flatnonzero(np.count_nonzero(page, axis=0))[0]
+    assert np.count_nonzero(page[:, first]) == np.count_nonzero(ink[:, stem])
+
+
+def test_dialog_border_removed():
+    for name, img, _ in load_fixtures(["en_small", "en_dialog"]):
+        ink = remove_lines(ink_mask(to_gray(image_to_frame(img))))
+        width = ink.shape[1]
+        # 边框在 x=4..5 和 width-6..width-5，文字从 x=16 开始
+        assert not ink[:, :12].any() and not ink[:, width - 12:].any(), name
+        assert ink[:, 16:width - 16].any(), name
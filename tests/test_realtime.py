@@ -0,0 +1,47 @@
+# test_realtime.py
+"""实时翻译：停止后才返回的翻译结果不再回调（包括停止后立即重新启动的情况）"""
+import threading
+import numpy as np
+import pytest
+from utils import utils_realtime
+from utils.utils_realtime import RealtimeWatcher
+
+BBOX = (0, 0, 32, 32)
+
+
+@pytest.fixture
+def slow_translate(monkeypatch):
+    """翻译阻塞到测试放行为止，用于模拟 stop 等待超时后仍在进行的翻译"""
+    started, release = threading.Event(), threading.Event()
+
+    def translate(text):
+        started.set()
+        release.wait(5)
+        return f"<zh>{text}"
+
+    monkeypatch.setattr(utils_realtime, "grab_image", lambda bbox: np.zeros((32, 32, 3), dtype=np.uint8))
+    monkeypatch.setattr(utils_realtime, "ocr_image", lambda bbox, frame: "The gate is locked.")
+    monkeypatch.setattr(utils_realtime, "translate_text", translate)
+    monkeypatch.setattr(utils_realtime, "release_capture", lambda: None)
+    return started, release
+
+
+@pytest.mark.parametrize("restart", [False, True], ids=["stop", "restart"])
+def test_no_callback_after_stop(slow_translate, restart):
+    started, release = slow_translate
+    results = []
+    watcher = RealtimeWatcher(lambda: BBOX, lambda bbox, text: results.append(text), interval=0.01)
+    watcher.start()
+    assert started.wait(5)
+    old_thread = watcher._thread
+
+    watcher.stop()  # 翻译仍在进行，等待 interval + 1 秒后超时返回
+    assert old_thread.is_alive()
+    if restart:
+        watcher.start()
+    release.set()
+    old_thread.join(5)
+
+    assert not old_thread.is_alive()
+    watcher.stop()
+    assert results == []
@@ -0,0 +1,35 @@
+# test_region_select.py
+"""区域选择：选择结果经回调返回并记为最后一次区域，取消选择不覆盖；重复翻译直接使用最后一次区域"""
+from utils.utils_corestep import ScreenshotTranslator
+
+
+class FakeSelector:
+    """代替预先创建的 RegionSelector，只记录回调，由测试模拟鼠标选择完成"""
+    def __init__(self):
+        self.shown = 0
+        self.on_done = None
+
+    def select(self, on_done):
+        self.shown += 1
+        self.on_done = on_done
+
+
+def test_selection_updates_last_region():
+    lens = ScreenshotTranslator.__new__(ScreenshotTranslator)
+    lens.last_bbox = None
+    selector = FakeSelector()
+    selected = []
+    assert lens.last_region() == (None, None)
+
+    lens.select_region(selector, lambda bbox, start: selected.append((bbox, start)))
+    assert selected == []  # 显示窗口后立即返回，选择在之后的鼠标事件中完成
+    selector.on_done((10, 20, 110, 80), (10, 20))
+    assert selected == [((10, 20, 110, 80), (10, 20))]
+    assert lens.last_region() == ((10, 20, 110, 80), (10, 20))
+
+    # 按 Esc 取消：回调收到 None，最后一次区域不变
+    lens.select_region(selector, lambda bbox, start: selected.append((bbox, start)))
+    selector.on_done(None, None)
+    assert selected[-1] == (None, None)
+    assert lens.last_region() == ((10, 20, 110, 80), (10, 20))
+    assert selector.shown == 2
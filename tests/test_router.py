@@ -0,0 +1,156 @@
+# test_router.py
+"""引擎路由：熔断、半开探测、备用引擎顺序、对冲请求，以及备用引擎译文的缓存归属"""
+import time
+import threading
+import pytest
+from bench.stub_server import stub_translate
+from utils.utils_router import EngineRouter, EngineHealth
+from utils.utils_translate import (translate_segments, get_translation_cache, batch_failed,
+                                   RATE_LIMITED_ERROR, TRANSLATE_ERROR_PREFIX)
+
+FAILED = f"{TRANSLATE_ERROR_PREFIX} 请求超时"
+
+
+def make_router(**router_cfg):
+    router = EngineRouter()
+    # 错误率阈值设为不可达，只由连续失败次数触发熔断
+    router.configure(dict({"error_rate_threshold": 2.0}, **router_cfg))
+    return router
+
+
+def state(router, engine):
+    return router._get(engine).state
+
+
+def test_circuit_opens_after_failure_threshold():
+    router = make_router(failure_threshold=3)
+    for _ in range(2):
+        router.record("baidu", 10, False)
+    assert state(router, "baidu") == EngineHealth.CLOSED
+    assert router.candidates(["baidu"]) == ["baidu"]
+
+    router.record("baidu", 10, False)
+    assert state(router, "baidu") == EngineHealth.OPEN
+    assert router.candidates(["baidu"]) == []
+    assert router.route(["baidu"], lambda engine: [FAILED], batch_failed) == (None, None)
+
+
+def test_half_open_sends_exactly_one_probe():
+    router = make_router(failure_threshold=1, cooldown=0.05)
+    router.record("baidu", 10, False)
+    assert router.candidates(["baidu"]) == []
+    time.sleep(0.06)
+
+    calls = []
+    release = threading.Event()
+
+    def probe(engine):
+        calls.append(engine)
+        release.wait(5)
+        return ["ok"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(router.route(["baidu"], probe, batch_failed)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["baidu"]
+    assert results.count(("baidu", ["ok"])) == 1
+    assert results.count((None, None)) == 4
+    assert state(router, "baidu") == EngineHealth.CLOSED
+
+
+def test_failed_probe_reopens_circuit():
+    router = make_router(failure_threshold=1, cooldown=0.05)
+    router.record("baidu", 10, False)
+    time.sleep(0.06)
+    assert router.route(["baidu"], lambda engine: [FAILED], batch_failed) == ("baidu", [FAILED])
+    assert state(router, "baidu") == EngineHealth.OPEN
+    assert router.candidates(["baidu"]) == []
+
+
+def test_failover_follows_candidate_order():
+    router = make_router(failure_threshold=5)
+    calls = []
+
+    def call(engine):
+        calls.append(engine)
+        return ["ok"] if engine == "deepl" else [FAILED]
+
+    engines = ["baidu", "google", "deepl"]
+    assert router.candidates(engines) == engines
+    assert router.route(engines, call, batch_failed) == ("deepl", ["ok"])
+    assert calls == engines
+
+    # 有样本后备用引擎按延迟排序：更快的 deepl 排在 google 前面，主引擎仍在最前
+    router.record("google", 500, True)
+    calls.clear()
+    assert router.candidates(engines) == ["baidu", "deepl", "google"]
+    assert router.route(engines, call, batch_failed) == ("deepl", ["ok"])
+    assert calls == ["baidu", "deepl"]
+
+
+def test_local_throttling_does_not_open_circuit():
+    """本地令牌桶排队超时不是引擎故障：不计入熔断统计，切换到下一个引擎"""
+    router = make_router(failure_threshold=1, cooldown=60)
+    calls = []
+
+    def call(engine):
+        calls.append(engine)
+        return [RATE_LIMITED_ERROR] if engine == "baidu" else ["ok"]
+
+    for _ in range(3):
+        assert router.route(["baidu", "google"], call, batch_failed) == ("google", ["ok"])
+    assert calls == ["baidu", "google"] * 3
+    assert state(router, "baidu") == EngineHealth.CLOSED
+    assert router._get("baidu").samples == 0
+
+
+def test_throttled_probe_returns_probe_slot():
+    router = make_router(failure_threshold=1, cooldown=0.05)
+    router.record("baidu", 10, False)
+    time.sleep(0.06)
+    assert router.route(["baidu"], lambda engine: [RATE_LIMITED_ERROR], batch_failed) == \
+        ("baidu", [RATE_LIMITED_ERROR])
+    assert state(router, "baidu") == EngineHealth.HALF_OPEN
+    assert router.candidates(["baidu"]) == ["baidu"]
+
+
+@pytest.mark.parametrize("primary_ms, hedged", [(20, False), (500, True)])
+def test_hedge_fires_after_hedge_delay(primary_ms, hedged):
+    router = make_router(hedge=True, hedge_min_ms=100)
+    assert router.hedge_delay("baidu") == pytest.approx(0.1)
+    start = time.perf_counter()
+    sent = {}
+
+    def call(engine):
+        sent[engine] = time.perf_counter() - start
+        if engine == "baidu":
+            time.sleep(primary_ms / 1000)
+        return [engine]
+
+    engine, results = router.route(["baidu", "google"], call, batch_failed)
+    if hedged:
+        assert (engine, results) == ("google", ["google"])
+        assert 0.1 <= sent["google"] < 0.3
+    else:
+        assert (engine, results) == ("baidu", ["baidu"])
+        assert "google" not in sent
+
+
+@pytest.mark.parametrize("async_enabled", [False, True], ids=["sync", "async"])
+def test_fallback_results_cached_under_fallback_engine(configure, stub_engines, async_enabled):
+    config = configure({"cache": True, "fallback": "google"}, **{"async": {"enabled": async_enabled}})
+    stub_engines(engines=["baidu"], error_rate=1.0)
+    stub_engines(engines=["google"])
+    text = f"Fallback line {async_enabled}."
+
+    assert translate_segments([text]) == [stub_translate(text, "zh")]
+    cache = get_translation_cache(config)
+    assert cache.get("google", "en", "zh", text) == stub_translate(text, "zh")
+    assert cache.get("baidu", "en", "zh", text) is None
@@ -0,0 +1,70 @@
+# test_streaming.py
+"""逐段显示：先回调原文分段，每段译文回调且只回调一次，拼接结果与最终译文一致"""
+import threading
+import pytest
+from bench.stub_server import stub_translate
+from utils import utils_ocr
+from utils.utils_corestep import ScreenshotTranslator
+from utils.utils_scheduler import CancelToken
+from utils.utils_translate import translate_segments, get_translation_cache
+
+TEXT = "\n".join([
+    "The old knight looks at you.",
+    "You should not have come here.",
+    "The gate is locked.",
+    "Find the missing merchant.",
+    "The gate is locked.",
+    "Return before nightfall.",
+])
+
+
+@pytest.fixture
+def lens(monkeypatch):
+    monkeypatch.setattr(utils_ocr, "ocr_image", lambda bbox: TEXT)
+    lens = ScreenshotTranslator.__new__(ScreenshotTranslator)
+    lens._ready = threading.Event()
+    lens._ready.set()
+    return lens
+
+
+def run(lens):
+    events = []
+    lens.translate_region(CancelToken(), (0, 0, 10, 10), (5, 5),
+                          callback=lambda coords, text: events.append(("final", text)),
+                          progress=lambda coords, event, data: events.append((event, data)))
+    return events
+
+
+def check_order(events):
+    assert events[0][0] == "source" and events[-1][0] == "final"
+    segments, final = events[0][1], events[-1][1]
+    streamed = [data for event, data in events[1:-1]]
+    assert all(event == "segment" for event, _ in events[1:-1])
+    # 每段（包括重复的片段）回调且只回调一次
+    assert sorted(index for index, _ in streamed) == list(range(len(segments)))
+    assert "\n".join(result for _, result in sorted(streamed)) == final
+    assert final == "\n".join(stub_translate(seg, "zh") for seg in segments)
+    return [index for index, _ in streamed]
+
+
+@pytest.mark.parametrize("async_enabled", [False, True], ids=["sync", "async"])
+def test_stream_order(configure, stub_engines, lens, async_enabled):
+    configure(**{"async": {"enabled": async_enabled}, "overlay": {"stream_chunk": 2}})
+    # 部分请求额外延迟，各组返回的先后顺序不固定
+    stub_engines(latency_ms=20, slow_rate=0.5, slow_ms=150, seed=3)
+    for _ in range(3):
+        check_order(run(lens))
+
+
+@pytest.mark.parametrize("async_enabled", [False, True], ids=["sync", "async"])
+def test_cached_segments_stream_first(configure, stub_engines, lens, monkeypatch, async_enabled):
+    config = configure({"cache": True}, **{"async": {"enabled": async_enabled}, "overlay": {"stream_chunk": 2}})
+    stub_engines(latency_ms=50)
+    # 缓存在用例之间共用：每个用例使用不同的文本
+    lines = [f"{line[:-1]} {'async' if async_enabled else 'sync'}." for line in TEXT.splitlines()]
+    monkeypatch.setattr(utils_ocr, "ocr_image", lambda bbox: "\n".join(lines))
+    # 预先缓存最后一段：它不需要请求，应在所有需要请求的片段之前回调
+    translate_segments([lines[-1]])
+    assert get_translation_cache(config).get("baidu", "en", "zh", lines[-1]) is not None
+    order = check_order(run(lens))
+    assert order[0] == 5
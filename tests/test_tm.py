@@ -0,0 +1,61 @@
+# test_tm.py
+"""翻译记忆：OCR 误差可以命中，数字或句末语气不同的句子不能互相替代"""
+import pytest
+from utils.utils_tm import TranslationMemory, tm_key, numbers, sentence_end
+
+
+def memory_with(*pairs):
+    memory = TranslationMemory(threshold=0.85, min_length=4)
+    for source, target in pairs:
+        memory.add("en", "zh", source, target)
+    return memory
+
+
+def hit(memory, text):
+    match = memory.lookup("en", "zh", text)
+    return match[0] if match is not None else None
+
+
+@pytest.mark.parametrize("stored, query", [
+    ("You have 150G in your purse now.", "You have 250G in your purse now."),
+    ("Reach Lv10 to unlock this skill.", "Reach Lv11 to unlock this skill."),
+    ("Potion of healing x3 received.", "Potion of healing x4 received."),
+    ("获得150金币，继续前进吧", "获得250金币，继续前进吧"),
+    ("The gate opens at 10 tonight.", "The gate opens at 1O tonight."),
+    ("Are you ready to leave now?", "Are you ready to leave now."),
+    ("Are you ready to leave now!", "Are you ready to leave now?"),
+    # 数字不再当作形近字母：误识别成数字的单词也不命中
+    ("Are you ready to leave now?", "Are you ready t0 leave now?"),
+])
+def test_different_numbers_or_tone_do_not_match(stored, query):
+    memory = memory_with((stored, "译文"))
+    assert hit(memory, stored) == "译文"
+    assert hit(memory, query) is None
+
+
+@pytest.mark.parametrize("query", [
+    "Are you ready to leave now？",  # 全角问号
+    "Are you  ready to leave now ?",  # 多余的空格
+    "Are you ready to Ieave now?",  # I / l 形近
+    "Are you ready to leavenow?",  # 漏掉的空格
+    "Are you ready, to leave now?",  # 多余的标点
+])
+def test_ocr_noise_still_matches(query):
+    memory = memory_with(("Are you ready to leave now?", "你准备好出发了吗？"))
+    assert hit(memory, query) == "你准备好出发了吗？"
+
+
+def test_period_and_missing_period_are_the_same_sentence():
+    memory = memory_with(("The gate is locked.", "大门锁着。"))
+    assert hit(memory, "The gate is locked") == "大门锁着。"
+    assert tm_key("The gate is locked.") == tm_key("The gate is locked")
+
+
+def test_key_keeps_digits_and_sentence_end():
+    assert tm_key("Now?") == "now?"
+    assert tm_key("Now!") == "now!"
+    assert tm_key("Now.") == "now"
+    assert tm_key("Lv10 Sword") == "lv10sword"
+    assert tm_key("「你好吗？」") == "你好吗?"
+    assert sentence_end("Really?!\"") == "!"
+    assert numbers("150G / Lv10 / x3 / 获得150金币") == ["150", "10", "3", "150"]
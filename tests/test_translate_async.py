@@ -0,0 +1,30 @@
+# test_translate_async.py
+"""异步翻译：缓存(SQLite)和翻译记忆的读写不在事件循环线程中进行"""
+import threading
+from bench.stub_server import stub_translate
+from utils.utils_translate import translate_segments, get_translation_cache, get_translation_memory
+from utils.utils_translate_async import engine_loop
+
+
+def test_cache_and_memory_io_off_event_loop(configure, stub_engines, monkeypatch):
+    config = configure({"cache": True, "tm": True}, **{"async": {"enabled": True}})
+    stub_engines()
+    cache = get_translation_cache(config)
+    memory = get_translation_memory(config)
+    threads = []
+
+    def traced(func):
+        def wrapper(*args):
+            threads.append((func.__name__, threading.current_thread()))
+            return func(*args)
+        return wrapper
+
+    monkeypatch.setattr(cache, "get", traced(cache.get))
+    monkeypatch.setattr(cache, "put", traced(cache.put))
+    monkeypatch.setattr(memory, "lookup", traced(memory.lookup))
+    monkeypatch.setattr(memory, "add", traced(memory.add))
+
+    segments = ["Loop check one.", "Loop check two."]
+    assert translate_segments(segments) == [stub_translate(seg, "zh") for seg in segments]
+    assert {name for name, _ in threads} == {"get", "put", "lookup", "add"}
+    assert all(thread is not engine_loop._thread for _, thread in threads)
@@ -0,0 +1,30 @@
+# test_translate_batch.py
+"""批量翻译：没有标点的行各自为一段，OCR 折行的句子合并为一段，百度批量接口的返回条数与片段数一致"""
+import pytest
+from bench.stub_server import stub_translate
+from utils.utils_translate import translate_text, split_segments, TRANSLATE_ERROR_PREFIX
+
+
+@pytest.mark.parametrize("text, segments", [
+    # 标题行与下一句分开，小写开头的折行接回上一行
+    ("Quest Log\nFind the missing   merchant\nin the woods. Talk to the guard.",
+     ["Quest Log", "Find the missing merchant in the woods.", "Talk to the guard."]),
+    # 菜单 / 物品列表：每行一段，只改动一行时只需要请求这一行
+    ("Items\nEquipment\nSave Game", ["Items", "Equipment", "Save Game"]),
+    ("Hello,\nTraveler. Come here!", ["Hello, Traveler.", "Come here!"]),
+    ("任务日志\n在北方森林中，\n找到失踪的商人。与卫队长交谈。", ["任务日志", "在北方森林中，找到失踪的商人。", "与卫队长交谈。"]),
+])
+def test_split_segments(text, segments):
+    assert split_segments(text) == segments
+
+
+@pytest.mark.parametrize("async_enabled", [False, True], ids=["sync", "async"])
+def test_baidu_batch_with_wrapped_lines(configure, stub_engines, async_enabled):
+    configure(**{"async": {"enabled": async_enabled}})
+    server = stub_engines(engines=["baidu"])
+    text = f"Wrapped {async_enabled}\nline one. Second\nline {async_enabled}. Third line {async_enabled}."
+
+    translated = translate_text(text)
+    assert TRANSLATE_ERROR_PREFIX not in translated
+    assert translated == "\n".join(stub_translate(seg, "zh") for seg in split_segments(text))
+    assert server.requests == 1
@@ -0,0 +1,64 @@
+# test_translate_coalesce.py
+"""相同片段的请求合并：认领请求的调用方出错或卡住时，等待相同片段的调用方不能一直阻塞"""
+import time
+import threading
+import pytest
+from bench.stub_server import stub_translate
+from utils import utils_translate
+from utils.utils_translate import translate_segments, COALESCE_TIMEOUT_ERROR, _inflight
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "async"])
+def async_enabled(request):
+    return request.param
+
+
+def run_in_thread(func, *args):
+    box = {}
+
+    def target():
+        try:
+            box["result"] = func(*args)
+        except BaseException as e:
+            box["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread, box
+
+
+def test_waiter_released_when_leader_fails_after_request(configure, stub_engines, monkeypatch, async_enabled):
+    configure(**{"async": {"enabled": async_enabled}})
+    stub_engines(latency_ms=300)
+
+    def broken_restore(results, mappings):
+        raise RuntimeError("restore failed")
+
+    monkeypatch.setattr(utils_translate, "restore_segments", broken_restore)
+    leader, leader_box = run_in_thread(translate_segments, ["The gate is locked."])
+    time.sleep(0.1)  # 等待第一个调用方认领请求
+    waiter, waiter_box = run_in_thread(translate_segments, ["The gate is locked."])
+
+    leader.join(5)
+    waiter.join(5)
+    assert not leader.is_alive() and not waiter.is_alive()
+    assert isinstance(leader_box["error"], RuntimeError)
+    assert isinstance(waiter_box["error"], RuntimeError)
+
+
+def test_waiter_times_out_on_stuck_leader(configure, stub_engines, async_enabled):
+    configure(**{"async": {"enabled": async_enabled},
+                 "http": {"connect_timeout": 0.05, "read_timeout": 0.05},
+                 "rate_limit": {"max_wait": 0.1}})
+    stub_engines()
+    # 模拟卡住的请求：认领后永远不 resolve
+    key = ("baidu", "en", "zh", "Stuck line.")
+    _inflight.claim(key)
+
+    start = time.perf_counter()
+    assert translate_segments(["Stuck line."]) == [COALESCE_TIMEOUT_ERROR]
+    elapsed = time.perf_counter() - start
+    assert 0.3 < elapsed < 2
+
+    # 卡住的请求已被放弃，之后的调用方重新请求
+    assert translate_segments(["Stuck line."]) == [stub_translate("Stuck line.", "zh")]
@@ -0,0 +1,69 @@
+# test_watch.py
+"""多区域监视：等待 OCR 初始化期间关闭监视时，启动任务不能再启动监视线程"""
+import threading
+import time
+import pytest
+from utils import utils_regions
+from utils.utils_corestep import ScreenshotTranslator
+from utils.utils_scheduler import JobScheduler, JobCancelled, CancelToken
+
+
+class FakeWatchManager:
+    started = []
+
+    def __init__(self, callback):
+        self.stopped = False
+
+    def start(self):
+        FakeWatchManager.started.append(self)
+        return True
+
+    def names(self):
+        return ["dialog"]
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def lens(monkeypatch):
+    monkeypatch.setattr(utils_regions, "RegionWatchManager", FakeWatchManager)
+    FakeWatchManager.started = []
+    lens = ScreenshotTranslator.__new__(ScreenshotTranslator)
+    lens.region_watch = None
+    lens._watch_lock = threading.Lock()
+    lens._ready = threading.Event()
+    return lens
+
+
+def test_cancelled_token_does_not_start_watch(lens):
+    token = CancelToken()
+    token.cancel()
+    lens._ready.set()
+    with pytest.raises(JobCancelled):
+        lens.start_watch(token, lambda *args: None)
+    assert FakeWatchManager.started == [] and lens.region_watch is None
+
+
+def test_toggle_off_while_waiting_for_warmup(lens):
+    scheduler = JobScheduler(workers=1, queue_size=2)
+    results = []
+    scheduler.submit("watch", lambda token: results.append(lens.start_watch(token, lambda *args: None)))
+    time.sleep(0.1)  # 启动任务在等待 OCR 初始化
+
+    # 关闭监视：与 main.toggle_watch 相同的顺序
+    scheduler.cancel("watch")
+    lens.stop_watch()
+    lens._ready.set()
+    time.sleep(0.2)
+    assert FakeWatchManager.started == [] and lens.region_watch is None and results == []
+
+    # 重新开启后正常启动
+    scheduler.submit("watch", lambda token: results.append(lens.start_watch(token, lambda *args: None)))
+    deadline = time.monotonic() + 2
+    while not results and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert results == [["dialog"]] and len(FakeWatchManager.started) == 1
+    lens.stop_watch()
+    assert FakeWatchManager.started[0].stopped and lens.region_watch is None
+    scheduler.shutdown()
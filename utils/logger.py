@@ -1,25 +1,183 @@
 # looger.py
 import os
+import sys
+import json
+import queue
+import atexit
+import random
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 
-def setup_logging(log_dir="logs", log_name="translator.log"):
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    只把日志放入队列，由后台线程写文件和控制台
+    队列满时丢弃日志并计数，不阻塞调用线程
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 格式化（时间、堆栈）留给后台线程；日志消息都是 f-string，参数不会在入队后变化
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BackgroundListener(QueueListener):
+    """后台写入线程；停止时阻塞等待队列空位放入结束标记，保证队列满时也能正常退出"""
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class LogSettings:
+    """
+    运行时日志设置（由 api_config.json 的 logging 配置更新）
+    log_text: 是否记录原文和译文，false 时只记录长度
+    sample_rate: 高频事件的默认采样比例
+    sample_events: 按事件名单独设置的采样比例
+    """
+    def __init__(self):
+        self.log_text = True
+        self.sample_rate = 1.0
+        self.sample_events = {}
+
+
+settings = LogSettings()
+_listeners = []
+
+
+def setup_logging(log_dir="logs", log_name="translator.log", queue_size=10000):
     """初始化日志系统"""
     os.makedirs(log_dir, exist_ok=True)
 
     log_path = os.path.join(log_dir, log_name)
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            RotatingFileHandler(log_path, maxBytes=1 * 1024 * 1024, backupCount=5),
-            logging.StreamHandler()
-        ]
-    )
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(log_path, maxBytes=1 * 1024 * 1024, backupCount=5, encoding="utf-8")
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    # 磁盘和控制台 I/O 在后台线程中进行，调用线程只做入队
+    log_queue = queue.Queue(queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    listener = BackgroundListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
 
     return logging.getLogger("GameTranslator")
 
 
-logger = setup_logging()
+def shutdown_logging():
+    """停止后台写入线程并写完队列中剩余的日志（os._exit 之前需要手动调用）"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+class ForwardHandler(logging.Handler):
+    """主进程中把子进程传回的日志交给同名 logger，由主进程的后台线程写入"""
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def start_worker_logging(ctx):
+    """
+    主进程：创建子进程日志队列和转发线程，返回 (log_queue, listener)
+    log_queue 作为进程池 initializer 的参数传给 setup_worker_logging
+    """
+    log_queue = ctx.Queue()
+    listener = QueueListener(log_queue, ForwardHandler())
+    listener.start()
+    return log_queue, listener
+
+
+def setup_worker_logging(log_queue=None):
+    """
+    子进程日志：不打开日志文件，也不启动后台线程（日志文件只能由主进程轮转）
+    记录经 log_queue 交给主进程写入；没有队列时丢弃
+    fork 出的子进程继承了主进程的处理器，这里一并替换
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue) if log_queue is not None else logging.NullHandler())
+    root.setLevel(logging.INFO)
+    _listeners.clear()
+    return logging.getLogger("GameTranslator")
+
+
+def _in_child_process():
+    # spawn 启动的子进程在导入本模块之前已经导入了 multiprocessing；主进程不为此额外导入它
+    multiprocessing = sys.modules.get("multiprocessing")
+    return multiprocessing is not None and multiprocessing.parent_process() is not None
+
+
+if _in_child_process():
+    logger = setup_worker_logging()
+else:
+    logger = setup_logging()
+    atexit.register(shutdown_logging)
+
+
+def configure_logging(log_cfg):
+    """
+    根据配置更新日志级别、文本开关和采样比例（配置热重载时调用）
+    """
+    level = str(log_cfg.get("level", "INFO")).upper()
+    logging.getLogger().setLevel(getattr(logging, level, logging.INFO))
+    settings.log_text = log_cfg.get("log_text", True)
+    settings.sample_rate = log_cfg.get("sample_rate", 1.0)
+    settings.sample_events = log_cfg.get("sample_events", {})
+
+
+def log_text(text):
+    """日志中的原文/译文：log_text 关闭时只保留长度"""
+    if settings.log_text:
+        return text
+    return f"<{len(text)}字>"
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    value = str(value)
+    if not value or any(c in value for c in ' ="\n'):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class EventMessage:
+    """结构化日志的消息，在后台线程格式化时才拼接为 event=名称 key=value ..."""
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self):
+        return " ".join([f"event={self.event}"] +
+                        [f"{key}={_format_value(value)}" for key, value in self.fields.items()])
+
+
+def log_event(event, level=logging.INFO, **fields):
+    """
+    高频事件的结构化日志，按事件采样
+    字段同时放在 record.fields 中，便于替换为 JSON 格式的处理器
+    """
+    rate = settings.sample_events.get(event, settings.sample_rate)
+    if rate < 1.0 and random.random() >= rate:
+        return
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, EventMessage(event, fields), extra={"event": event, "fields": fields})
@@ -0,0 +1,35 @@
+# ui_dispatcher.py
+import queue
+from utils.logger import logger
+
+
+class TkDispatcher:
+    """
+    将工作线程的结果交给 Tk 主线程执行
+    Tk 不是线程安全的，工作线程只往队列里放回调，由主线程定时取出执行
+    """
+    def __init__(self, root, interval=30):
+        """
+        root: Tk 主窗口
+        interval: 轮询间隔(毫秒)
+        """
+        self.root = root
+        self.interval = interval
+        self._queue = queue.SimpleQueue()
+        self.root.after(self.interval, self._poll)
+
+    def post(self, func, *args):
+        """可在任意线程调用"""
+        self._queue.put((func, args))
+
+    def _poll(self):
+        while True:
+            try:
+                func, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception:
+                logger.error("界面回调执行异常", exc_info=True)
+        self.root.after(self.interval, self._poll)
@@ -0,0 +1,148 @@
+# ui_layout.py
+from collections import OrderedDict
+
+
+def is_cjk(char):
+    return '\u3000' <= char <= '\u9fff' or '\uff00' <= char <= '\uffef'
+
+
+def tokenize(paragraph):
+    """
+    拆分为排版单元 [(token, 前面是否有空格)]
+    英文按单词，中日韩文字和全角标点按单个字符
+    """
+    tokens = []
+    for i, segment in enumerate(paragraph.split(' ')):
+        if not segment:
+            continue
+        space = i > 0 and bool(tokens)
+        word = []
+        for char in segment:
+            if is_cjk(char):
+                if word:
+                    tokens.append((''.join(word), space))
+                    word, space = [], False
+                tokens.append((char, space))
+                space = False
+            else:
+                word.append(char)
+        if word:
+            tokens.append((''.join(word), space))
+    return tokens
+
+
+def tk_bulk_measurer(widget, font):
+    """
+    批量测量字符串宽度，一次 Tcl 调用测量全部字符串
+    逐个调用 font.measure() 每次都是一次 Tcl 往返
+    """
+    tk = widget.tk
+
+    def measure_many(strings):
+        tk.call('set', '::gt_measure_items', tuple(strings))
+        result = tk.eval(f'lmap s $::gt_measure_items {{font measure {font.name} -displayof . $s}}')
+        return [int(width) for width in tk.splitlist(result)]
+
+    return measure_many
+
+
+class TextLayout:
+    """
+    带缓存的文本排版
+    字宽按字符缓存（新字符批量测量），单词宽度由字宽累加，
+    每个段落的换行结果按 (段落, 宽度) 缓存，相同文本不会重复排版
+    """
+    def __init__(self, measure_many, linespace, cache_size=512):
+        """
+        measure_many: 批量测量函数 list[str] -> list[int]
+        linespace: 行高
+        cache_size: 段落排版缓存条数
+        """
+        self.measure_many = measure_many
+        self.linespace = linespace
+        self.cache_size = cache_size
+
+        self._widths = {}
+        self._paragraphs = OrderedDict()  # (paragraph, max_width) -> (lines, widths)
+
+    def _ensure_widths(self, text):
+        missing = {char for char in text if char not in self._widths}
+        if missing:
+            missing = sorted(missing)
+            self._widths.update(zip(missing, self.measure_many(missing)))
+
+    def text_width(self, text):
+        self._ensure_widths(text)
+        widths = self._widths
+        return sum(widths[char] for char in text)
+
+    def wrap_paragraph(self, paragraph, max_width):
+        """
+        返回 (lines, line_widths)
+        """
+        key = (paragraph, max_width)
+        cached = self._paragraphs.get(key)
+        if cached is not None:
+            self._paragraphs.move_to_end(key)
+            return cached
+
+        self._ensure_widths(paragraph + ' ')
+        widths = self._widths
+        space_width = widths[' ']
+
+        lines, line_widths = [], []
+        current, current_width = [], 0
+        for token, space in tokenize(paragraph):
+            token_width = sum(widths[char] for char in token)
+            gap = space_width if (space and current) else 0
+
+            if token_width > max_width:
+                # 超长单词按字符拆分
+                for char in token:
+                    char_width = widths[char]
+                    if current and current_width + gap + char_width > max_width:
+                        lines.append(''.join(current))
+                        line_widths.append(current_width)
+                        current, current_width, gap = [], 0, 0
+                    if gap:
+                        current.append(' ')
+                        current_width += gap
+                        gap = 0
+                    current.append(char)
+                    current_width += char_width
+                continue
+
+            if current and current_width + gap + token_width > max_width:
+                lines.append(''.join(current))
+                line_widths.append(current_width)
+                current, current_width, gap = [], 0, 0
+            if gap:
+                current.append(' ')
+            current.append(token)
+            current_width += gap + token_width
+
+        if current:
+            lines.append(''.join(current))
+            line_widths.append(current_width)
+
+        result = (lines, line_widths)
+        self._paragraphs[key] = result
+        while len(self._paragraphs) > self.cache_size:
+            self._paragraphs.popitem(last=False)
+        return result
+
+    def layout(self, text, max_width):
+        """
+        排版整段文本
+        返回 (lines, text_width, text_height)
+        """
+        final_lines, final_widths = [], []
+        for para in text.split('\n'):
+            para = para.strip()
+            if not para:
+                continue
+            lines, widths = self.wrap_paragraph(para, max_width)
+            final_lines.extend(lines)
+            final_widths.extend(widths)
+        text_width = max(final_widths) if final_widths else 0
+        return final_lines, text_width, len(final_lines) * self.linespace
@@ -0,0 +1,120 @@
+# ui_overlay_pool.py
+from collections import OrderedDict
+from utils.logger import logger
+from utils.utils_metrics import metrics
+from utils.ui_transparent import TransparentTranslator
+
+
+class OverlayManager:
+    """
+    悬浮翻译窗口池（只能在 Tk 主线程调用）
+    同一区域再次翻译时原地更新窗口；可见窗口数量有上限，超出时回收最早显示的窗口；
+    关闭或回收的窗口隐藏后放回空闲池，下次显示时复用，不再反复创建 Toplevel
+    """
+    def __init__(self, parent, max_visible=5, pool_size=3):
+        """
+        parent: Tk 主窗口
+        max_visible: 同时显示的翻译窗口上限
+        pool_size: 隐藏后保留复用的窗口数，超出的窗口直接销毁
+        """
+        self.parent = parent
+        self.max_visible = max(1, max_visible)
+        self.pool_size = pool_size
+
+        self._visible = OrderedDict()  # key -> TransparentTranslator，按显示/更新先后排序
+        self._idle = []
+
+    def configure(self, overlay_cfg):
+        """配置热重载后调整上限，多出的可见窗口立即回收"""
+        self.max_visible = max(1, overlay_cfg.get("max_visible", self.max_visible))
+        self.pool_size = overlay_cfg.get("pool_size", self.pool_size)
+        self._evict()
+        while len(self._idle) > self.pool_size:
+            self._idle.pop().root.destroy()
+
+    def show(self, key, x, y, text, is_error=False):
+        """
+        key: 窗口标识（例如截图区域 bbox），相同 key 复用同一个窗口
+        x, y: 新窗口的位置；已存在的窗口保持原位置（可能已被用户拖动）
+        """
+        window = self._window(key, x, y)
+        if is_error:
+            window.show_temp_message(text, is_error=True)
+        else:
+            window.set_text(text)
+        window.show()
+        return window
+
+    def show_segments(self, key, x, y, segments):
+        """逐段显示：先显示原文分段，之后用 update_segment 逐段替换为译文"""
+        window = self._window(key, x, y)
+        window.set_segments(segments)
+        window.show()
+        return window
+
+    def update_segment(self, key, index, text):
+        """更新一段译文；窗口已被关闭或回收时忽略"""
+        window = self._visible.get(key)
+        if window is not None and window.exists():
+            window.update_segment(index, text)
+
+    def _window(self, key, x, y):
+        window = self._visible.get(key)
+        if window is not None and window.exists():
+            self._visible.move_to_end(key)
+            return window
+        self._visible.pop(key, None)
+        window = self._acquire()
+        window.move(x, y)
+        self._visible[key] = window
+        self._evict()
+        return window
+
+    def hide(self, key):
+        window = self._visible.pop(key, None)
+        if window is not None:
+            self._release(window)
+
+    def clear(self):
+        while self._visible:
+            _, window = self._visible.popitem(last=False)
+            self._release(window)
+
+    def keys(self):
+        return list(self._visible)
+
+    def stats(self):
+        return {"visible": len(self._visible), "idle": len(self._idle)}
+
+    def _acquire(self):
+        while self._idle:
+            window = self._idle.pop()
+            if window.exists():
+                metrics.inc("overlay.reused")
+                return window
+        metrics.inc("overlay.created")
+        return TransparentTranslator(self.parent, on_close=self._on_close)
+
+    def _release(self, window):
+        if not window.exists():
+            return
+        if len(self._idle) < self.pool_size:
+            window.hide()
+            self._idle.append(window)
+        else:
+            window.root.destroy()
+
+    def _evict(self):
+        while len(self._visible) > self.max_visible:
+            key, window = self._visible.popitem(last=False)
+            logger.debug(f"翻译窗口数量超过上限，回收最早的窗口: {key}")
+            metrics.inc("overlay.evicted")
+            self._release(window)
+
+    def _on_close(self, window):
+        # 用户双击关闭窗口
+        for key, visible in self._visible.items():
+            if visible is window:
+                del self._visible[key]
+                break
+        self._release(window)
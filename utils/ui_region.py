@@ -5,30 +5,43 @@ from utils.logger import logger
 
 class RegionSelector:
     """
-    区域选择工具
+    区域选择工具（只能在 Tk 主线程调用）
     使用鼠标拖动选择截图区域，返回 bbox 和起始坐标
+    全屏窗口在启动时创建并隐藏，每次选择只是显示 / 隐藏，不再重新创建 Tk 解释器和全屏窗口
     """
-    def __init__(self):
-        self.root = tk.Tk()
+    def __init__(self, parent):
+        self.root = tk.Toplevel(parent)
+        self.root.withdraw()
         self.root.attributes("-fullscreen", True)
         self.root.attributes("-alpha", 0.3)
         self.root.attributes("-topmost", True)
 
-        self.canvas = tk.Canvas(self.root, cursor="cross")
+        self.canvas = tk.Canvas(self.root, cursor="cross", highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
 
         self.start_x = None
         self.start_y = None
         self.rect = None
-        self.bbox = None
-        self.start_coords = None  # 用于返回起始坐标
+        self.on_done = None
 
         self.canvas.bind("<Button-1>", self.on_press)
         self.canvas.bind("<B1-Motion>", self.on_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_release)
-        self.root.bind("<Escape>", lambda e: self.root.destroy())
+        self.root.bind("<Escape>", lambda e: self._finish(None, None))
 
-        self.root.mainloop()
+    def select(self, on_done):
+        """
+        显示选择窗口，选择完成后隐藏窗口并回调 on_done(bbox, start_coords)，按 Esc 取消时 bbox 为 None
+        """
+        self.on_done = on_done
+        self.start_x = self.start_y = None
+        if self.rect is not None:
+            self.canvas.delete(self.rect)
+            self.rect = None
+        self.root.deiconify()
+        self.root.lift()
+        self.root.attributes("-topmost", True)
+        self.root.focus_force()
 
     def on_press(self, event):
         self.start_x = event.x
@@ -39,23 +52,26 @@ class RegionSelector:
         )
 
     def on_drag(self, event):
-        self.canvas.coords(
-            self.rect, self.start_x, self.start_y, event.x, event.y
-        )
+        if self.rect is not None:
+            self.canvas.coords(
+                self.rect, self.start_x, self.start_y, event.x, event.y
+            )
 
     def on_release(self, event):
-        self.bbox = (
+        if self.start_x is None:
+            return
+        bbox = (
             min(self.start_x, event.x),
             min(self.start_y, event.y),
             max(self.start_x, event.x),
             max(self.start_y, event.y)
         )
-        self.start_coords = (self.bbox[0], self.bbox[1])
-        self.root.destroy()
-        logger.info(f"选定区域: {self.bbox} (起始坐标: {self.start_coords})")
+        start_coords = (bbox[0], bbox[1])
+        logger.info(f"选定区域: {bbox} (起始坐标: {start_coords})")
+        self._finish(bbox, start_coords)
 
-    def get_selection(self):
-        """
-        返回 (bbox, start_coords)
-        """
-        return self.bbox, self.start_coords
+    def _finish(self, bbox, start_coords):
+        self.root.withdraw()
+        on_done, self.on_done = self.on_done, None
+        if on_done is not None:
+            on_done(bbox, start_coords)
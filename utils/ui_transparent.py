@@ -1,6 +1,24 @@
 # ui_transparent.py
 import tkinter as tk
 from tkinter import font as tkfont
+from utils.ui_layout import TextLayout, tk_bulk_measurer
+
+
+FONT_FAMILY = "Microsoft YaHei"
+FONT_SIZE = 11
+
+# 每个 Tk 解释器共用一个字体和排版缓存，字宽和段落换行结果在窗口之间复用
+_layouts = {}
+
+
+def get_text_layout(widget):
+    entry = _layouts.get(widget.tk)
+    if entry is None:
+        text_font = tkfont.Font(root=widget, family=FONT_FAMILY, size=FONT_SIZE)
+        layout = TextLayout(tk_bulk_measurer(widget, text_font), text_font.metrics("linespace"))
+        # 同时保存 Font 对象，它被回收时会删除对应的 Tcl 字体
+        entry = _layouts[widget.tk] = (text_font, layout)
+    return entry[1]
 
 
 class TransparentTranslator:
@@ -8,7 +26,11 @@ class TransparentTranslator:
     悬浮透明翻译窗口
     可以在指定坐标显示翻译文本，支持拖动和双击关闭
     """
-    def __init__(self, parent, x=100, y=100, width=400):
+    def __init__(self, parent, x=100, y=100, width=400, on_close=None):
+        """
+        on_close: 双击关闭时的回调 on_close(window)，由窗口池回收窗口；为空时直接销毁窗口
+        """
+        self.on_close = on_close
 
         self.root = tk.Toplevel(parent)  # 避免阻塞主循环
         self.root.overrideredirect(True)
@@ -17,6 +39,11 @@ class TransparentTranslator:
         self.root.geometry(f"+{x}+{y}")
         self.bg_color = "#333333"
         self.root.configure(bg=self.bg_color)
+        self.text_color = "#FFFFFF"
+        self.pending_color = "#999999"  # 逐段显示时尚未翻译的原文
+        self.max_width = width
+        self._segments = []  # 逐段显示: [canvas 文本项, 文本, 宽度, 高度, 是否已翻译]
+        self._size = None
 
         self.canvas = tk.Canvas(
             self.root,
@@ -35,8 +62,8 @@ class TransparentTranslator:
         self.text_obj = self.canvas.create_text(
             15, 10,
             anchor="nw",
-            font=("Microsoft YaHei", 11),
-            fill="#FFFFFF",
+            font=(FONT_FAMILY, FONT_SIZE),
+            fill=self.text_color,
             width=width - 20
         )
 
@@ -47,7 +74,8 @@ class TransparentTranslator:
     def _setup_interaction(self):
         # 双击关闭
         for item in [self.text_bg, self.text_obj]:
-            self.canvas.tag_bind(item, "<Double-Button-1>", lambda e: self.root.destroy())
+            self.canvas.tag_bind(item, "<Double-Button-1>", lambda e: self.close())
+        self.canvas.tag_bind("segment", "<Double-Button-1>", lambda e: self.close())
 
         # 拖动逻辑
         self.canvas.bind("<ButtonPress-1>", self._start_drag)
@@ -66,65 +94,96 @@ class TransparentTranslator:
         y = event.y_root - self.drag_data["y"]
         self.root.geometry(f"+{x}+{y}")
 
+    # -------------------- 窗口状态 --------------------
+    def close(self):
+        if self.on_close is not None:
+            self.on_close(self)
+        else:
+            self.root.destroy()
+
+    def move(self, x, y):
+        self.root.geometry(f"+{x}+{y}")
+
+    def show(self):
+        self.root.deiconify()
+        self.root.attributes("-topmost", True)
+
+    def hide(self):
+        self.root.withdraw()
+
+    def exists(self):
+        return bool(self.root.winfo_exists())
+
     # -------------------- 文本显示 --------------------
+    def _resize(self, text_width, text_height):
+        """调整背景和窗口大小，大小不变时不触发窗口重新布局"""
+        total_width = min(text_width + 40, self.root.winfo_screenwidth() - 50)
+        total_height = text_height + 30
+        if (total_width, total_height) == self._size:
+            return total_width
+        self._size = (total_width, total_height)
+        self.canvas.coords(self.text_bg, 0, 0, total_width, total_height)
+        self.canvas.config(width=total_width, height=total_height)
+        self.root.geometry(f"{total_width}x{total_height}")
+        return total_width
+
+    def _clear_segments(self):
+        if self._segments:
+            self.canvas.delete("segment")
+            self._segments = []
+
     def set_text(self, text, max_width=400):
         """
         设置翻译文本并自动换行
+        逐段显示的译文已全部到达且与 text 相同时不再重新排版
         """
-        temp_font = tkfont.Font(family="Microsoft YaHei", size=11)
-
-        def split_text(text, max_width):
-            """智能分割文本为多行"""
-            lines, current_line, current_width = [], [], 0
-            words = []
-            for segment in text.split(' '):
-                if any('\u4e00' <= c <= '\u9fff' for c in segment):
-                    words.extend(list(segment))  # 中文按字符
-                else:
-                    words.append(segment)
-
-            for word in words:
-                word_width = temp_font.measure(word)
-                if word_width > max_width:
-                    for char in word:
-                        char_width = temp_font.measure(char)
-                        if current_width + char_width > max_width:
-                            lines.append(''.join(current_line))
-                            current_line = [char]
-                            current_width = char_width
-                        else:
-                            current_line.append(char)
-                            current_width += char_width
-                    continue
-
-                if current_width + word_width <= max_width:
-                    current_line.append(word)
-                    current_width += word_width + temp_font.measure(' ')
-                else:
-                    lines.append(' '.join(current_line).strip())
-                    current_line = [word]
-                    current_width = word_width
-
-            if current_line:
-                lines.append(' '.join(current_line).strip())
-            return lines
-
-        paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
-        final_lines = []
-        for para in paragraphs:
-            final_lines.extend(split_text(para, max_width - 20))
+        if self._segments and all(segment[4] for segment in self._segments) \
+                and text == '\n'.join(segment[1] for segment in self._segments):
+            return
+        self._clear_segments()
+        layout = get_text_layout(self.root)
+        final_lines, text_width, text_height = layout.layout(text, max_width - 20)
 
         wrapped_text = '\n'.join(final_lines)
-        line_height = temp_font.metrics("linespace")
-        text_width = max(temp_font.measure(line) for line in final_lines) if final_lines else 0
-        total_width = min(text_width + 40, self.root.winfo_screenwidth() - 50)
-        total_height = len(final_lines) * line_height + 30
+        total_width = self._resize(text_width, text_height)
+        self.canvas.itemconfig(self.text_obj, text=wrapped_text, width=total_width - 20,
+                               fill=self.text_color)
 
-        # 更新 UI
-        self.canvas.coords(self.text_bg, 0, 0, total_width, total_height)
-        self.canvas.itemconfig(self.text_obj, text=wrapped_text, width=total_width - 20)
-        self.canvas.config(width=total_width, height=total_height)
-        self.root.geometry(f"{total_width}x{total_height}")
+    def set_segments(self, segments, max_width=400):
+        """
+        逐段显示：先显示原文分段（灰色），之后由 update_segment 逐段替换为译文
+        每段是一个独立的文本项，更新一段只重新排版这一段
+        """
+        self._clear_segments()
+        self.max_width = max_width
+        self.canvas.itemconfig(self.text_obj, text="")
+        layout = get_text_layout(self.root)
+        y = 10
+        for text in segments:
+            lines, width, height = layout.layout(text, max_width - 20)
+            item = self.canvas.create_text(15, y, anchor="nw", text='\n'.join(lines), tags=("segment",),
+                                           font=(FONT_FAMILY, FONT_SIZE), fill=self.pending_color)
+            self._segments.append([item, text, width, height, False])
+            y += height
+        self._resize_segments()
+
+    def update_segment(self, index, text):
+        """替换一段的文本，高度变化时下移后面的段落，总大小变化时才调整窗口"""
+        if not 0 <= index < len(self._segments):
+            return
+        segment = self._segments[index]
+        lines, width, height = get_text_layout(self.root).layout(text, self.max_width - 20)
+        self.canvas.itemconfig(segment[0], text='\n'.join(lines), fill=self.text_color)
+        delta = height - segment[3]
+        if delta:
+            for later in self._segments[index + 1:]:
+                self.canvas.move(later[0], 0, delta)
+        segment[1:] = [text, width, height, True]
+        self._resize_segments()
+
+    def _resize_segments(self):
+        self._resize(max(segment[2] for segment in self._segments) if self._segments else 0,
+                     sum(segment[3] for segment in self._segments))
 
     def show_temp_message(self, msg, is_error=False):
         """显示临时消息"""
@@ -0,0 +1,287 @@
+# utils_batch.py
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from utils.logger import logger
+from utils.utils_capture import image_to_frame
+from utils.utils_ocr import ocr_image, OCR_EMPTY, OCR_FAILED
+from utils.utils_realtime import frame_signature, frame_diff
+from utils.utils_translate import TRANSLATE_ERROR_PREFIX
+from utils.utils_translate_async import translate_many
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".webm")
+
+_END = object()
+
+
+class StageStats:
+    """
+    批处理各阶段的累计耗时和处理数量（多个线程同时更新）
+    各阶段并行运行，总耗时取决于最慢的阶段：busy / workers 最大的阶段
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.items = 0
+        self._busy = {}
+        self._counts = {}
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def set_workers(self, stage, workers):
+        self._workers[stage] = workers
+
+    @contextmanager
+    def measure(self, stage, items=1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._busy[stage] = self._busy.get(stage, 0.0) + elapsed
+                self._counts[stage] = self._counts.get(stage, 0) + items
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            stages = {}
+            for stage, busy in self._busy.items():
+                count = self._counts[stage]
+                workers = self._workers.get(stage, 1)
+                stages[stage] = {
+                    "items": count,
+                    "busy_s": round(busy, 3),
+                    "per_item_ms": round(busy / count * 1000, 2) if count else 0.0,
+                    # 该阶段单独运行时的处理能力(项/秒)
+                    "capacity": round(count / (busy / workers), 2) if busy else 0.0,
+                }
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "items": self.items,
+            "throughput": round(self.items / elapsed, 2) if elapsed else 0.0,
+            "stages": stages,
+        }
+
+    def format(self):
+        summary = self.summary()
+        parts = [f"{summary['items']} 项 {summary['elapsed_s']:.1f}s {summary['throughput']:.2f} 项/秒"]
+        for stage, values in summary["stages"].items():
+            parts.append(f"{stage}: {values['per_item_ms']:.1f}ms/项 上限 {values['capacity']:.1f} 项/秒")
+        return " | ".join(parts)
+
+
+# -------------------- 流水线 --------------------
+def prefetch(iterable, size):
+    """
+    在后台线程中迭代 iterable，最多提前 size 项
+    上游阶段（解码、OCR 提交）与下游阶段并行运行，上游的异常在下游迭代时抛出
+    """
+    items = queue.Queue(size)
+
+    def producer():
+        try:
+            for item in iterable:
+                items.put(item)
+            items.put((_END, None))
+        except BaseException as e:
+            items.put((_END, e))
+
+    threading.Thread(target=producer, name="batch-prefetch", daemon=True).start()
+    while True:
+        item = items.get()
+        if isinstance(item, tuple) and len(item) == 2 and item[0] is _END:
+            if item[1] is not None:
+                raise item[1]
+            return
+        yield item
+
+
+def ordered_map(func, iterable, executor, window):
+    """
+    在线程池上并行执行 func，按输入顺序产出结果
+    最多 window 个任务同时在执行或等待，限制内存中的帧数量
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# -------------------- 输入 --------------------
+def expand_inputs(paths):
+    """展开输入路径：目录中的图片和视频按文件名排序，返回 [(path, kind)]"""
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.listdir(path))
+            result.extend(expand_inputs([os.path.join(path, name) for name in names
+                                         if name.lower().endswith(IMAGE_EXTENSIONS + VIDEO_EXTENSIONS)]))
+        elif path.lower().endswith(VIDEO_EXTENSIONS):
+            result.append((path, "video"))
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            result.append((path, "image"))
+        else:
+            logger.warning(f"跳过不支持的文件: {path}")
+    return result
+
+
+def iter_video(path, step, min_diff, done, stats):
+    """
+    逐帧读取视频（需要 pip install opencv-python），每 step 帧取一帧
+    与上一个取出的帧相比变化小于 min_diff 的帧跳过，静止画面不重复识别
+    """
+    try:
+        import cv2
+    except ImportError:
+        raise RuntimeError("读取视频需要安装 opencv-python: pip install opencv-python")
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        logger.warning(f"无法打开视频: {path}")
+        return
+    last_sig = None
+    index = -1
+    try:
+        while True:
+            with stats.measure("decode"):
+                # grab 只解码不转换，跳过的帧不做颜色转换
+                if not capture.grab():
+                    break
+                index += 1
+                item_id = f"{path}#{index}"
+                if index % step or item_id in done:
+                    continue
+                ok, frame = capture.retrieve()
+                if not ok:
+                    continue
+                frame = frame[..., ::-1]  # BGR -> RGB
+                sig = frame_signature(frame)
+                if last_sig is not None and frame_diff(sig, last_sig) < min_diff:
+                    continue
+                last_sig = sig
+            yield {"id": item_id, "source": path, "frame": index}, frame
+    finally:
+        capture.release()
+
+
+def iter_frames(inputs, done, video_step=1, min_diff=4, stats=None):
+    """按输入顺序产出 (记录, 帧)；已完成的 id（断点续传）不再解码"""
+    stats = stats or StageStats()
+    for path, kind in inputs:
+        if kind == "video":
+            yield from iter_video(path, video_step, min_diff, done, stats)
+            continue
+        if path in done:
+            continue
+        with stats.measure("decode"):
+            try:
+                with Image.open(path) as img:
+                    frame = image_to_frame(img)
+            except OSError as e:
+                logger.warning(f"无法读取图片 {path}: {e}")
+                continue
+        yield {"id": path, "source": path}, frame
+
+
+# -------------------- 输出 --------------------
+def load_done(output):
+    """
+    读取已有的输出文件，返回已完成的 id 集合（翻译失败的记录不算完成，续传时重试）
+    文件末尾不完整的一行（上次运行中断）会被截掉
+    """
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    for line in data.decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("status") != "translate_error":
+            done.add(record.get("id"))
+    return done
+
+
+# -------------------- 批处理 --------------------
+def run_batch(paths, output, from_lang="en", to_lang="zh", ocr_workers=2, batch_size=16,
+              video_step=1, min_diff=4, resume=False, progress_interval=5.0, stats=None):
+    """
+    批量识别和翻译，结果逐行写入 JSONL
+    解码、OCR（线程池，OCR 引擎池并行）、批量翻译（异步引擎层并发）三个阶段流水线并行，
+    总耗时取决于最慢的阶段而不是各阶段之和；输出按输入顺序写入，每批写完后刷新，可断点续传
+    返回 StageStats
+    """
+    stats = stats or StageStats()
+    stats.set_workers("ocr", ocr_workers)
+    done = load_done(output) if resume else set()
+    if done:
+        logger.info(f"断点续传: 跳过已完成的 {len(done)} 项")
+    inputs = expand_inputs(paths)
+
+    def recognize(item):
+        record, frame = item
+        # 同一个视频 / 同一目录中的截图共用自适应 OCR 参数
+        region = record["source"] if "frame" in record else os.path.dirname(os.path.abspath(record["source"]))
+        with stats.measure("ocr"):
+            text = ocr_image(None, frame, region=region)
+        return record, text
+
+    executor = ThreadPoolExecutor(max_workers=ocr_workers, thread_name_prefix="batch-ocr")
+    frames = prefetch(iter_frames(inputs, done, video_step, min_diff, stats), ocr_workers * 2)
+    recognized = prefetch(ordered_map(recognize, frames, executor, ocr_workers * 2), batch_size)
+
+    last_progress = time.monotonic()
+    try:
+        with open(output, "a" if resume else "w", encoding="utf-8") as f:
+            for batch in batched(recognized, batch_size):
+                texts = [text for _, text in batch if text not in (OCR_EMPTY, OCR_FAILED)]
+                with stats.measure("translate", len(texts)):
+                    translations = iter(translate_many(texts, from_lang, to_lang) if texts else [])
+
+                for record, text in batch:
+                    if text == OCR_EMPTY:
+                        record.update(status="empty", text="", translation="")
+                    elif text == OCR_FAILED:
+                        record.update(status="ocr_failed", text="", translation="")
+                    else:
+                        translation = next(translations)
+                        failed = TRANSLATE_ERROR_PREFIX in translation
+                        record.update(status="translate_error" if failed else "ok",
+                                      text=text, translation=translation)
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                stats.items += len(batch)
+
+                if progress_interval and time.monotonic() - last_progress >= progress_interval:
+                    last_progress = time.monotonic()
+                    print(stats.format(), file=sys.stderr)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return stats
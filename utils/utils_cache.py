@@ -0,0 +1,192 @@
+# utils_cache.py
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from utils.logger import logger
+
+
+def normalize_text(text):
+    """
+    归一化缓存键文本：去除首尾空白并合并连续空白
+    OCR 对同一行文字经常产生不同数量的空格
+    """
+    return ' '.join(text.split())
+
+
+def make_cache_key(engine, from_lang, to_lang, text):
+    raw = f"{engine}\x00{from_lang}\x00{to_lang}\x00{normalize_text(text)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    两级翻译缓存
+    一级: 进程内 LRU（OrderedDict）
+    二级: SQLite 磁盘缓存，程序重启后仍然有效
+    内存命中不立即写磁盘，命中时间攒成一批再写回 accessed，否则常用条目在磁盘 LRU 中反而最先被淘汰
+    """
+    TOUCH_BATCH = 256  # 内存命中时间攒够这么多条写回一次
+
+    def __init__(self, db_path, memory_size=2048, disk_size=200000, ttl=30 * 24 * 3600):
+        """
+        db_path: SQLite 文件路径
+        memory_size: 内存缓存最大条目数
+        disk_size: 磁盘缓存最大条目数
+        ttl: 条目有效期(秒)，0 表示永不过期
+        """
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.ttl = ttl
+
+        self._memory = OrderedDict()  # key -> (dst, created)
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._touched = {}  # key -> 最近一次内存命中的时间，尚未写回磁盘
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, engine TEXT, from_lang TEXT, to_lang TEXT, "
+            "src TEXT, dst TEXT, created REAL, accessed REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON translations(accessed)")
+        self._db.commit()
+        logger.info(f"翻译缓存已加载: {db_path}")
+
+    def _expired(self, created, now):
+        return self.ttl and now - created > self.ttl
+
+    def get(self, engine, from_lang, to_lang, text):
+        """
+        查询缓存，未命中返回 None
+        """
+        key = make_cache_key(engine, from_lang, to_lang, text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                dst, created = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    if len(self._touched) >= self.TOUCH_BATCH:
+                        self._flush_touched()
+                        self._db.commit()
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return dst
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT dst, created FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                dst, created = row
+                if not self._expired(created, now):
+                    self._db.execute("UPDATE translations SET accessed = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, dst, created)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dst
+                self._db.execute("DELETE FROM translations WHERE key = ?", (key,))
+                self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, engine, from_lang, to_lang, text, dst):
+        key = make_cache_key(engine, from_lang, to_lang, text)
+        now = time.time()
+        with self._lock:
+            self._remember(key, dst, now)
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, engine, from_lang, to_lang, normalize_text(text), dst, now, now)
+            )
+            self._puts_since_evict += 1
+            # 每写入一批再检查磁盘容量，避免每次都 COUNT
+            if self._puts_since_evict >= 100:
+                self._puts_since_evict = 0
+                self._evict_disk(now)
+            self._db.commit()
+
+    def _remember(self, key, dst, created):
+        self._memory[key] = (dst, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            evicted, _ = self._memory.popitem(last=False)
+            if evicted in self._touched:
+                # 离开内存的条目之后只能从磁盘命中，先写回它的访问时间
+                self._flush_touched()
+                self._db.commit()
+
+    def _flush_touched(self):
+        """把内存命中的时间写回磁盘 accessed 列（调用方持有 _lock 并负责 commit）"""
+        if self._touched:
+            self._db.executemany("UPDATE translations SET accessed = ? WHERE key = ?",
+                                 [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def _evict_disk(self, now):
+        self._flush_touched()
+        if self.ttl:
+            self._db.execute("DELETE FROM translations WHERE created < ?", (now - self.ttl,))
+        count = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.disk_size:
+            self._db.execute(
+                "DELETE FROM translations WHERE key IN ("
+                "SELECT key FROM translations ORDER BY accessed ASC LIMIT ?)",
+                (count - self.disk_size,)
+            )
+            logger.info(f"翻译缓存淘汰 {count - self.disk_size} 条")
+
+    def entries(self, limit):
+        """
+        最近使用的 limit 条磁盘缓存 (from_lang, to_lang, src, dst)，用于预加载翻译记忆
+        """
+        now = time.time()
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT from_lang, to_lang, src, dst, created FROM translations "
+                "ORDER BY accessed DESC LIMIT ?", (limit,)
+            ).fetchall()
+        # 按从旧到新的顺序返回，翻译记忆超出容量时先丢弃旧条目
+        return [row[:4] for row in reversed(rows) if not self._expired(row[4], now)]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM translations")
+            self._db.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,271 @@
+# utils_capture.py
+import os
+import threading
+import numpy as np
+from PIL import Image, ImageGrab
+from utils.logger import logger
+
+
+# 截图帧统一为 NumPy 数组: (高, 宽, 3) uint8 RGB
+# 快速后端返回的是预分配缓冲区上的视图，下一次截图会覆盖其内容，需要长期保存时请 copy()
+
+def frame_to_image(frame):
+    """帧转换为 PIL 图像（OCR 引擎需要）"""
+    if isinstance(frame, Image.Image):
+        return frame
+    return Image.fromarray(np.ascontiguousarray(frame))
+
+
+def image_to_frame(img):
+    return np.asarray(img.convert("RGB"))
+
+
+class PILCaptureBackend:
+    """
+    PIL ImageGrab 截图（兼容回退）
+    每次截图都会分配新的图像
+    """
+    name = "pil"
+
+    def grab(self, bbox):
+        return np.asarray(ImageGrab.grab(bbox=bbox))
+
+    def release_thread(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class GDICaptureBackend:
+    """
+    Windows GDI 截图
+    每个线程按区域尺寸缓存内存 DC、位图和 NumPy 缓冲区，BitBlt + GetDIBits 直接写入缓冲区，
+    返回 BGRA 缓冲区的 RGB 视图，不再产生额外的拷贝和分配
+    配置修改后旧后端被关闭时，正在截图的线程在截图结束后自行释放自己的 DC 和位图
+    """
+    name = "gdi"
+
+    SRCCOPY = 0x00CC0020
+    CAPTUREBLT = 0x40000000
+    DIB_RGB_COLORS = 0
+    BI_RGB = 0
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class BITMAPINFOHEADER(ctypes.Structure):
+            _fields_ = [
+                ("biSize", wintypes.DWORD), ("biWidth", wintypes.LONG), ("biHeight", wintypes.LONG),
+                ("biPlanes", wintypes.WORD), ("biBitCount", wintypes.WORD), ("biCompression", wintypes.DWORD),
+                ("biSizeImage", wintypes.DWORD), ("biXPelsPerMeter", wintypes.LONG),
+                ("biYPelsPerMeter", wintypes.LONG), ("biClrUsed", wintypes.DWORD),
+                ("biClrImportant", wintypes.DWORD),
+            ]
+
+        class BITMAPINFO(ctypes.Structure):
+            _fields_ = [("bmiHeader", BITMAPINFOHEADER), ("bmiColors", wintypes.DWORD * 3)]
+
+        self._ctypes = ctypes
+        self._BITMAPINFO = BITMAPINFO
+        self._BITMAPINFOHEADER = BITMAPINFOHEADER
+
+        user32 = ctypes.WinDLL("user32")
+        gdi32 = ctypes.WinDLL("gdi32")
+        # 句柄在 64 位系统上是指针宽度，必须声明类型
+        user32.GetWindowDC.argtypes = [wintypes.HWND]
+        user32.GetWindowDC.restype = wintypes.HDC
+        user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+        gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+        gdi32.CreateCompatibleDC.restype = wintypes.HDC
+        gdi32.CreateCompatibleBitmap.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int]
+        gdi32.CreateCompatibleBitmap.restype = wintypes.HBITMAP
+        gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+        gdi32.SelectObject.restype = wintypes.HGDIOBJ
+        gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+        gdi32.DeleteDC.argtypes = [wintypes.HDC]
+        gdi32.BitBlt.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                 wintypes.HDC, ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+        gdi32.GetDIBits.argtypes = [wintypes.HDC, wintypes.HBITMAP, wintypes.UINT, wintypes.UINT,
+                                    ctypes.c_void_p, ctypes.c_void_p, wintypes.UINT]
+        self._user32 = user32
+        self._gdi32 = gdi32
+        self._local = threading.local()
+        self._all_states = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _state(self):
+        state = getattr(self._local, "state", None)
+        if state is None:
+            src_dc = self._user32.GetWindowDC(None)
+            state = {
+                "src_dc": src_dc,
+                "mem_dc": self._gdi32.CreateCompatibleDC(src_dc),
+                "size": None,
+                "bitmap": None,
+                "buffer": None,
+                "bmi": None,
+                "busy": False,  # 正在截图，close 时不能释放
+            }
+            self._local.state = state
+            with self._lock:
+                self._all_states.append(state)
+        return state
+
+    def _prepare(self, state, width, height):
+        """区域尺寸变化时才重新创建位图和缓冲区"""
+        if state["size"] == (width, height):
+            return
+        bitmap = self._gdi32.CreateCompatibleBitmap(state["src_dc"], width, height)
+        self._gdi32.SelectObject(state["mem_dc"], bitmap)
+        # 旧位图已被替换出 DC，此时才能删除
+        if state["bitmap"]:
+            self._gdi32.DeleteObject(state["bitmap"])
+
+        bmi = self._BITMAPINFO()
+        bmi.bmiHeader.biSize = self._ctypes.sizeof(self._BITMAPINFOHEADER)
+        bmi.bmiHeader.biWidth = width
+        bmi.bmiHeader.biHeight = -height  # 负值表示自上而下的行顺序
+        bmi.bmiHeader.biPlanes = 1
+        bmi.bmiHeader.biBitCount = 32
+        bmi.bmiHeader.biCompression = self.BI_RGB
+
+        state.update(size=(width, height), bitmap=bitmap, bmi=bmi,
+                     buffer=np.empty((height, width, 4), dtype=np.uint8))
+
+    def grab(self, bbox):
+        x1, y1, x2, y2 = bbox
+        width, height = x2 - x1, y2 - y1
+        state = self._state()
+        with self._lock:
+            state["busy"] = True
+        try:
+            self._prepare(state, width, height)
+            self._gdi32.BitBlt(state["mem_dc"], 0, 0, width, height,
+                               state["src_dc"], x1, y1, self.SRCCOPY | self.CAPTUREBLT)
+            buffer = state["buffer"]
+            lines = self._gdi32.GetDIBits(state["mem_dc"], state["bitmap"], 0, height,
+                                          buffer.ctypes.data, self._ctypes.byref(state["bmi"]),
+                                          self.DIB_RGB_COLORS)
+        finally:
+            with self._lock:
+                state["busy"] = False
+                if self._closed:
+                    # 截图期间后端已被关闭，由本线程释放自己的句柄（缓冲区由 NumPy 管理，返回的帧仍然有效）
+                    self._discard(state)
+                    self._local.state = None
+        if lines != height:
+            raise OSError(f"GetDIBits 失败: {lines}/{height}")
+        # BGRA -> RGB 视图（负步长，无拷贝）
+        return buffer[:, :, 2::-1]
+
+    def _release(self, state):
+        if state["bitmap"]:
+            self._gdi32.DeleteObject(state["bitmap"])
+        self._gdi32.DeleteDC(state["mem_dc"])
+        self._user32.ReleaseDC(None, state["src_dc"])
+
+    def release_thread(self):
+        """
+        释放当前线程的 DC、位图和缓冲区（实时翻译 / 多区域监视的线程退出时调用）
+        每次开启监视都会创建新线程，不释放的话 GDI 句柄会一直累积到程序退出
+        """
+        state = getattr(self._local, "state", None)
+        if state is None:
+            return
+        self._local.state = None
+        with self._lock:
+            self._discard(state)
+
+    def _discard(self, state):
+        """释放一个线程的状态（调用方持有 _lock），已被释放时忽略"""
+        # 按对象比较（状态中的 NumPy 缓冲区不能用 == 比较）
+        remaining = [other for other in self._all_states if other is not state]
+        if len(remaining) == len(self._all_states):
+            return  # 已被 close 释放
+        self._all_states = remaining
+        self._release(state)
+
+    def close(self):
+        """
+        释放所有线程的句柄；其它线程正在截图时，它的句柄在该次截图结束后由它自己释放
+        关闭后仍持有旧后端的线程再次截图时，临时创建的句柄在截图结束后释放
+        """
+        with self._lock:
+            self._closed = True
+            for state in [state for state in self._all_states if not state["busy"]]:
+                self._discard(state)
+        self._local = threading.local()
+
+
+class ReplayCaptureBackend:
+    """
+    回放截图（无界面测试 / 基准测试）
+    按顺序循环返回目录中的图片或给定的图像列表；
+    图片大于截图区域时按 bbox 裁剪（视为整屏截图），否则整张返回
+    """
+    name = "replay"
+
+    IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+    def __init__(self, source, loop=True):
+        """
+        source: 图片目录，或 PIL 图像 / NumPy 帧的列表
+        loop: 播放完后是否从头开始
+        """
+        if isinstance(source, (str, os.PathLike)):
+            names = sorted(name for name in os.listdir(source)
+                           if name.lower().endswith(self.IMAGE_EXTENSIONS))
+            source = [Image.open(os.path.join(source, name)) for name in names]
+        self.frames = [frame if isinstance(frame, np.ndarray) else image_to_frame(frame) for frame in source]
+        if not self.frames:
+            raise ValueError("回放截图源为空")
+        self.loop = loop
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def grab(self, bbox):
+        with self._lock:
+            if self._index >= len(self.frames):
+                if not self.loop:
+                    raise EOFError("回放截图已结束")
+                self._index = 0
+            frame = self.frames[self._index]
+            self._index += 1
+        x1, y1, x2, y2 = bbox
+        height, width = frame.shape[:2]
+        if (y2 - y1, x2 - x1) != (height, width) and x2 <= width and y2 <= height:
+            return frame[y1:y2, x1:x2]
+        return frame
+
+    def release_thread(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def create_capture_backend(capture_cfg):
+    """
+    根据配置创建截图后端
+    backend: gdi(Windows 快速截图) / pil / replay
+    """
+    backend = capture_cfg.get("backend", "gdi").lower()
+    if backend == "replay":
+        logger.info(f"截图后端: 回放 {capture_cfg.get('replay_dir')}")
+        return ReplayCaptureBackend(capture_cfg["replay_dir"], capture_cfg.get("replay_loop", True))
+    if backend == "gdi":
+        if os.name == "nt":
+            try:
+                capture = GDICaptureBackend()
+                logger.info("截图后端: GDI（预分配缓冲区）")
+                return capture
+            except Exception:
+                logger.warning("GDI 截图初始化失败，回退到 PIL ImageGrab", exc_info=True)
+        else:
+            logger.info("非 Windows 环境，截图回退到 PIL ImageGrab")
+    elif backend != "pil":
+        logger.warning(f"未知截图后端: {backend}，使用 PIL ImageGrab")
+    return PILCaptureBackend()
@@ -0,0 +1,162 @@
+# utils_config.py
+import os
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from utils.logger import logger, configure_logging
+
+
+# 各引擎所需的配置段和字段
+ENGINE_REQUIRED_KEYS = {
+    "baidu": ("baidu_translate", ("appid", "secret")),
+    "google": ("google_translate", ("api_key",)),
+    "youdao": ("youdao_translate", ("app_key", "app_secret")),
+    "tencent": ("tencent_translate", ("secret_id", "secret_key")),
+    "deepl": ("deepl_translate", ("api_key",)),
+    "papago": ("papago_translate", ("client_id", "client_secret")),
+}
+
+
+class ConfigError(ValueError):
+    """配置文件内容不合法"""
+
+
+# 获取配置文件路径（源码运行 / 打包运行 均可）
+# 可通过环境变量 GAMETRANSLATOR_CONFIG 指定其他配置文件（基准测试 / 命令行批处理）
+def get_config_path():
+    override = os.environ.get("GAMETRANSLATOR_CONFIG")
+    if override:
+        return Path(override).resolve()
+    return (Path(sys.executable).parent if getattr(sys, "frozen", False)
+            else Path.cwd()) / "config" / "api_config.json"
+
+
+def validate_config(config):
+    """
+    校验配置内容，返回规范化后的配置（engine 转为小写）
+    """
+    if not isinstance(config, dict):
+        raise ConfigError("配置文件顶层必须是 JSON 对象")
+
+    engine = str(config.get("engine", "")).lower()
+    if engine not in ENGINE_REQUIRED_KEYS:
+        raise ConfigError(f"未支持的翻译引擎: {engine}")
+
+    section, keys = ENGINE_REQUIRED_KEYS[engine]
+    engine_cfg = config.get(section)
+    if not isinstance(engine_cfg, dict):
+        raise ConfigError(f"缺少引擎配置段: {section}")
+    missing = [key for key in keys if key not in engine_cfg]
+    if missing:
+        raise ConfigError(f"{section} 缺少字段: {', '.join(missing)}")
+
+    for name in ("capture", "ocr", "ocr_cache", "http", "cache", "realtime", "metrics", "scheduler",
+                 "overlay", "rate_limit", "router", "async", "logging", "regions", "tm",
+                 "glossary", "ocr_profile"):
+        if not isinstance(config.get(name, {}), dict):
+            raise ConfigError(f"配置段 {name} 必须是 JSON 对象")
+
+    regions = config.get("regions", {}).get("items", {})
+    if not isinstance(regions, dict):
+        raise ConfigError("regions.items 必须是 JSON 对象")
+    for name, region in regions.items():
+        bbox = region.get("bbox") if isinstance(region, dict) else None
+        if not isinstance(bbox, list) or len(bbox) != 4 or not all(isinstance(v, int) for v in bbox):
+            raise ConfigError(f"区域 {name} 的 bbox 必须是 4 个整数 [x1, y1, x2, y2]")
+
+    config["engine"] = engine
+    return config
+
+
+class ConfigService:
+    """
+    配置服务
+    只在配置文件修改时间变化时重新解析，热路径上不再重复打开和解析 JSON；
+    修改后的配置不合法时继续使用上一份有效配置
+    """
+    def __init__(self, path, check_interval=1.0):
+        """
+        path: 配置文件路径
+        check_interval: 检查文件修改时间的最小间隔(秒)
+        """
+        self.path = Path(path)
+        self.check_interval = check_interval
+
+        self._config = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, func):
+        """配置加载或重新加载后调用 func(config)，配置已加载时立即调用一次"""
+        self._listeners.append(func)
+        if self._config is not None:
+            func(self._config)
+
+    def get(self):
+        """返回当前配置（dict）"""
+        now = time.monotonic()
+        if self._config is not None and now - self._checked_at < self.check_interval:
+            return self._config
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                if self._config is None:
+                    raise
+                logger.warning(f"无法读取配置文件，继续使用当前配置: {e}")
+                return self._config
+
+            if mtime != self._mtime:
+                self._reload(mtime)
+            return self._config
+
+    def update_section(self, name, value):
+        """
+        修改配置段并写回配置文件（程序内保存区域等设置时使用）
+        修改后的配置不合法时抛出 ConfigError，文件保持不变
+        """
+        with self._lock:
+            with self.path.open("r", encoding="utf-8") as f:
+                raw = json.load(f)
+            raw[name] = value
+            validate_config(json.loads(json.dumps(raw)))
+
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(raw, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+            os.replace(tmp_path, self.path)
+            self._reload(os.stat(self.path).st_mtime_ns)
+            self._checked_at = time.monotonic()
+
+    def _reload(self, mtime):
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                config = validate_config(json.load(f))
+        except (ValueError, OSError) as e:
+            if self._config is None:
+                raise
+            logger.error(f"配置文件无效，继续使用上一份配置: {e}")
+            self._mtime = mtime  # 文件再次修改前不重复报错
+            return
+
+        if self._mtime is not None:
+            logger.info(f"配置文件已重新加载: {self.path}")
+        self._config = config
+        self._mtime = mtime
+        for func in self._listeners:
+            try:
+                func(config)
+            except Exception:
+                logger.error("配置更新回调执行异常", exc_info=True)
+
+
+config_path = get_config_path()
+config_service = ConfigService(config_path)
+config_service.add_listener(lambda config: configure_logging(config.get("logging", {})))
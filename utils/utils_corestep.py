@@ -1,41 +1,173 @@
-from utils.logger import logger
-from utils.utils_ocr import setup_tesseract, ocr_image
-from utils.utils_translate import translate
-from utils.ui_region import RegionSelector
+import time
+import threading
+from utils.logger import logger, log_event, log_text
+from utils.utils_metrics import metrics
+from utils.utils_config import config_service
+from utils.utils_scheduler import JobCancelled
+
+# OCR / 翻译模块（numpy、PIL、pytesseract、requests）在后台预热线程或首次使用时导入，不拖慢启动
 
 
 class ScreenshotTranslator:
     def __init__(self):
         self.last_bbox = None
+        self.realtime_watcher = None
+        self.region_watch = None
+        self._watch_lock = threading.Lock()
 
-    def update_translation(self, callback=None):
+        # 在后台加载 OCR / 翻译模块并初始化 OCR 引擎，启动时只创建界面
+        self._ready = threading.Event()
+        threading.Thread(target=self._warmup, name="warmup", daemon=True).start()
 
-        """安全的截图翻译流程"""
+    def _warmup(self):
+        start = time.perf_counter()
         try:
-            # 区域选择
-            selector = RegionSelector()
-            bbox, start_coords = selector.get_selection()
-            if not selector.bbox:
-                return None
+            from utils.utils_ocr import init_ocr
+            from utils import utils_translate  # noqa: F401
+            # 初始化 Tesseract 和 OCR 引擎（程序启动时执行一次）
+            init_ocr()
+        except Exception:
+            logger.error("OCR 引擎初始化失败", exc_info=True)
+        finally:
+            self._ready.set()
+        elapsed = (time.perf_counter() - start) * 1000
+        metrics.observe("stage.warmup", elapsed)
+        log_event("app.warmup", ms=round(elapsed, 1))
+
+    def select_region(self, selector, callback):
+        """
+        显示预先创建的区域选择窗口（只能在 Tk 主线程调用）
+        选择完成后回调 callback(bbox, start_coords)，取消选择时 bbox 为 None
+        """
+        def on_done(bbox, start_coords):
+            if bbox:
+                self.last_bbox = bbox  # 保存最后一次成功区域
+            callback(bbox, start_coords)
 
-            self.last_bbox = selector.bbox  # 保存最后一次成功区域
+        selector.select(on_done)
 
-            # 初始化 Tesseract（程序启动时执行一次）
-            setup_tesseract()
+    def last_region(self):
+        """最后一次截图区域 (bbox, start_coords)，还没有截图过时返回 (None, None)"""
+        bbox = self.last_bbox
+        if not bbox:
+            return None, None
+        return bbox, (bbox[0], bbox[1])
+
+    def translate_region(self, token, bbox, start_coords, callback=None, progress=None):
+        """
+        对区域进行 OCR 和翻译
+        token: CancelToken，同一区域有新任务时在阶段之间提前结束
+        progress: progress(start_coords, event, data)，用于边翻译边显示（最终结果仍由 callback 给出）
+          "source": OCR 完成，data 为原文分段列表
+          "segment": 一段译文到达，data 为 (序号, 译文)
+        """
+        self._ready.wait()
+        try:
+            from utils.utils_ocr import ocr_image
+            from utils.utils_translate import translate_text
+            text = ocr_image(bbox)
+            token.check()
 
-            # 在截图翻译流程中调用
-            text = ocr_image(selector.bbox)
+            log_event("pipeline.translate", chars=len(text))
+            # 按句拆分后批量翻译
+            with metrics.span("stage.translate"):
+                if progress is None:
+                    translated_text = translate_text(text)
+                else:
+                    translated_text = self._translate_progressive(token, text, start_coords, progress)
+            token.check()
 
-            logger.info(f"开始翻译文本(长度:{len(text)})")
-            # 翻译
-            translated_text = translate(text)
             if callback:
                 # 回调同时传 start_coords 和翻译文本
                 callback(start_coords, translated_text)
-            logger.info(f"翻译文本({translated_text})")
+            log_event("pipeline.done", text=log_text(translated_text))
             return start_coords, translated_text
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error("截图翻译流程异常", exc_info=True)
             if callback:
-                callback(f"错误: {str(e)}", is_error=True)
+                callback(None, f"错误: {str(e)}", is_error=True)
             return None
+
+    @staticmethod
+    def _translate_progressive(token, text, start_coords, progress):
+        """
+        与 translate_text 相同的拆分和批量翻译，先回调原文分段，再逐段回调译文
+        需要请求的片段按 overlay.stream_chunk 分组并发请求，先返回的组先显示
+        """
+        from utils.utils_translate import translate_segments, split_segments
+        segments = split_segments(text) or [text]
+        progress(start_coords, "source", segments)
+        chunk_size = config_service.get().get("overlay", {}).get("stream_chunk", 2)
+
+        def on_result(index, result):
+            if not token.cancelled:
+                progress(start_coords, "segment", (index, result))
+
+        return '\n'.join(translate_segments(segments, on_result=on_result, chunk_size=chunk_size))
+
+    # -------------------- 实时翻译 --------------------
+    def start_realtime(self, callback):
+        """
+        持续监视 last_bbox，画面变化时自动翻译
+        callback: callback(start_coords, translated_text)
+        """
+        if not self.last_bbox:
+            raise RuntimeError("请先使用截图翻译选择区域")
+
+        from utils.utils_realtime import RealtimeWatcher
+        realtime_cfg = config_service.get().get("realtime", {})
+        self.realtime_watcher = RealtimeWatcher(
+            get_bbox=lambda: self.last_bbox,
+            callback=lambda bbox, result: callback((bbox[0], bbox[1]), result),
+            interval=realtime_cfg.get("interval", 0.5),
+            diff_threshold=realtime_cfg.get("diff_threshold", 4),
+            settle_frames=realtime_cfg.get("settle_frames", 1)
+        )
+        self.realtime_watcher.start()
+
+    def stop_realtime(self):
+        if self.realtime_watcher is not None:
+            self.realtime_watcher.stop()
+            self.realtime_watcher = None
+
+    # -------------------- 多区域监视 --------------------
+    def default_region_name(self):
+        from utils.utils_regions import next_region_name
+        return next_region_name(config_service.get())
+
+    def save_last_region(self, name):
+        """将最后一次截图区域保存为命名区域"""
+        if not self.last_bbox:
+            raise RuntimeError("请先使用截图翻译选择区域")
+        from utils.utils_regions import save_region
+        save_region(name, self.last_bbox)
+
+    def start_watch(self, token, callback):
+        """
+        同时监视配置中的所有命名区域，各区域按自己的间隔截图
+        token: CancelToken，等待 OCR 初始化期间关闭了监视时不再启动
+        callback: callback(name, start_coords, translated_text)
+        """
+        self._ready.wait()
+        from utils.utils_regions import RegionWatchManager
+        # 检查取消和启动在同一把锁内，stop_watch 不会夹在两者之间
+        with self._watch_lock:
+            token.check()
+            self._stop_watch()
+            self.region_watch = RegionWatchManager(
+                lambda name, bbox, result: callback(name, (bbox[0], bbox[1]), result))
+            if not self.region_watch.start():
+                self.region_watch = None
+                raise RuntimeError("没有已保存的区域，请先截图后按 Ctrl+Alt+R 保存区域")
+            return self.region_watch.names()
+
+    def stop_watch(self):
+        with self._watch_lock:
+            self._stop_watch()
+
+    def _stop_watch(self):
+        if self.region_watch is not None:
+            self.region_watch.stop()
+            self.region_watch = None
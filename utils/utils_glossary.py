@@ -0,0 +1,270 @@
+# utils_glossary.py
+import os
+import re
+import json
+import time
+import threading
+from pathlib import Path
+from utils.logger import logger
+
+
+# 术语在送往翻译引擎的文本中替换为占位符，译文返回后再换回术语译文
+PLACEHOLDER = "{{{}}}"
+# 引擎可能把占位符的括号转为全角或在其中加空格
+PLACEHOLDER_PATTERN = re.compile(r"[{｛]\s*(\d+)\s*[}｝]")
+
+
+def _fold(text):
+    """转小写且保持长度不变（匹配位置与原文一一对应）"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+def _is_word_char(char):
+    # 拉丁字母、数字需要词边界；中日韩文字没有空格分词，不检查边界
+    return char.isalnum() and ord(char) < 0x2E80
+
+
+def _is_filler(char):
+    # 完全由术语组成的文本中允许出现的其他字符：空白、标点、数字
+    return not char.isalpha()
+
+
+class AhoCorasick:
+    """
+    多模式字符串匹配自动机，一次扫描找出文本中所有术语
+    节点用 dict 存储转移，失败链接在构建时补全为完整的转移表，匹配时每个字符一次查表
+    """
+    def __init__(self, patterns):
+        """patterns: 模式字符串列表（已转小写），匹配结果中以序号表示"""
+        self._goto = [{}]
+        self._outputs = [()]  # 节点 -> 以该节点结尾的模式序号（含失败链接上的）
+        self.lengths = [len(pattern) for pattern in patterns]
+
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._outputs.append(())
+                node = nxt
+            self._outputs[node] = self._outputs[node] + (index,)
+        self._build_links()
+
+    def _build_links(self):
+        fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                state = fail[node]
+                while state and char not in self._goto[state]:
+                    state = fail[state]
+                link = self._goto[state].get(char, 0)
+                fail[nxt] = link if link != nxt else 0
+                self._outputs[nxt] = self._outputs[nxt] + self._outputs[fail[nxt]]
+        self._fail = fail
+
+    def iter_matches(self, text):
+        """产出 (起始位置, 结束位置, 模式序号)，包括相互重叠的匹配"""
+        goto, fail, outputs, lengths = self._goto, self._fail, self._outputs, self.lengths
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in outputs[node]:
+                yield end - lengths[index], end, index
+
+
+class Glossary:
+    """
+    单个游戏、单个语言对的术语表
+    物品名、技能名、界面标签等短文本由术语表直接给出译文，译名固定不随引擎变化
+    """
+    def __init__(self, terms, name=""):
+        """terms: {原文术语: 译文}，原文不区分大小写"""
+        self.name = name
+        folded = {}
+        for source, target in terms.items():
+            source = " ".join(str(source).split())
+            if source and target:
+                folded[_fold(source)] = (source, str(target))
+        self.sources = [source for source, _ in folded.values()]
+        self.targets = [target for _, target in folded.values()]
+        self._automaton = AhoCorasick(list(folded))
+
+    def __len__(self):
+        return len(self.targets)
+
+    def find(self, text):
+        """
+        返回文本中的术语 [(起始位置, 结束位置, 术语序号)]，互不重叠
+        重叠时取最左、最长的术语；拉丁字母术语必须是完整的词（"Axe" 不匹配 "Taxes"）
+        """
+        if not self.targets:
+            return []
+        candidates = []
+        for start, end, index in self._automaton.iter_matches(_fold(text)):
+            if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if _is_word_char(text[end - 1]) and end < len(text) and _is_word_char(text[end]):
+                continue
+            candidates.append((start, end, index))
+        candidates.sort(key=lambda item: (item[0], item[0] - item[1]))
+
+        matches = []
+        position = 0
+        for start, end, index in candidates:
+            if start >= position:
+                matches.append((start, end, index))
+                position = end
+        return matches
+
+    def apply(self, text, matches=None):
+        """把文本中的术语直接替换为译文"""
+        if matches is None:
+            matches = self.find(text)
+        parts = []
+        position = 0
+        for start, end, index in matches:
+            parts.append(text[position:start])
+            parts.append(self.targets[index])
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
+
+    def translate_full(self, text, matches=None):
+        """
+        文本除空白、标点、数字外完全由术语组成时返回本地译文，否则返回 None
+        如 "Quest Log"、"Reward: 150 Gold, Leather Boots"
+        """
+        if matches is None:
+            matches = self.find(text)
+        if not matches:
+            return None
+        position = 0
+        for start, end, _ in matches + [(len(text), len(text), None)]:
+            if not all(_is_filler(char) for char in text[position:start]):
+                return None
+            position = end
+        return self.apply(text, matches)
+
+    def protect(self, text, matches=None):
+        """
+        把术语替换为占位符，返回 (送往引擎的文本, 占位符序号 -> 术语译文)
+        文本中原本就有形如占位符的内容时不做替换，避免还原时混淆
+        """
+        if matches is None:
+            matches = self.find(text)
+        if not matches or PLACEHOLDER_PATTERN.search(text):
+            return text, {}
+        slots = {}
+        parts = []
+        position = 0
+        for start, end, index in matches:
+            slot = slots.setdefault(index, len(slots))
+            parts.append(text[position:start])
+            parts.append(PLACEHOLDER.format(slot))
+            position = end
+        parts.append(text[position:])
+        return "".join(parts), {slot: self.targets[index] for index, slot in slots.items()}
+
+    @staticmethod
+    def restore(translated, mapping):
+        """把译文中的占位符换回术语译文，返回 (译文, 丢失的占位符数量)"""
+        if not mapping:
+            return translated, 0
+        seen = set()
+
+        def replace(match):
+            slot = int(match.group(1))
+            if slot not in mapping:
+                return match.group(0)
+            seen.add(slot)
+            return mapping[slot]
+
+        return PLACEHOLDER_PATTERN.sub(replace, translated), len(mapping) - len(seen)
+
+
+# -------------------- 术语表文件 --------------------
+def load_glossary_file(path):
+    """
+    读取术语表文件（JSON），返回 {(from_lang, to_lang): Glossary}
+    格式: {"from": "en", "to": "zh", "terms": {"Health Potion": "生命药水"}}
+    或多个语言对: {"pairs": [{"from": ..., "to": ..., "terms": {...}}, ...]}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    pairs = data.get("pairs", [data]) if isinstance(data, dict) else None
+    if not isinstance(pairs, list):
+        raise ValueError("术语表顶层必须是 JSON 对象")
+
+    glossaries = {}
+    for pair in pairs:
+        terms = pair.get("terms") if isinstance(pair, dict) else None
+        if not isinstance(terms, dict):
+            raise ValueError("术语表缺少 terms 对象")
+        key = (str(pair.get("from", "en")).lower(), str(pair.get("to", "zh")).lower())
+        glossaries[key] = Glossary(terms, name=Path(path).stem)
+    return glossaries
+
+
+class GlossaryStore:
+    """
+    按游戏加载术语表（目录下的 <游戏名>.json）
+    与配置服务相同：只在文件修改时间变化时重新读取，文件无效时继续使用上一份
+    """
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._path = None
+        self._glossaries = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, path, from_lang, to_lang):
+        """返回 path 对应术语表中该语言对的 Glossary，没有时返回 None"""
+        now = time.monotonic()
+        path = str(path)
+        if path != self._path or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                self._refresh(path, now)
+        return self._glossaries.get((from_lang.lower(), to_lang.lower()))
+
+    def _refresh(self, path, now):
+        self._checked_at = now
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            if self._path != path or self._glossaries:
+                logger.warning(f"术语表文件不存在: {path}")
+            self._path, self._glossaries, self._mtime = path, {}, None
+            return
+        if path == self._path and mtime == self._mtime:
+            return
+
+        try:
+            glossaries = load_glossary_file(path)
+        except (ValueError, OSError) as e:
+            logger.error(f"术语表无效，继续使用上一份: {path}: {e}")
+            if path != self._path:
+                self._glossaries = {}
+        else:
+            self._glossaries = glossaries
+            total = sum(len(glossary) for glossary in glossaries.values())
+            logger.info(f"术语表已加载: {path} ({total} 条)")
+        self._path, self._mtime = path, mtime
+
+
+glossary_store = GlossaryStore()
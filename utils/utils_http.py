@@ -0,0 +1,133 @@
+# utils_http.py
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from utils.logger import logger
+
+
+class PooledSession(requests.Session):
+    """
+    记录进行中的请求数的 Session
+    连接池参数变化时会话被换下（retire），等最后一个进行中的请求结束后再关闭，不打断其它线程的请求
+    """
+    def __init__(self):
+        super().__init__()
+        self._active = 0
+        self._retired = False
+        self._state_lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        with self._state_lock:
+            self._active += 1
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            with self._state_lock:
+                self._active -= 1
+                close = self._retired and not self._active
+            if close:
+                self.close()
+
+    def retire(self):
+        """不再分配给新请求：没有进行中的请求时立即关闭，否则在最后一个请求结束时关闭"""
+        with self._state_lock:
+            self._retired = True
+            close = not self._active
+        if close:
+            self.close()
+
+
+class HTTPSessionPool:
+    """
+    按翻译引擎划分的 HTTP 会话池
+    每个引擎复用一个 requests.Session（keep-alive 连接池），
+    避免每次翻译都重新进行 TCP + TLS 握手
+    """
+    def __init__(self, pool_size=4, connect_timeout=3, read_timeout=5, retries=0):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+
+        self._sessions = {}  # engine -> Session
+        self._requests = {}  # engine -> 请求次数
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        """(连接超时, 读取超时)，直接传给 requests 的 timeout 参数"""
+        return self.connect_timeout, self.read_timeout
+
+    def configure(self, http_cfg):
+        """
+        根据配置更新连接池参数，连接池大小或重试次数变化时换用新会话
+        旧会话不立即关闭，其它线程正在进行的请求结束后再关闭
+        http_cfg: api_config.json 中的 http 配置
+        """
+        self.connect_timeout = http_cfg.get("connect_timeout", self.connect_timeout)
+        self.read_timeout = http_cfg.get("read_timeout", self.read_timeout)
+        pool_size = http_cfg.get("pool_size", self.pool_size)
+        retries = http_cfg.get("retries", self.retries)
+        if pool_size != self.pool_size or retries != self.retries:
+            with self._lock:
+                self.pool_size = pool_size
+                self.retries = retries
+                retired = list(self._sessions.values())
+                self._sessions.clear()
+                self._requests.clear()
+            for session in retired:
+                session.retire()
+            logger.info(f"HTTP 连接池已重建 (pool_size:{pool_size}, retries:{retries})")
+
+    def _create_session(self):
+        session = PooledSession()
+        adapter = HTTPAdapter(
+            pool_connections=1,  # 每个引擎只访问一个域名
+            pool_maxsize=self.pool_size,
+            max_retries=self.retries
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive"
+        return session
+
+    def session(self, engine):
+        """获取引擎对应的会话（首次使用时创建）"""
+        with self._lock:
+            session = self._sessions.get(engine)
+            if session is None:
+                session = self._sessions[engine] = self._create_session()
+            self._requests[engine] = self._requests.get(engine, 0) + 1
+            return session
+
+    def stats(self):
+        """
+        连接复用统计
+        返回 {engine: {"requests": 请求数, "connections": 新建连接数, "reused": 复用次数}}
+        """
+        result = {}
+        with self._lock:
+            for engine, session in self._sessions.items():
+                connections = 0
+                for adapter in set(session.adapters.values()):
+                    pools = adapter.poolmanager.pools
+                    for key in pools.keys():
+                        connections += pools[key].num_connections
+                requests_count = self._requests.get(engine, 0)
+                result[engine] = {
+                    "requests": requests_count,
+                    "connections": connections,
+                    "reused": max(requests_count - connections, 0),
+                }
+        return result
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._requests.clear()
+
+
+# 全局会话池，由 translate() 按配置更新参数
+http_pool = HTTPSessionPool()
@@ -0,0 +1,186 @@
+# utils_metrics.py
+import os
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from utils.logger import logger
+
+
+class RollingHistogram:
+    """
+    滚动窗口延迟统计，只保留最近 window 个样本用于计算分位数
+    """
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p, ordered=None):
+        ordered = ordered if ordered is not None else sorted(self.samples)
+        if not ordered:
+            return 0.0
+        index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def snapshot(self):
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "last": self.samples[-1] if self.samples else 0.0,
+            "p50": self.percentile(50, ordered),
+            "p95": self.percentile(95, ordered),
+            "p99": self.percentile(99, ordered),
+        }
+
+
+class Metrics:
+    """
+    延迟与计数指标
+    名称约定: stage.* 为截图翻译流程的各阶段，engine.* 为各翻译引擎，单位毫秒
+    """
+    def __init__(self, window=500):
+        self.window = window
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, ms):
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = RollingHistogram(self.window)
+            hist.observe(ms)
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, name):
+        """计时代码块: with metrics.span("stage.ocr"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def timed(self, name):
+        """计时装饰器"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        with self._lock:
+            histograms = {name: hist.snapshot() for name, hist in self._histograms.items()}
+            counters = dict(self._counters)
+        return histograms, counters
+
+    # -------------------- 导出 --------------------
+    def to_prometheus(self):
+        """Prometheus 文本格式"""
+        histograms, counters = self.summary()
+        lines = [
+            "# HELP gametranslator_latency_ms Latency of pipeline stages and translation engines",
+            "# TYPE gametranslator_latency_ms summary",
+        ]
+        for name, snap in sorted(histograms.items()):
+            for quantile in ("50", "95", "99"):
+                lines.append(
+                    f'gametranslator_latency_ms{{name="{name}",quantile="0.{quantile}"}} {snap["p" + quantile]:.3f}'
+                )
+            lines.append(f'gametranslator_latency_ms_sum{{name="{name}"}} {snap["sum"]:.3f}')
+            lines.append(f'gametranslator_latency_ms_count{{name="{name}"}} {snap["count"]}')
+        lines.append("# TYPE gametranslator_events_total counter")
+        for name, value in sorted(counters.items()):
+            lines.append(f'gametranslator_events_total{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self):
+        """悬浮窗显示用的摘要文本"""
+        histograms, counters = self.summary()
+        if not histograms and not counters:
+            return "暂无性能数据"
+        lines = ["性能统计 (ms)  p50 / p95 / p99  次数"]
+        for name, snap in sorted(histograms.items()):
+            lines.append(
+                f"{name}: {snap['p50']:.0f} / {snap['p95']:.0f} / {snap['p99']:.0f}  ×{snap['count']}"
+            )
+        for name, value in sorted(counters.items()):
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+    def write_file(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+# 全局指标
+metrics = Metrics()
+
+
+def start_metrics_export(metrics_cfg):
+    """
+    按配置启动指标导出
+    port: 本地 HTTP 端点端口 (http://127.0.0.1:port/metrics)，0 表示不启动
+    file: 定期写入的指标文件路径，空字符串表示不写文件
+    write_interval: 写文件间隔(秒)
+    """
+    if not metrics_cfg.get("enabled", True):
+        return
+
+    port = metrics_cfg.get("port", 9108)
+    if port:
+        # 只有开启端点时才需要 http.server，不在导入时加载
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("/metrics", ""):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            logger.info(f"性能指标端点: http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            logger.warning(f"性能指标端点启动失败: {e}")
+
+    path = metrics_cfg.get("file", "logs/metrics.prom")
+    if path:
+        interval = metrics_cfg.get("write_interval", 10)
+
+        def write_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    metrics.write_file(path)
+                except OSError:
+                    logger.warning("写入性能指标文件失败", exc_info=True)
+
+        threading.Thread(target=write_loop, daemon=True).start()
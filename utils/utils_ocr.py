@@ -1,8 +1,39 @@
 # utils_ocr.py
 import os
-from PIL import ImageGrab
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pytesseract
-from utils.logger import logger
+from PIL import Image
+from utils.logger import logger, log_event, log_text
+from utils.utils_ocr_engine import create_ocr_pool
+from utils.utils_capture import create_capture_backend, frame_to_image
+from utils.utils_ocr_cache import OCRCache
+from utils.utils_ocr_tiles import find_bands, group_bands
+from utils.utils_ocr_profile import OCRProfile, ocr_profiler
+from utils.utils_preprocess import preprocess
+from utils.utils_config import config_service
+from utils.utils_metrics import metrics
+
+
+# ocr_image 的特殊返回值，调用方据此判断是否需要翻译
+OCR_EMPTY = "OCR 未识别到有效文本"
+OCR_FAILED = "OCR 识别失败"
+
+_tessdata_dir = None
+_ocr_pool = None
+_ocr_pool_cfg = None
+_ocr_pool_lock = threading.Lock()
+_capture = None
+_capture_cfg = None
+_capture_lock = threading.Lock()
+_ocr_cache = None
+_ocr_cache_lock = threading.Lock()
+_tile_executor = None
+_tile_executor_size = 0
+_tile_lock = threading.Lock()
 
 
 def setup_tesseract(tesseract_dir='tools/Tesseract-OCR'):
@@ -10,10 +41,18 @@ def setup_tesseract(tesseract_dir='tools/Tesseract-OCR'):
     设置 tesseract 路径
     tesseract_dir: 相对项目根目录的 Tesseract-OCR 文件夹路径
     """
+    global _tessdata_dir
     # 获取项目根目录，而不是当前文件目录
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     tesseract_path = os.path.join(base_dir, tesseract_dir, 'tesseract.exe')
 
+    # 非 Windows 环境（无界面基准测试 / 批处理）使用系统安装的 tesseract
+    if os.name != 'nt' and shutil.which('tesseract'):
+        pytesseract.pytesseract.tesseract_cmd = shutil.which('tesseract')
+        _tessdata_dir = os.environ.get('TESSDATA_PREFIX')
+        logger.info(f"Tesseract 设置成功: {pytesseract.pytesseract.tesseract_cmd}")
+        return
+
     if not os.path.exists(tesseract_path):
         raise FileNotFoundError(
             f"Tesseract 未找到，请确保路径存在: {tesseract_path}\n"
@@ -24,33 +63,223 @@ def setup_tesseract(tesseract_dir='tools/Tesseract-OCR'):
 
     import pytesseract
     pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    _tessdata_dir = os.path.join(base_dir, tesseract_dir, 'tessdata')
     logger.info(f"Tesseract 设置成功: {tesseract_path}")
 
 
-def ocr_image(bbox):
+def get_ocr_pool():
+    """
+    获取全局 OCR 引擎池，按 api_config.json 的 ocr 配置创建
+    ocr 配置被修改时重建引擎池
+    """
+    global _ocr_pool, _ocr_pool_cfg
+    ocr_cfg = config_service.get().get("ocr", {})
+    with _ocr_pool_lock:
+        if _ocr_pool is None or ocr_cfg != _ocr_pool_cfg:
+            if _ocr_pool is not None:
+                logger.info("OCR 配置已修改，重建引擎池")
+                _ocr_pool.close()
+            _ocr_pool = create_ocr_pool(ocr_cfg, _tessdata_dir)
+            _ocr_pool_cfg = ocr_cfg
+        return _ocr_pool
+
+
+def init_ocr():
+    """
+    程序启动时初始化一次：设置 tesseract 路径并预加载 OCR 引擎
+    """
+    setup_tesseract()
+    get_ocr_pool().warmup()
+
+
+def get_capture_backend():
+    """
+    获取全局截图后端，按 api_config.json 的 capture 配置创建
+    capture 配置被修改时重建
+    """
+    global _capture, _capture_cfg
+    capture_cfg = config_service.get().get("capture", {})
+    with _capture_lock:
+        if _capture is None or capture_cfg != _capture_cfg:
+            if _capture is not None:
+                _capture.close()
+            _capture = create_capture_backend(capture_cfg)
+            _capture_cfg = capture_cfg
+        return _capture
+
+
+def release_capture():
+    """释放当前线程占用的截图资源（实时翻译 / 多区域监视的线程退出时调用）"""
+    with _capture_lock:
+        capture = _capture
+    if capture is not None:
+        capture.release_thread()
+
+
+def get_ocr_cache():
+    """
+    获取全局 OCR 结果缓存，配置中 ocr_cache.enabled 为 false 时返回 None
+    """
+    global _ocr_cache
+    cache_cfg = config_service.get().get("ocr_cache", {})
+    if not cache_cfg.get("enabled", True):
+        return None
+    with _ocr_cache_lock:
+        if _ocr_cache is None:
+            _ocr_cache = OCRCache(
+                max_bytes=int(cache_cfg.get("max_mb", 4) * 1024 * 1024),
+                tolerance=cache_cfg.get("tolerance", 0)
+            )
+        return _ocr_cache
+
+
+def get_tile_executor(size):
+    """分块识别用的线程池，线程只负责把分块交给 OCR 引擎池并等待结果"""
+    global _tile_executor, _tile_executor_size
+    with _tile_lock:
+        if _tile_executor is None or _tile_executor_size != size:
+            if _tile_executor is not None:
+                _tile_executor.shutdown(wait=False)
+            _tile_executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="ocr-tile")
+            _tile_executor_size = size
+        return _tile_executor
+
+
+def recognize_image(pool, img, profile=None):
+    """
+    识别一张图片，返回 (text, 置信度)
+    profile 为 None 时使用引擎池的默认参数（不计算置信度），否则按 profile 的语言、PSM 和缩放比例识别
+    """
+    if profile is None:
+        return pool.recognize(img), None
+    if profile.scale != 1:
+        size = (max(1, round(img.width * profile.scale)), max(1, round(img.height * profile.scale)))
+        img = img.resize(size, Image.BILINEAR)
+    return pool.recognize_scored(img, profile.lang, profile.psm)
+
+
+def prepare_image(frame, glyph_height=None):
+    """
+    帧转为送往 OCR 引擎的图片
+    glyph_height 不为 None 时先做前处理（二值化、裁剪到文字范围、缩放到目标字高），没有文字时返回 None
+    """
+    if glyph_height is None:
+        return frame_to_image(frame)
+    with metrics.span("stage.ocr_preprocess"):
+        return preprocess(frame, glyph_height)
+
+
+def recognize_tiled(pool, frame, min_height, profile=None, glyph_height=None):
+    """
+    大区域按横向文字带分块，在引擎池上并行识别，结果按从上到下的顺序拼接
+    空白的文字带不识别；区域高度小于 min_height 或引擎池只有一个引擎时整幅识别
+    glyph_height: 前处理的目标字高，None 为不做前处理（见 prepare_image）
+    返回 (text, 置信度)，置信度为各分块按文字长度加权的平均值
+    """
+    if not min_height or pool.size < 2 or not isinstance(frame, np.ndarray) or frame.shape[0] < min_height:
+        img = prepare_image(frame, glyph_height)
+        return recognize_image(pool, img, profile) if img is not None else ("", None)
+
+    with metrics.span("stage.ocr_bands"):
+        bands = group_bands(find_bands(frame), pool.size)
+    metrics.inc("ocr.tiles", len(bands))
+    # 在调用线程中裁剪并转换，截图缓冲区在下一次截图时会被覆盖
+    images = [img for img in (prepare_image(frame[top:bottom], glyph_height) for top, bottom in bands)
+              if img is not None]
+    if not images:
+        return "", None
+    if len(images) == 1:
+        return recognize_image(pool, images[0], profile)
+    executor = get_tile_executor(pool.size)
+    futures = [executor.submit(recognize_image, pool, img, profile) for img in images]
+    results = [future.result() for future in futures]
+    text = "\n".join(text.strip("\n") for text, _ in results)
+    scored = [(len(text.strip()), conf) for text, conf in results if conf is not None and text.strip()]
+    if not scored:
+        return text, None
+    return text, sum(length * conf for length, conf in scored) / sum(length for length, _ in scored)
+
+
+def get_region_profiler(region):
+    """
+    区域的 OCR 参数选择器，未启用自适应参数或没有区域标识时返回 None
+    """
+    config = config_service.get()
+    profile_cfg = config.get("ocr_profile", {})
+    if region is None or not profile_cfg.get("enabled", True):
+        return None
+    ocr_profiler.configure(profile_cfg)
+    ocr_cfg = config.get("ocr", {})
+    full = OCRProfile(ocr_cfg.get("lang", "chi_sim+eng"), ocr_cfg.get("psm", 6), 1.0)
+    return ocr_profiler.get(region, full)
+
+
+def recognize_frame(frame, region=None):
+    """
+    识别一帧，相同画面直接返回缓存的结果
+    region: 区域标识，同一区域按前几次的识别结果选择更快的 OCR 参数
+    """
+    pool = get_ocr_pool()
+    ocr_cfg = config_service.get().get("ocr", {})
+    min_height = ocr_cfg.get("tile_min_height", 0)
+    glyph_height = ocr_cfg.get("glyph_height", 32) if ocr_cfg.get("preprocess", True) else None
+    profiler = get_region_profiler(region)
+
+    def recognize():
+        if profiler is None:
+            return recognize_tiled(pool, frame, min_height, glyph_height=glyph_height)[0]
+        return profiler.recognize(lambda profile: recognize_tiled(pool, frame, min_height, profile, glyph_height))
+
+    cache = get_ocr_cache()
+    if cache is None:
+        return recognize()
+
+    key, text = cache.get(frame, pool.profile)
+    if text is not None:
+        metrics.inc("ocr_cache.hit")
+        return text
+    metrics.inc("ocr_cache.miss")
+    text = recognize()
+    cache.put(key, frame, pool.profile, text)
+    return text
+
+
+def grab_image(bbox):
+    """
+    截取指定区域
+    bbox: (x1, y1, x2, y2)
+    返回 NumPy 帧 (高, 宽, 3) RGB
+    """
+    return get_capture_backend().grab(bbox)
+
+
+def ocr_image(bbox, frame=None, region=None):
     """
     对指定区域截图并 OCR 识别
     bbox: (x1, y1, x2, y2)
+    frame: 已截取的帧（实时模式复用已截取的帧，避免重复截图）
+    region: 自适应 OCR 参数的区域标识，默认按 bbox 区分；批处理时按视频 / 目录区分
     返回识别出的文本（中英文混合）
     """
     try:
         if not hasattr(pytesseract, 'get_tesseract_version'):
             raise RuntimeError("Tesseract 未正确安装")
 
-        img = ImageGrab.grab(bbox=bbox)
-        text = pytesseract.image_to_string(
-            img,
-            lang='chi_sim+eng',
-            config='--psm 6 --oem 3'
-        )
+        if frame is None:
+            with metrics.span("stage.grab"):
+                frame = grab_image(bbox)
+        with metrics.span("stage.ocr"):
+            if region is None and bbox is not None:
+                region = ",".join(str(v) for v in bbox)
+            text = recognize_frame(frame, region)
         text = ' '.join(text.splitlines())
         if not text.strip():
             logger.warning("OCR 未识别到有效文本")
-            return "OCR 未识别到有效文本"
+            return OCR_EMPTY
 
-        logger.debug(f"OCR识别结果: {text}")
+        log_event("ocr.result", level=logging.DEBUG, text=log_text(text))
         return text
 
     except Exception as e:
         logger.error("OCR 识别失败", exc_info=True)
-        return "OCR 识别失败"
+        return OCR_FAILED
@@ -0,0 +1,117 @@
+# utils_ocr_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def frame_digest(frame):
+    """帧内容摘要（精确匹配），包含尺寸以区分不同区域"""
+    data = np.ascontiguousarray(frame)
+    digest = hashlib.blake2b(data, digest_size=16)
+    digest.update(str(data.shape).encode())
+    return digest.hexdigest()
+
+
+def frame_dhash(frame, hash_size=8):
+    """
+    差值感知哈希 (dHash)，64 位整数
+    对压缩噪声、抗锯齿等细微差异不敏感
+    """
+    height, width = frame.shape[:2]
+    gray = frame.mean(axis=2, dtype=np.float32) if frame.ndim == 3 else frame.astype(np.float32)
+    # 按块平均缩放到 (hash_size, hash_size + 1)
+    rows = np.linspace(0, height, hash_size + 1, dtype=int)
+    cols = np.linspace(0, width, hash_size + 2, dtype=int)
+    small = np.add.reduceat(np.add.reduceat(gray, rows[:-1], axis=0), cols[:-1], axis=1)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class OCRCache:
+    """
+    OCR 结果缓存，位于截图和 OCR 之间
+    键为帧内容摘要 + OCR 语言和参数；内存按文本字节数限制，LRU 淘汰；
+    可选感知哈希容差，汉明距离不超过 tolerance 的同尺寸帧视为同一画面
+    """
+    def __init__(self, max_bytes=4 * 1024 * 1024, tolerance=0):
+        """
+        max_bytes: 缓存文本占用的内存上限
+        tolerance: 感知哈希汉明距离容差，0 表示只做精确匹配
+        """
+        self.max_bytes = max_bytes
+        self.tolerance = tolerance
+
+        self._entries = OrderedDict()  # key -> (text, size, shape, dhash, profile)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _entry_size(key, text):
+        return len(key) + len(text.encode("utf-8")) + 64
+
+    def get(self, frame, profile):
+        """
+        profile: OCR 语言和参数，例如 "chi_sim+eng|--psm 6 --oem 3"
+        返回 (key, text)，未命中时 text 为 None；key 用于随后的 put
+        """
+        key = f"{profile}|{frame_digest(frame)}"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return key, entry[0]
+
+        if self.tolerance:
+            dhash = frame_dhash(frame)
+            with self._lock:
+                best_key, best_distance = None, self.tolerance + 1
+                for other_key, (_, _, shape, other_hash, other_profile) in self._entries.items():
+                    if other_profile != profile or shape != frame.shape:
+                        continue
+                    distance = bin(dhash ^ other_hash).count("1")
+                    if distance < best_distance:
+                        best_key, best_distance = other_key, distance
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.hits += 1
+                    self.fuzzy_hits += 1
+                    return key, self._entries[best_key][0]
+
+        with self._lock:
+            self.misses += 1
+        return key, None
+
+    def put(self, key, frame, profile, text):
+        size = self._entry_size(key, text)
+        dhash = frame_dhash(frame) if self.tolerance else 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (text, size, frame.shape, dhash, profile)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[1]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,333 @@
+# utils_ocr_engine.py
+import queue
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pytesseract
+from utils.logger import logger, start_worker_logging, setup_worker_logging
+
+
+def _is_cjk(char):
+    return ord(char) >= 0x2E80
+
+
+def text_from_data(data):
+    """
+    把 image_to_data 的逐词结果拼回文本，同时计算平均置信度
+    同一行的词用空格连接（中日韩文字之间不加空格），返回 (text, confidence)，没有文字时置信度为 None
+    """
+    lines = {}
+    confs = []
+    for word, conf, block, par, line in zip(data["text"], data["conf"], data["block_num"],
+                                            data["par_num"], data["line_num"]):
+        word = word.strip()
+        conf = float(conf)
+        if not word or conf < 0:
+            continue
+        confs.append(conf)
+        words = lines.setdefault((block, par, line), [])
+        if words and not (_is_cjk(words[-1][-1]) and _is_cjk(word[0])):
+            words.append(" ")
+        words.append(word)
+    text = "\n".join("".join(words) for words in lines.values())
+    return text, (sum(confs) / len(confs) if confs else None)
+
+
+class SubprocessOCREngine:
+    """
+    pytesseract 引擎（兼容回退）
+    每次识别都会启动 tesseract 进程并重新加载语言模型
+    """
+    name = "subprocess"
+
+    def __init__(self, lang="chi_sim+eng", psm=6, oem=3):
+        self.lang = lang
+        self.oem = oem
+        self.config = f"--psm {psm} --oem {oem}"
+
+    def recognize(self, img):
+        return pytesseract.image_to_string(img, lang=self.lang, config=self.config)
+
+    def recognize_scored(self, img, lang, psm):
+        """按指定语言和 PSM 识别，返回 (text, 平均置信度 0-100)"""
+        data = pytesseract.image_to_data(img, lang=lang, config=f"--psm {psm} --oem {self.oem}",
+                                         output_type=pytesseract.Output.DICT)
+        return text_from_data(data)
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine:
+    """
+    tesserocr 常驻引擎
+    在进程内加载一次 traineddata，之后每次识别只传递图像，无进程启动和临时文件开销；
+    按语言组合各保留一个 API 实例，切换 OCR 参数时不重新加载模型
+    """
+    name = "tesserocr"
+
+    def __init__(self, tessdata_dir, lang="chi_sim+eng", psm=6, oem=3):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.tessdata_dir = tessdata_dir
+        self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self._apis = {}  # lang -> PyTessBaseAPI
+        self.api = self._get_api(lang, psm)
+
+    def _get_api(self, lang, psm):
+        api = self._apis.get(lang)
+        if api is None:
+            api = self._apis[lang] = self._tesserocr.PyTessBaseAPI(
+                path=self.tessdata_dir, lang=lang, psm=psm, oem=self.oem)
+        elif api.GetPageSegMode() != psm:
+            api.SetPageSegMode(psm)
+        return api
+
+    def recognize(self, img):
+        api = self._get_api(self.lang, self.psm)
+        api.SetImage(img)
+        return api.GetUTF8Text()
+
+    def recognize_scored(self, img, lang, psm):
+        """按指定语言和 PSM 识别，返回 (text, 平均置信度 0-100)"""
+        api = self._get_api(lang, psm)
+        api.SetImage(img)
+        text = api.GetUTF8Text()
+        return text, (api.MeanTextConf() if text.strip() else None)
+
+    def close(self):
+        for api in self._apis.values():
+            api.End()
+        self._apis.clear()
+
+
+class OCREnginePool:
+    """
+    有界 OCR 引擎池
+    并发截图各自借用一个引擎，引擎数量不超过 size，用完归还以便复用
+    关闭后借出的引擎在归还时关闭，不会留在已废弃的池中
+    """
+    def __init__(self, factory, size=2):
+        """
+        factory: 创建引擎的函数
+        size: 引擎数量上限
+        """
+        self.factory = factory
+        self.size = size
+        self.profile = ""  # OCR 语言和参数，用作 OCR 结果缓存键的一部分
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        engine = None
+        if not self._closed:
+            try:
+                engine = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if self._created < self.size:
+                        self._created += 1
+                        create = True
+                    else:
+                        create = False
+                if create:
+                    try:
+                        engine = self.factory()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                else:
+                    # 引擎全部被占用，等待归还
+                    engine = self._idle.get(timeout=timeout)
+        if engine is None:
+            # 池已关闭（等待期间关闭时由归还引擎的调用方唤醒），临时创建一个引擎，用完即关闭
+            engine = self.factory()
+        try:
+            yield engine
+        finally:
+            self._release(engine)
+
+    def _release(self, engine):
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._idle.put(engine)
+        if closed:
+            engine.close()
+            # 唤醒关闭前开始等待归还的调用方
+            self._idle.put(None)
+
+    def recognize(self, img):
+        with self.acquire() as engine:
+            return engine.recognize(img)
+
+    def recognize_scored(self, img, lang, psm):
+        with self.acquire() as engine:
+            return engine.recognize_scored(img, lang, psm)
+
+    def warmup(self):
+        """预先创建一个引擎，把模型加载时间挪到启动阶段"""
+        with self.acquire():
+            pass
+
+    def close(self):
+        """关闭空闲的引擎；借出中的引擎在归还时关闭"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                engine = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if engine is not None:
+                engine.close()
+
+
+# -------------------- 多进程 OCR --------------------
+_worker_engine = None
+
+
+def _init_process_worker(log_queue, backend, tesseract_cmd, tessdata_dir, lang, psm, oem):
+    """OCR 子进程初始化：日志经 log_queue 交给主进程写入，每个子进程创建一个常驻引擎"""
+    global _worker_engine
+    setup_worker_logging(log_queue)
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    if backend == "tesserocr":
+        try:
+            _worker_engine = TesserocrEngine(tessdata_dir, lang, psm, oem)
+            return
+        except ImportError:
+            pass
+    _worker_engine = SubprocessOCREngine(lang, psm, oem)
+
+
+def _process_recognize(img):
+    try:
+        return _worker_engine.recognize(img)
+    except Exception as e:
+        # pytesseract 的部分异常无法 pickle，传回主进程时会导致进程池损坏
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _process_recognize_scored(img, lang, psm):
+    try:
+        return _worker_engine.recognize_scored(img, lang, psm)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _process_warmup():
+    return _worker_engine is not None
+
+
+class ProcessOCRPool:
+    """
+    多进程 OCR 引擎池，接口与 OCREnginePool 相同
+    每个子进程持有一个常驻引擎，多个区域同时识别时分摊到多个 CPU 核心，不受 GIL 限制；
+    子进程异常退出时下次识别重建进程池；
+    各平台都用 spawn 启动子进程（与 Windows 一致，不 fork 带着后台线程的主进程）
+    """
+    def __init__(self, backend, tessdata_dir, lang, psm, oem, processes=2):
+        self.size = processes
+        self.profile = ""
+        self._initargs = (backend, pytesseract.pytesseract.tesseract_cmd, tessdata_dir, lang, psm, oem)
+        self._executor = None
+        self._ctx = multiprocessing.get_context("spawn")
+        self._log_queue = self._log_listener = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self._log_queue is None:
+                    self._log_queue, self._log_listener = start_worker_logging(self._ctx)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=self._ctx,
+                    initializer=_init_process_worker,
+                    initargs=(self._log_queue,) + self._initargs
+                )
+            return self._executor
+
+    def recognize(self, img):
+        return self._submit(_process_recognize, img)
+
+    def recognize_scored(self, img, lang, psm):
+        return self._submit(_process_recognize_scored, img, lang, psm)
+
+    def _submit(self, func, *args):
+        executor = self._get_executor()
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            logger.warning("OCR 子进程异常退出，重建进程池")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise
+
+    def warmup(self):
+        """启动子进程并加载模型，把启动时间挪到程序启动阶段"""
+        executor = self._get_executor()
+        for future in [executor.submit(_process_warmup) for _ in range(self.size)]:
+            future.result()
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            listener, self._log_listener = self._log_listener, None
+            self._log_queue = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if listener is not None:
+            listener.stop()
+
+
+def create_ocr_pool(ocr_cfg, tessdata_dir):
+    """
+    根据配置创建 OCR 引擎池
+    ocr_cfg: api_config.json 中的 ocr 配置
+    tessdata_dir: traineddata 所在目录
+    backend 为 tesserocr 但未安装时回退到 subprocess；
+    tesserocr 且 processes 大于 0 时在子进程中识别（subprocess 模式本身已在独立进程中运行，不需要）
+    """
+    backend = ocr_cfg.get("backend", "tesserocr").lower()
+    lang = ocr_cfg.get("lang", "chi_sim+eng")
+    psm = ocr_cfg.get("psm", 6)
+    oem = ocr_cfg.get("oem", 3)
+    pool_size = ocr_cfg.get("pool_size", 2)
+    processes = ocr_cfg.get("processes", 0)
+
+    pool = None
+    if backend == "tesserocr":
+        try:
+            import tesserocr  # noqa: F401
+            if processes > 0:
+                pool = ProcessOCRPool(backend, tessdata_dir, lang, psm, oem, processes)
+                logger.info(f"OCR 引擎: tesserocr 多进程 (processes:{processes})")
+            else:
+                pool = OCREnginePool(lambda: TesserocrEngine(tessdata_dir, lang, psm, oem), pool_size)
+                logger.info(f"OCR 引擎: tesserocr 常驻引擎 (pool_size:{pool_size})")
+        except ImportError:
+            logger.warning("未安装 tesserocr，OCR 回退到 pytesseract 子进程模式")
+    elif backend != "subprocess":
+        logger.warning(f"未知 OCR 引擎: {backend}，使用 pytesseract 子进程模式")
+
+    if pool is None:
+        logger.info("OCR 引擎: pytesseract 子进程")
+        pool = OCREnginePool(lambda: SubprocessOCREngine(lang, psm, oem), pool_size)
+    pool.profile = f"{lang}|--psm {psm} --oem {oem}"
+    if ocr_cfg.get("preprocess", True):
+        # 前处理改变送往引擎的图片，识别结果不能与未前处理时的缓存混用
+        pool.profile += f"|glyph {ocr_cfg.get('glyph_height', 32)}"
+    return pool
@@ -0,0 +1,259 @@
+# utils_ocr_profile.py
+import time
+import itertools
+import threading
+from collections import OrderedDict, namedtuple
+from utils.logger import logger, log_event
+from utils.utils_metrics import metrics
+
+
+# 一组 OCR 参数：语言组合、页面分割模式、识别前的缩放比例
+OCRProfile = namedtuple("OCRProfile", "lang psm scale")
+
+# 文字种类 -> 可识别该文字的 tesseract 语言（按优先顺序）
+SCRIPT_LANGS = {
+    "han": ("chi_sim", "chi_tra", "jpn"),
+    "kana": ("jpn",),
+    "hangul": ("kor",),
+    "latin": ("eng",),
+}
+# 单行文本使用的页面分割模式（tesseract --psm 7）
+SINGLE_LINE_PSM = 7
+
+
+def profile_name(profile):
+    return f"{profile.lang}|psm{profile.psm}|x{profile.scale:g}"
+
+
+def char_script(char):
+    code = ord(char)
+    if 0x3040 <= code <= 0x30FF:
+        return "kana"
+    if 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF:
+        return "hangul"
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF:
+        return "han"
+    if char.isalpha() and code < 0x0250:
+        return "latin"
+    return None
+
+
+def detect_scripts(text):
+    """文本中出现的文字种类（数字、标点不算）"""
+    scripts = set()
+    for char in text:
+        script = char_script(char)
+        if script is not None:
+            scripts.add(script)
+    return scripts
+
+
+def langs_for_scripts(scripts, full_lang):
+    """
+    识别这些文字种类所需的最少语言组合（保持配置中的顺序）
+    完整语言组合中没有对应语言的文字种类无法缩减，返回完整语言组合
+    """
+    available = full_lang.split("+")
+    needed = set()
+    for script in scripts:
+        lang = next((lang for lang in SCRIPT_LANGS.get(script, ()) if lang in available), None)
+        if lang is None:
+            return full_lang
+        needed.add(lang)
+    if not needed:
+        return full_lang
+    return "+".join(lang for lang in available if lang in needed)
+
+
+def estimated_cost(profile):
+    """相对识别耗时估计：与语言模型数量、像素数量成正比，单行模式省去版面分析"""
+    cost = len(profile.lang.split("+")) * profile.scale ** 2
+    return cost * 0.8 if profile.psm == SINGLE_LINE_PSM else cost
+
+
+class RegionProfiler:
+    """
+    单个区域（或游戏）的 OCR 参数选择
+    学习: 前 learn_frames 次用完整参数识别，记录出现的文字种类、是否单行、置信度和耗时
+    试用: 从估计最便宜的候选参数开始，连续 trial_frames 次置信度不低于学习阶段平均值 - margin 时固定使用；
+          置信度不足的帧立即用完整参数重新识别，并换下一个候选
+    固定: 置信度连续 fallback_frames 次不足时回到完整参数重新学习（画面内容或语言变了）
+    """
+    def __init__(self, name, full, settings):
+        self.name = name
+        self.full = full
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.state = "learning"
+        self.current = self.full
+        self._samples = []  # 学习阶段: (文字种类, 是否单行, 置信度)
+        self._candidates = []
+        self._streak = 0
+        self._drops = 0
+        self.baseline = None  # 完整参数的平均置信度
+        self.full_ms = None
+        self.ms = None
+        self.confidence = None
+
+    def recognize(self, run):
+        """
+        run(profile) -> (text, 置信度)，置信度为 None 表示没有识别到文字
+        返回本帧的识别结果（当前参数置信度不足时为完整参数的结果）
+        """
+        profile = self.current
+        text, conf, elapsed = self._timed(run, profile)
+        if profile == self.full:
+            self._observe_full(text, conf, elapsed)
+            return text
+        if conf is None or self._acceptable(conf):
+            self._observe_candidate(profile, conf, elapsed)
+            return text
+
+        text, conf, elapsed = self._timed(run, self.full)
+        self._reject(profile, conf, elapsed)
+        return text
+
+    @staticmethod
+    def _timed(run, profile):
+        start = time.perf_counter()
+        text, conf = run(profile)
+        return text, conf, (time.perf_counter() - start) * 1000
+
+    def _acceptable(self, conf):
+        return conf >= max(self.settings["min_confidence"], self.baseline - self.settings["margin"])
+
+    @staticmethod
+    def _ewma(previous, value):
+        return value if previous is None else previous * 0.8 + value * 0.2
+
+    def _observe_full(self, text, conf, elapsed):
+        with self._lock:
+            self.full_ms = self._ewma(self.full_ms, elapsed)
+            if self.state != "learning" or conf is None:
+                return
+            self._samples.append((detect_scripts(text), len(text.strip().splitlines()) <= 1, conf))
+            if len(self._samples) >= self.settings["learn_frames"]:
+                self._start_trials()
+
+    def _start_trials(self):
+        scripts = set().union(*(sample[0] for sample in self._samples))
+        single_line = all(sample[1] for sample in self._samples)
+        self.baseline = sum(sample[2] for sample in self._samples) / len(self._samples)
+
+        langs = {self.full.lang, langs_for_scripts(scripts, self.full.lang)}
+        psms = {self.full.psm, SINGLE_LINE_PSM} if single_line else {self.full.psm}
+        candidates = [OCRProfile(lang, psm, scale)
+                      for lang, psm, scale in itertools.product(langs, psms, self.settings["scales"])]
+        candidates = sorted((profile for profile in candidates if profile != self.full
+                             and estimated_cost(profile) < estimated_cost(self.full)), key=estimated_cost)
+        self._candidates = candidates[:self.settings["max_trials"]]
+        self._next_candidate()
+
+    def _next_candidate(self):
+        self._streak = 0
+        if self._candidates:
+            self.state = "trial"
+            self.current = self._candidates.pop(0)
+        else:
+            self.state = "locked"
+            self.current = self.full
+
+    def _observe_candidate(self, profile, conf, elapsed):
+        with self._lock:
+            if profile != self.current:
+                return
+            self.ms = self._ewma(self.ms, elapsed)
+            if conf is None:
+                return
+            self.confidence = self._ewma(self.confidence, conf)
+            self._drops = 0
+            if self.state == "trial":
+                self._streak += 1
+                if self._streak >= self.settings["trial_frames"]:
+                    self.state = "locked"
+                    self._report()
+
+    def _reject(self, profile, conf, elapsed):
+        metrics.inc("ocr.profile.fallback")
+        with self._lock:
+            self.full_ms = self._ewma(self.full_ms, elapsed)
+            if profile != self.current:
+                return
+            if self.state == "trial":
+                self.ms = None
+                self.confidence = None
+                self._next_candidate()
+                return
+            self._drops += 1
+            if self._drops >= self.settings["fallback_frames"]:
+                logger.info(f"OCR 参数置信度下降，区域 {self.name} 回到完整参数重新学习")
+                log_event("ocr.profile_reset", region=self.name, profile=profile_name(profile), conf=conf)
+                self._reset()
+
+    def _report(self):
+        log_event("ocr.profile", region=self.name, profile=profile_name(self.current),
+                  full_ms=self.full_ms, ms=self.ms, conf=self.confidence, baseline=self.baseline)
+        if self.full_ms and self.ms:
+            logger.info(f"区域 {self.name} 固定使用 OCR 参数 {profile_name(self.current)}，"
+                        f"识别耗时 {self.full_ms:.0f}ms -> {self.ms:.0f}ms")
+
+    def stats(self):
+        return {
+            "region": self.name,
+            "state": self.state,
+            "profile": profile_name(self.current),
+            "full_ms": self.full_ms,
+            "ms": self.ms if self.current != self.full else self.full_ms,
+            "confidence": self.confidence,
+            "baseline": self.baseline,
+        }
+
+
+class OCRProfiler:
+    """
+    按区域保存 RegionProfiler（最近使用的 max_regions 个）
+    完整参数（配置中的 ocr.lang / psm）改变时所有区域重新学习
+    """
+    def __init__(self, max_regions=64):
+        self.max_regions = max_regions
+        self.settings = {
+            "learn_frames": 3,
+            "trial_frames": 2,
+            "fallback_frames": 2,
+            "min_confidence": 60,
+            "margin": 10,
+            "scales": [1.0, 0.75],
+            "max_trials": 4,
+        }
+        self._regions = OrderedDict()
+        self._full = None
+        self._lock = threading.Lock()
+
+    def configure(self, profile_cfg):
+        for key in self.settings:
+            if key in profile_cfg:
+                self.settings[key] = profile_cfg[key]
+
+    def get(self, region, full):
+        with self._lock:
+            if full != self._full:
+                self._regions.clear()
+                self._full = full
+            profiler = self._regions.get(region)
+            if profiler is None:
+                profiler = self._regions[region] = RegionProfiler(region, full, self.settings)
+                while len(self._regions) > self.max_regions:
+                    self._regions.popitem(last=False)
+            else:
+                self._regions.move_to_end(region)
+            return profiler
+
+    def stats(self):
+        with self._lock:
+            return [profiler.stats() for profiler in self._regions.values()]
+
+
+ocr_profiler = OCRProfiler()
@@ -0,0 +1,61 @@
+# utils_ocr_tiles.py
+import numpy as np
+
+
+def text_rows(frame, threshold=48, min_ink=0.002):
+    """
+    行投影：返回每一行是否含有文字的布尔数组
+    背景色取灰度中位数（对话框、任务日志等区域中背景占大多数像素），
+    与背景的灰度差超过 threshold 的像素视为文字，比例超过 min_ink 的行视为文字行；
+    几乎每行都有的列（对话框边框、竖直分隔线）不计入；隔列采样，笔画宽度一般不小于 2 像素
+    """
+    # 逐通道相加比 sum(axis=2) 快一个数量级（后者在最内层的 3 个元素上循环）
+    sampled = frame[:, ::2]
+    gray = sampled[..., 0].astype(np.int16) + sampled[..., 1] + sampled[..., 2]
+    background = np.int16(np.median(gray[::4, ::4]))
+    ink = np.abs(gray - background) > threshold * 3
+    height = ink.shape[0]
+    ink = ink[:, np.count_nonzero(ink, axis=0) < height * 0.8]
+    if not ink.size:
+        return np.zeros(height, dtype=bool)
+    return np.count_nonzero(ink, axis=1) > ink.shape[1] * min_ink
+
+
+def find_bands(frame, min_gap=4, pad=4, min_height=6, threshold=48):
+    """
+    按行投影找出横向文字带，返回 [(top, bottom)]，从上到下排序
+    连续空白行超过 min_gap 的地方分开；高度小于 min_height 的文字带视为噪点（分隔线等）丢弃；
+    每个文字带上下各留 pad 像素，避免裁掉字母的上下部
+    """
+    rows = np.flatnonzero(text_rows(frame, threshold))
+    if not rows.size:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) > min_gap)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+
+    height = frame.shape[0]
+    return [(max(0, int(top) - pad), min(height, int(bottom) + pad))
+            for top, bottom in zip(starts, ends) if bottom - top >= min_height]
+
+
+def group_bands(bands, tiles):
+    """
+    把相邻的文字带合并为最多 tiles 个分块，各分块的文字高度大致相同
+    分块只在空白处切开，合并后仍按从上到下的顺序排列
+    """
+    if len(bands) <= tiles:
+        return bands
+    target = sum(bottom - top for top, bottom in bands) / tiles
+    groups = []
+    top, bottom = bands[0]
+    filled = bottom - top
+    for band_top, band_bottom in bands[1:]:
+        # 加入这一带后比不加入更偏离目标高度时，从这里切开
+        if filled + (band_bottom - band_top) / 2 > target and len(groups) < tiles - 1:
+            groups.append((top, bottom))
+            top, filled = band_top, 0
+        bottom = band_bottom
+        filled += band_bottom - band_top
+    groups.append((top, bottom))
+    return groups
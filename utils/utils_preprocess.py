@@ -0,0 +1,178 @@
+# utils_preprocess.py
+import numpy as np
+from PIL import Image
+
+
+def to_gray(frame):
+    """RGB 帧转灰度 (uint8)，整数加权 (77R + 150G + 29B) / 256，逐通道计算"""
+    gray = frame[..., 0].astype(np.uint16) * 77
+    gray += frame[..., 1].astype(np.uint16) * 150
+    gray += frame[..., 2].astype(np.uint16) * 29
+    return (gray >> 8).astype(np.uint8)
+
+
+def box_sum(gray, radius):
+    """
+    每个元素周围 (2*radius+1) 见方窗口的和与窗口面积（积分图，边缘处窗口截断）
+    积分图按边缘值扩展后窗口和只需切片相减，不需要逐像素索引
+    """
+    height, width = gray.shape
+    integral = np.zeros((height + 1, width + 1), dtype=np.int32)
+    np.cumsum(gray, axis=0, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    integral = np.pad(integral, radius, mode="edge")
+
+    span = 2 * radius + 1
+    sums = integral[span:span + height, span:span + width] - integral[:height, span:span + width]
+    sums -= integral[span:span + height, :width]
+    sums += integral[:height, :width]
+
+    rows = np.minimum(np.arange(height) + radius + 1, height) - np.maximum(np.arange(height) - radius, 0)
+    cols = np.minimum(np.arange(width) + radius + 1, width) - np.maximum(np.arange(width) - radius, 0)
+    return sums, rows[:, None] * cols[None, :]
+
+
+def block_sums(gray, step):
+    """
+    step x step 块的灰度和，边缘不足一块的部分用最后一行 / 列补齐
+    按步长切片相加，比 reshape 后 sum(axis=(1, 3)) 快一个数量级（后者在最内层的 step 个元素上循环）
+    """
+    rows = gray[::step].astype(np.uint16)
+    for i in range(1, step):
+        part = gray[i::step]
+        rows[:len(part)] += part
+        rows[len(part):] += gray[-1]
+    cols = rows[:, ::step].astype(np.int32)
+    for i in range(1, step):
+        part = rows[:, i::step]
+        cols[:, :part.shape[1]] += part
+        cols[:, part.shape[1]:] += rows[:, -1:]
+    return cols
+
+
+def ink_mask(gray, radius=12, offset=24, step=4):
+    """
+    自适应二值化：比周围平均亮度高（深色底浅色字）或低（浅色底深色字）offset 以上的像素为文字
+    文字颜色由整体亮度判断：游戏对话框多为半透明深色底，背景中透出的画面亮度不均，
+    用局部平均值而不是全局阈值，背景纹理不会被当成文字；
+    背景亮度变化平缓，局部平均值按 step x step 的块计算，每块内的像素共用一个阈值
+    """
+    height, width = gray.shape
+    sums, area = box_sum(block_sums(gray, step), max(1, radius // step))
+    mean = sums // (area * step * step)
+    if np.median(gray[::4, ::4]) < 128:
+        threshold = np.minimum(mean + offset, 255).astype(np.uint8)
+        compare = np.greater
+    else:
+        threshold = np.maximum(mean - offset, 0).astype(np.uint8)
+        compare = np.less
+    threshold = threshold.repeat(step, axis=0)[:height].repeat(step, axis=1)[:, :width]
+    return compare(gray, threshold)
+
+
+def longest_run(column):
+    """一列中连续为 True 的最长长度"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], column.view(np.int8), [0]))))
+    return int((edges[1::2] - edges[::2]).max()) if edges.size else 0
+
+
+def edge_border(ink, counts, columns, edge_ratio, ratio, text_rows):
+    """
+    columns 为从图像边缘向内的列序号，返回其中属于边框的列
+    超过 edge_ratio 行有文字像素的列，满足以下之一才是边框：
+      连续的文字像素接近整列高 (ratio)；
+      与文字之间隔着空白列，且上下都超出文字行的范围（对话框边框比文字高，紧贴文字截图时首字的竖笔不会满足）
+    """
+    height = ink.shape[0]
+    candidates = [x for x in columns if counts[x] >= height * edge_ratio]
+    border = [x for x in candidates if longest_run(ink[:, x]) >= height * ratio]
+
+    # 跳过边缘的空白列，取连续的候选列，其后必须紧跟空白列
+    nonblank = [x for x in columns if counts[x]]
+    if not nonblank:
+        return border
+    run = []
+    for x in columns[columns.index(nonblank[0]):]:
+        if x not in candidates:
+            break
+        run.append(x)
+    after = columns.index(run[-1]) + 1 if run else None
+    if run and after < len(columns) and not counts[columns[after]]:
+        rows = np.flatnonzero(ink[:, run].any(axis=1))
+        if text_rows is None or not text_rows.size or (rows[0] < text_rows[0] and rows[-1] > text_rows[-1]):
+            border.extend(run)
+    return border
+
+
+def remove_lines(ink, ratio=0.8, edge_ratio=0.5, edge=12):
+    """
+    去掉对话框边框和分隔线，返回新的掩码
+    几乎整行都是文字像素的行视为横线，几乎整列都是的列视为竖线；
+    靠近左右边缘 edge 像素内的列按 edge_border 判断是否为边框
+    （边框转角附近的局部平均亮度偏高，竖直边框在二值化后上下两端会断开，不能按整列判断；
+    但只看列中文字像素的比例时，紧贴文字的截图会把首字的竖笔当成边框）
+    """
+    height, width = ink.shape
+    ink = ink.copy()
+    ink[np.count_nonzero(ink, axis=1) >= width * ratio, :] = False
+    counts = np.count_nonzero(ink, axis=0)
+    lines = counts >= height * ratio
+    ink[:, lines] = False
+    counts[lines] = 0
+
+    edge = min(edge, width // 2)
+    text_rows = np.flatnonzero(ink[:, edge:width - edge].any(axis=1)) if width > edge * 2 else None
+    left = edge_border(ink, counts, list(range(edge)), edge_ratio, ratio, text_rows)
+    right = edge_border(ink, counts, list(range(width - 1, width - 1 - edge, -1)), edge_ratio, ratio, text_rows)
+    ink[:, left + right] = False
+    return ink
+
+
+def text_bbox(ink, min_pixels=2):
+    """含文字的最小矩形 (top, bottom, left, right)，没有文字时返回 None"""
+    rows = np.flatnonzero(np.count_nonzero(ink, axis=1) >= min_pixels)
+    cols = np.flatnonzero(np.count_nonzero(ink, axis=0) >= min_pixels)
+    if not rows.size or not cols.size:
+        return None
+    return int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1
+
+
+def line_height(ink, min_gap=2):
+    """文字行高度的中位数（行投影中连续文字行的长度），没有文字时返回 0"""
+    rows = np.flatnonzero(np.count_nonzero(ink, axis=1))
+    if not rows.size:
+        return 0
+    breaks = np.flatnonzero(np.diff(rows) > min_gap)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+    return int(np.median(ends - starts))
+
+
+def preprocess(frame, glyph_height=32, pad=6, radius=12, offset=24, min_scale=0.5, max_scale=3.0):
+    """
+    OCR 前处理：灰度 → 自适应二值化 → 裁剪到文字范围 → 缩放到目标字高
+    返回白底黑字的灰度图 (PIL "L")；没有找到文字时返回 None（不需要识别）
+    glyph_height: 缩放后的文字行高度(像素)，tesseract 在 30 像素左右的字高下最快且最准；0 为不缩放
+    pad: 裁剪时四周保留的像素
+    """
+    gray = to_gray(frame)
+    ink = remove_lines(ink_mask(gray, radius, offset))
+    bbox = text_bbox(ink)
+    if bbox is None:
+        return None
+    top, bottom, left, right = bbox
+    ink = ink[top:bottom, left:right]
+
+    height, width = ink.shape
+    # 白底黑字，四周留白
+    page = np.full((height + pad * 2, width + pad * 2), 255, dtype=np.uint8)
+    page[pad:pad + height, pad:pad + width][ink] = 0
+    img = Image.fromarray(page)
+
+    text_height = line_height(ink)
+    if glyph_height and text_height:
+        scale = min(max(glyph_height / text_height, min_scale), max_scale)
+        if abs(scale - 1) > 0.1:
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(size, Image.BILINEAR)
+    return img
@@ -0,0 +1,176 @@
+# utils_ratelimit.py
+import time
+import threading
+from concurrent.futures import Future, InvalidStateError
+
+
+class TokenBucket:
+    """
+    令牌桶限流
+    令牌按 rate 每秒补充，最多积累 burst 个；令牌不足时预约未来的令牌并等待，
+    请求按到达顺序排队，而不是直接发出后被接口拒绝
+    """
+    def __init__(self, rate, burst=1):
+        """
+        rate: 每秒请求数
+        burst: 允许的突发请求数
+        """
+        self.rate = float(rate)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, timeout=None):
+        """
+        预约一个令牌，返回需要等待的秒数（不阻塞，供异步调用方 await asyncio.sleep）
+        需要等待的时间超过 timeout(秒) 时不占用令牌，返回 None
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if timeout is not None and wait > timeout:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def acquire(self, timeout=None):
+        """
+        获取一个令牌，必要时阻塞等待
+        需要等待的时间超过 timeout(秒) 时不占用令牌，返回 False
+        """
+        wait = self.reserve(timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def penalize(self, seconds):
+        """接口返回限流错误时，清空令牌并暂停 seconds 秒"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class RateLimiter:
+    """
+    按翻译引擎分别限流
+    只对 rate_limit.engines 中配置了 qps 的引擎生效，其余引擎不限流
+    """
+    def __init__(self):
+        self.max_wait = 10.0
+        self._buckets = {}  # engine -> (qps, burst, TokenBucket)
+        self._lock = threading.Lock()
+
+    def configure(self, rate_cfg):
+        """根据 api_config.json 中的 rate_limit 配置更新，参数未变化的引擎保留原令牌桶"""
+        enabled = rate_cfg.get("enabled", True)
+        engines = rate_cfg.get("engines", {}) if enabled else {}
+        with self._lock:
+            self.max_wait = rate_cfg.get("max_wait", 10.0)
+            buckets = {}
+            for engine, engine_cfg in engines.items():
+                if not isinstance(engine_cfg, dict) or not engine_cfg.get("qps"):
+                    continue
+                qps, burst = engine_cfg["qps"], engine_cfg.get("burst", 1)
+                current = self._buckets.get(engine)
+                if current is not None and current[:2] == (qps, burst):
+                    buckets[engine] = current
+                else:
+                    buckets[engine] = (qps, burst, TokenBucket(qps, burst))
+            self._buckets = buckets
+
+    def _bucket(self, engine):
+        entry = self._buckets.get(engine)
+        return entry[2] if entry is not None else None
+
+    def acquire(self, engine):
+        """返回 False 表示排队时间超过 max_wait，本次请求应放弃"""
+        bucket = self._bucket(engine)
+        if bucket is None:
+            return True
+        return bucket.acquire(self.max_wait)
+
+    def reserve(self, engine):
+        """非阻塞版本的 acquire：返回需要等待的秒数，排队超过 max_wait 时返回 None"""
+        bucket = self._bucket(engine)
+        if bucket is None:
+            return 0.0
+        return bucket.reserve(self.max_wait)
+
+    def burst(self, engine):
+        """引擎可以同时发出的请求数，不限流的引擎返回 None"""
+        entry = self._buckets.get(engine)
+        return entry[1] if entry is not None else None
+
+    def penalize(self, engine, seconds=1.0):
+        bucket = self._bucket(engine)
+        if bucket is not None:
+            bucket.penalize(seconds)
+
+
+class SingleFlight:
+    """
+    合并相同的进行中请求
+    第一个调用者负责请求，之后相同 key 的调用者等待同一个 Future，不再重复请求
+    """
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key):
+        """
+        返回 (future, leader)
+        leader 为 True 时调用者必须在完成后调用 resolve(key, ...)，否则等待者会一直阻塞
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def resolve(self, key, result=None, error=None):
+        with self._lock:
+            future = self._calls.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def abandon(self, key, future):
+        """
+        等待超时后放弃卡住的请求：等待同一 Future 的调用方收到 TimeoutError，
+        之后相同 key 的调用方重新请求（key 已被新的请求认领时不做处理）
+        """
+        with self._lock:
+            if self._calls.get(key) is not future:
+                return
+            del self._calls[key]
+        if not future.done():
+            try:
+                future.set_exception(TimeoutError("等待合并的请求超时"))
+            except InvalidStateError:
+                pass  # 请求恰好在此时完成
+
+    def do(self, key, func, *args):
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        try:
+            result = func(*args)
+        except BaseException as e:
+            self.resolve(key, error=e)
+            raise
+        self.resolve(key, result)
+        return result
+
+
+rate_limiter = RateLimiter()
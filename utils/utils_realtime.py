@@ -0,0 +1,136 @@
+# utils_realtime.py
+import threading
+import numpy as np
+from utils.logger import logger, log_event
+from utils.utils_metrics import metrics
+from utils.utils_ocr import grab_image, ocr_image, release_capture, OCR_EMPTY, OCR_FAILED
+from utils.utils_translate import translate_text
+
+
+def frame_signature(frame, size=32):
+    """
+    生成帧的缩略灰度图，用于快速比较画面是否变化
+    按步长采样约 size x size 个像素，不做完整缩放，比较成本可以忽略
+    """
+    height, width = frame.shape[:2]
+    sampled = frame[::max(height // size, 1), ::max(width // size, 1)]
+    return sampled.mean(axis=2, dtype=np.float32)
+
+
+def frame_diff(sig_a, sig_b):
+    """
+    计算两个缩略图的平均灰度差 (0-255)，尺寸不同视为完全变化
+    """
+    if sig_a.shape != sig_b.shape:
+        return 255.0
+    return float(np.abs(sig_a - sig_b).mean())
+
+
+class RealtimeWatcher:
+    """
+    实时翻译循环
+    按固定间隔截取区域，只有画面发生变化并稳定后才进行 OCR 和翻译，
+    静止画面只做一次截图和缩略图比较，不会产生 API 调用
+    """
+    def __init__(self, get_bbox, callback, interval=0.5, diff_threshold=4, settle_frames=1, name="实时翻译"):
+        """
+        get_bbox: 返回当前监视区域的函数
+        callback: callback(bbox, translated_text)
+        interval: 截图间隔(秒)
+        diff_threshold: 平均灰度差超过该值视为画面变化
+        settle_frames: 画面变化后需要保持不变的帧数（等待逐字显示的对话结束）
+        name: 日志和线程名中显示的名称（多区域监视时为区域名）
+        """
+        self.name = name
+        self.get_bbox = get_bbox
+        self.callback = callback
+        self.interval = interval
+        self.diff_threshold = diff_threshold
+        self.settle_frames = settle_frames
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._last_bbox = None
+        self._last_sig = None       # 上一帧缩略图
+        self._handled_sig = None    # 最后一次 OCR 对应的缩略图
+        self._stable_count = 0
+        self._last_text = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        # 每次启动使用新的停止事件：stop 等待超时后仍在翻译的旧线程不会因为重新启动而继续运行
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._loop, args=(self._stop_event,),
+                                        name=f"watch-{self.name}", daemon=True)
+        self._thread.start()
+        logger.info(f"{self.name}已启动 (间隔:{self.interval}s, 阈值:{self.diff_threshold})")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+        logger.info(f"{self.name}已停止")
+
+    # -------------------- 循环 --------------------
+    def _loop(self, stop_event):
+        try:
+            while not stop_event.wait(self.interval):
+                try:
+                    self._tick(stop_event)
+                except Exception:
+                    logger.error(f"{self.name}循环异常", exc_info=True)
+        finally:
+            # 每次开启监视都是新线程，退出时释放本线程的截图缓冲区和 GDI 句柄
+            release_capture()
+
+    def _tick(self, stop_event):
+        bbox = self.get_bbox()
+        if not bbox:
+            return
+
+        if bbox != self._last_bbox:
+            # 区域变化后重新开始比较
+            self._last_bbox = bbox
+            self._last_sig = self._handled_sig = self._last_text = None
+            self._stable_count = 0
+
+        frame = grab_image(bbox)
+        sig = frame_signature(frame)
+
+        # 与上一帧比较，判断画面是否稳定
+        if self._last_sig is not None and frame_diff(sig, self._last_sig) < self.diff_threshold:
+            self._stable_count += 1
+        else:
+            self._stable_count = 0
+        self._last_sig = sig
+
+        # 与已处理的画面一致，无需处理
+        if self._handled_sig is not None and frame_diff(sig, self._handled_sig) < self.diff_threshold:
+            return
+        # 首帧直接处理，其余画面变化后等待稳定
+        if self._handled_sig is not None and self._stable_count < self.settle_frames:
+            return
+
+        self._handled_sig = sig
+        text = ocr_image(bbox, frame)
+        if text in (OCR_EMPTY, OCR_FAILED) or text == self._last_text:
+            log_event("realtime.skip", watcher=self.name,
+                      reason="same_text" if text == self._last_text else "no_text")
+            return
+        self._last_text = text
+
+        log_event("realtime.translate", watcher=self.name, chars=len(text))
+        with metrics.span("stage.translate"):
+            translated_text = translate_text(text)
+        if stop_event.is_set():
+            # stop 只等待 interval + 1 秒，翻译较慢时在停止之后才返回，不再回调
+            log_event("realtime.skip", watcher=self.name, reason="stopped")
+            return
+        self.callback(bbox, translated_text)
@@ -0,0 +1,90 @@
+# utils_regions.py
+import threading
+from utils.logger import logger
+from utils.utils_config import config_service
+from utils.utils_realtime import RealtimeWatcher
+
+
+def load_regions(config):
+    """
+    返回配置中启用的命名区域 {name: region_cfg}
+    region_cfg: {"bbox": [x1, y1, x2, y2], "interval": 秒, "enabled": true}
+    """
+    items = config.get("regions", {}).get("items", {})
+    return {name: region for name, region in items.items() if region.get("enabled", True)}
+
+
+def save_region(name, bbox, interval=None):
+    """
+    将区域保存到配置文件的 regions.items（同名区域覆盖，保留原有的间隔设置）
+    """
+    regions_cfg = dict(config_service.get().get("regions", {}))
+    items = dict(regions_cfg.get("items", {}))
+    region = dict(items.get(name, {}), bbox=[int(v) for v in bbox])
+    if interval is not None:
+        region["interval"] = interval
+    items[name] = region
+    regions_cfg["items"] = items
+    config_service.update_section("regions", regions_cfg)
+    logger.info(f"已保存区域 {name}: {region['bbox']}")
+
+
+def next_region_name(config):
+    """自动生成的区域名: region1, region2, ..."""
+    items = config.get("regions", {}).get("items", {})
+    index = len(items) + 1
+    while f"region{index}" in items:
+        index += 1
+    return f"region{index}"
+
+
+class RegionWatchManager:
+    """
+    多区域监视
+    每个命名区域一个 RealtimeWatcher，按各自的间隔截图，画面变化时识别和翻译；
+    多个区域的 OCR 同时提交到 OCR 引擎池（多进程时分摊到多个 CPU 核心）
+    """
+    def __init__(self, callback):
+        """
+        callback: callback(name, bbox, translated_text)，在监视线程中调用
+        """
+        self.callback = callback
+        self._watchers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return bool(self._watchers)
+
+    def names(self):
+        return list(self._watchers)
+
+    def start(self):
+        """按当前配置启动所有启用的区域，返回启动的区域数"""
+        config = config_service.get()
+        regions = load_regions(config)
+        realtime_cfg = config.get("realtime", {})
+        with self._lock:
+            self._stop_all()
+            for name, region in regions.items():
+                bbox = tuple(region["bbox"])
+                watcher = RealtimeWatcher(
+                    get_bbox=lambda bbox=bbox: bbox,
+                    callback=lambda bbox, result, name=name: self.callback(name, bbox, result),
+                    interval=region.get("interval", realtime_cfg.get("interval", 0.5)),
+                    diff_threshold=region.get("diff_threshold", realtime_cfg.get("diff_threshold", 4)),
+                    settle_frames=region.get("settle_frames", realtime_cfg.get("settle_frames", 1)),
+                    name=f"区域监视[{name}]"
+                )
+                watcher.start()
+                self._watchers[name] = watcher
+        return len(regions)
+
+    def stop(self):
+        with self._lock:
+            self._stop_all()
+
+    def _stop_all(self):
+        for watcher in self._watchers.values():
+            watcher.stop()
+        self._watchers.clear()
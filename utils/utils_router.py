@@ -0,0 +1,242 @@
+# utils_router.py
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.logger import logger
+from utils.utils_metrics import metrics, RollingHistogram
+
+
+class EngineHealth:
+    """
+    单个翻译引擎的健康状态
+    EWMA 延迟和错误率 + 熔断器（closed → open → half_open → closed）
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self):
+        self.latency = None  # EWMA 延迟(毫秒)，None 表示还没有样本
+        self.error_rate = 0.0  # EWMA 错误率
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.histogram = RollingHistogram(200)
+
+    def snapshot(self):
+        return {
+            "state": self.state,
+            "latency": round(self.latency or 0.0, 1),
+            "error_rate": round(self.error_rate, 3),
+            "p95": round(self.histogram.percentile(95), 1),
+        }
+
+
+class EngineRouter:
+    """
+    翻译引擎路由
+    按主引擎 → 备用引擎的顺序尝试，失败时切换到下一个引擎；
+    连续失败或错误率过高的引擎熔断 cooldown 秒，期间直接跳过，冷却后放行一个探测请求；
+    可选对冲模式：主引擎超过其 p95 延迟仍未返回时，向备用引擎并行发送请求，取先成功的结果
+    """
+    def __init__(self):
+        self.fallbacks = []
+        self.alpha = 0.2
+        self.failure_threshold = 3
+        self.error_rate_threshold = 0.5
+        self.min_samples = 5
+        self.cooldown = 30.0
+        self.hedge = False
+        self.hedge_min_ms = 300
+
+        self._health = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def configure(self, router_cfg):
+        """router_cfg: api_config.json 中的 router 配置"""
+        enabled = router_cfg.get("enabled", True)
+        self.fallbacks = [str(e).lower() for e in router_cfg.get("fallbacks", [])] if enabled else []
+        self.alpha = router_cfg.get("ewma_alpha", self.alpha)
+        self.failure_threshold = router_cfg.get("failure_threshold", self.failure_threshold)
+        self.error_rate_threshold = router_cfg.get("error_rate_threshold", self.error_rate_threshold)
+        self.cooldown = router_cfg.get("cooldown", self.cooldown)
+        self.hedge = enabled and router_cfg.get("hedge", False)
+        self.hedge_min_ms = router_cfg.get("hedge_min_ms", self.hedge_min_ms)
+
+    def reset(self):
+        with self._lock:
+            self._health.clear()
+
+    def _get(self, engine):
+        health = self._health.get(engine)
+        if health is None:
+            health = self._health[engine] = EngineHealth()
+        return health
+
+    # -------------------- 熔断器 --------------------
+    def _available(self, engine, now):
+        """调用方持有 _lock"""
+        health = self._get(engine)
+        if health.state == EngineHealth.CLOSED:
+            return True
+        if health.state == EngineHealth.OPEN and now - health.opened_at >= self.cooldown:
+            health.state = EngineHealth.HALF_OPEN
+            health.probing = False
+        # 半开状态只放行一个探测请求（实际发出请求时才标记 probing）
+        return health.state == EngineHealth.HALF_OPEN and not health.probing
+
+    def record(self, engine, latency_ms, ok):
+        with self._lock:
+            health = self._get(engine)
+            value = 0.0 if ok else 1.0
+            if health.samples == 0:
+                health.error_rate = value
+            else:
+                health.error_rate += self.alpha * (value - health.error_rate)
+            health.samples += 1
+
+            if ok:
+                health.latency = latency_ms if health.latency is None else \
+                    health.latency + self.alpha * (latency_ms - health.latency)
+                health.histogram.observe(latency_ms)
+                health.consecutive_failures = 0
+                if health.state != EngineHealth.CLOSED:
+                    logger.info(f"翻译引擎 {engine} 已恢复，关闭熔断")
+                health.state = EngineHealth.CLOSED
+                health.probing = False
+                return
+
+            health.consecutive_failures += 1
+            too_many = health.consecutive_failures >= self.failure_threshold
+            too_often = health.samples >= self.min_samples and health.error_rate >= self.error_rate_threshold
+            if health.state == EngineHealth.HALF_OPEN or \
+                    (health.state == EngineHealth.CLOSED and (too_many or too_often)):
+                logger.warning(f"翻译引擎 {engine} 熔断 {self.cooldown}s "
+                               f"(连续失败:{health.consecutive_failures}, 错误率:{health.error_rate:.2f})")
+                metrics.inc(f"router.{engine}.circuit_open")
+                health.state = EngineHealth.OPEN
+                health.opened_at = time.monotonic()
+                health.probing = False
+
+    def candidates(self, engines):
+        """
+        可用的引擎，主引擎在前，备用引擎按 EWMA 延迟（按错误率加权）排序
+        没有样本的备用引擎排在前面以便尽快获得统计
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = [e for e in engines if self._available(e, now)]
+
+            def score(engine):
+                health = self._get(engine)
+                if health.latency is None:
+                    return 0.0
+                return health.latency * (1 + 4 * health.error_rate)
+
+            if available and available[0] == engines[0]:
+                return available[:1] + sorted(available[1:], key=score)
+            return sorted(available, key=score)
+
+    def hedge_delay(self, engine):
+        """对冲等待时间：主引擎 p95 延迟，不低于 hedge_min_ms"""
+        with self._lock:
+            health = self._get(engine)
+            p95 = health.histogram.percentile(95) if len(health.histogram.samples) >= 20 else 0.0
+        return max(p95, self.hedge_min_ms) / 1000
+
+    def stats(self):
+        with self._lock:
+            return {engine: health.snapshot() for engine, health in self._health.items()}
+
+    # -------------------- 路由 --------------------
+    def begin(self, engine):
+        """
+        即将向 engine 发出请求（半开状态下占用唯一的探测名额）
+        探测名额已被其它请求占用时返回 False，调用方不应发出请求
+        """
+        with self._lock:
+            health = self._get(engine)
+            if health.state == EngineHealth.HALF_OPEN:
+                if health.probing:
+                    return False
+                health.probing = True
+            return True
+
+    def release(self, engine):
+        """请求没有真正发出（本地排队超时）：不计入统计，归还半开状态的探测名额"""
+        with self._lock:
+            self._get(engine).probing = False
+
+    def _call(self, engine, call, failed):
+        if not self.begin(engine):
+            return engine, None, False
+        start = time.perf_counter()
+        try:
+            result = call(engine)
+            verdict = failed(result)
+        except Exception as e:
+            logger.error(f"翻译引擎 {engine} 调用异常: {e}", exc_info=True)
+            result, verdict = None, True
+        if verdict is None:
+            self.release(engine)
+            return engine, result, False
+        self.record(engine, (time.perf_counter() - start) * 1000, not verdict)
+        return engine, result, not verdict
+
+    def _hedged(self, primary, backup, call, failed):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hedge")
+        pending = {self._executor.submit(self._call, primary, call, failed)}
+        done, pending = wait(pending, timeout=self.hedge_delay(primary))
+        backup_sent = False
+        last = None
+        while True:
+            for future in done:
+                last = future.result()
+                if last[2]:
+                    if last[0] == backup:
+                        metrics.inc("router.hedge_won")
+                    return last
+            if not backup_sent:
+                # 主引擎超时未返回（对冲）或已经失败（切换）
+                if not done:
+                    logger.info(f"{primary} 超过 p95 延迟未返回，向 {backup} 发送对冲请求")
+                    metrics.inc("router.hedged")
+                pending.add(self._executor.submit(self._call, backup, call, failed))
+                backup_sent = True
+            if not pending:
+                return last
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    def route(self, engines, call, failed):
+        """
+        engines: [主引擎, 备用引擎...]
+        call: call(engine) 执行翻译
+        failed: failed(result) 判断结果是否为失败，返回 None 表示本地限流（不计入引擎健康状态，继续尝试下一个引擎）
+        返回 (engine, result)；所有引擎都处于熔断状态时返回 (None, None)
+        """
+        order = self.candidates(engines)
+        if not order:
+            return None, None
+
+        engine = result = None
+        if self.hedge and len(order) > 1:
+            engine, result, ok = self._hedged(order[0], order[1], call, failed)
+            if ok:
+                return engine, result
+            order = order[2:]
+
+        for index, engine in enumerate(order):
+            if index > 0:
+                logger.warning(f"切换到备用翻译引擎: {engine}")
+                metrics.inc("router.failover")
+            engine, result, ok = self._call(engine, call, failed)
+            if ok:
+                return engine, result
+        return engine, result
+
+
+router = EngineRouter()
@@ -0,0 +1,97 @@
+# utils_scheduler.py
+import queue
+import threading
+from utils.logger import logger
+
+
+class JobCancelled(Exception):
+    """任务已被同一区域的新任务取代"""
+
+
+class CancelToken:
+    """
+    任务取消标记
+    任务在各阶段之间调用 check()，被取消时抛出 JobCancelled 提前结束
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+class JobScheduler:
+    """
+    有界任务调度器
+    固定数量的工作线程 + 有界队列：队列已满时拒绝新任务（背压），
+    同一个 key 提交新任务时取消旧任务（后到优先）
+    """
+    def __init__(self, workers=2, queue_size=4):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._latest = {}  # key -> CancelToken
+        self._lock = threading.Lock()
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key, func, *args):
+        """
+        提交任务 func(token, *args)
+        返回 CancelToken；队列已满时返回 None
+        """
+        token = CancelToken()
+        with self._lock:
+            try:
+                self._queue.put_nowait((key, token, func, args))
+            except queue.Full:
+                logger.warning(f"任务队列已满，丢弃任务: {key}")
+                return None
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+                logger.info(f"任务被新任务取代: {key}")
+            self._latest[key] = token
+        return token
+
+    def cancel(self, key):
+        with self._lock:
+            token = self._latest.pop(key, None)
+        if token is not None:
+            token.cancel()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            key, token, func, args = item
+            try:
+                if not token.cancelled:
+                    func(token, *args)
+            except JobCancelled:
+                logger.debug(f"任务已取消: {key}")
+            except Exception:
+                logger.error(f"任务执行异常: {key}", exc_info=True)
+            finally:
+                with self._lock:
+                    if self._latest.get(key) is token:
+                        del self._latest[key]
+                self._queue.task_done()
+
+    def shutdown(self):
+        with self._lock:
+            for token in self._latest.values():
+                token.cancel()
+            self._latest.clear()
+        for _ in self._threads:
+            self._queue.put(None)
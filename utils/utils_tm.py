@@ -0,0 +1,243 @@
+# utils_tm.py
+import re
+import threading
+import unicodedata
+from array import array
+import numpy as np
+from utils.logger import logger
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rapid_levenshtein
+except ImportError:
+    _rapid_levenshtein = None
+
+
+# OCR 常见的形近字符，比较前统一（只用于相似度计算，不影响返回的译文）
+# 数字不参与统一：150G / 250G、Lv10 / Lv1O 这类差别不能当作 OCR 误差
+OCR_CONFUSABLES = str.maketrans({
+    "I": "l", "|": "l", "!": "l",
+    "O": "o",
+    "$": "s",
+})
+_DIGITS_RE = re.compile(r"\d+")
+# 句末的问号 / 感叹号决定语气（“now?” 与 “now.” 不能互相替代），句号和没有标点视为相同
+SENTENCE_ENDS = {"?": "?", "!": "!"}
+_TRAILING = " \t\r\n?!.。…\"'”’)）」』"
+
+
+def sentence_end(text):
+    """句末语气标记：问号 "?"、感叹号 "!"，其它为空字符串（全角标点先转半角）"""
+    text = unicodedata.normalize("NFKC", text).rstrip(" \t\r\n\"'”’)）」』")
+    return SENTENCE_ENDS.get(text[-1:], "")
+
+
+def tm_key(text):
+    """
+    翻译记忆的比较键：全角转半角、形近字母统一、转小写，去掉空白和标点，末尾加上句末语气标记
+    OCR 多出或漏掉的空格、标点不影响匹配；数字和问号 / 感叹号保持原样
+    """
+    text = unicodedata.normalize("NFKC", text)
+    body = text.rstrip(_TRAILING).translate(OCR_CONFUSABLES).lower()
+    return "".join(char for char in body if char.isalnum()) + sentence_end(text)
+
+
+def numbers(text):
+    """
+    原文中的每一段连续数字（包括与字母、汉字相连的：150G、Lv10、x3、获得150金币）
+    数字不同的句子不能互相替代
+    """
+    return _DIGITS_RE.findall(unicodedata.normalize("NFKC", text))
+
+
+def ngrams(key, q=3):
+    if len(key) <= q:
+        return {key}
+    return {key[i:i + q] for i in range(len(key) - q + 1)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein 距离；超过 limit 时返回 limit + 1（只计算对角线附近 limit 宽的带状区域）"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if _rapid_levenshtein is not None:
+        return _rapid_levenshtein.distance(a, b, score_cutoff=limit)
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        best = current[0]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            current[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+class TMIndex:
+    """
+    单个语言对的翻译记忆索引
+    n-gram 倒排索引筛选候选，再用编辑距离计算相似度；
+    只合并最少见的几个 n-gram 的倒排表，并按共有 n-gram 数过滤，常见 n-gram 的长倒排表不参与计算
+    """
+    def __init__(self, q=3):
+        self.q = q
+        self.keys = []
+        self.sources = []
+        self.targets = []
+        self.postings = {}  # n-gram -> array 条目序号
+        self.exact = {}  # key -> 条目序号
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, source, target):
+        entry = self.exact.get(key)
+        if entry is not None:
+            self.sources[entry] = source
+            self.targets[entry] = target
+            return
+        entry = len(self.keys)
+        self.keys.append(key)
+        self.sources.append(source)
+        self.targets.append(target)
+        self.exact[key] = entry
+        for gram in ngrams(key, self.q):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array("i")
+            posting.append(entry)
+
+    def search(self, key, threshold, max_candidates=16):
+        """
+        返回 (条目序号, 相似度) 列表，按相似度从高到低排序
+        相似度 = 1 - 编辑距离 / 较长字符串的长度
+        """
+        entry = self.exact.get(key)
+        if entry is not None:
+            return [(entry, 1.0)]
+
+        # 相似度不低于 threshold 时允许的最大编辑距离
+        limit = int((1 - threshold) * len(key) / threshold)
+        if limit == 0:
+            return []
+        postings = self.postings
+        grams = sorted(ngrams(key, self.q), key=lambda gram: len(postings.get(gram, ())))
+        # 一次编辑最多破坏 q 个 n-gram：取最少见的 k*q+m 个 n-gram，相似的条目至少包含其中 m 个
+        # m 越大筛选越严格，但要合并的倒排表越长；常见 n-gram 的长倒排表不参与计算
+        broken = limit * self.q
+        required = max(1, min(broken + 1, len(grams) - broken))
+        prefix = grams[:broken + required]
+        arrays = [np.frombuffer(postings[gram], dtype=np.int32) for gram in prefix if gram in postings]
+        if not arrays:
+            return []
+        counts = np.bincount(np.concatenate(arrays))
+        entries = np.flatnonzero(counts >= required)
+        # 共有 n-gram 多的条目先验证
+        entries = entries[np.argsort(-counts[entries], kind="stable")]
+
+        min_length, max_length = len(key) * threshold, len(key) / threshold
+        results = []
+        checked = 0
+        # 验证次数有上限，最坏情况下的查询时间有界
+        for entry in entries.tolist():
+            if checked >= max_candidates:
+                break
+            candidate = self.keys[entry]
+            if not min_length <= len(candidate) <= max_length:
+                continue
+            checked += 1
+            longest = max(len(key), len(candidate))
+            distance = edit_distance(key, candidate, int((1 - threshold) * longest))
+            score = 1 - distance / longest
+            if score >= threshold:
+                results.append((entry, score))
+        results.sort(key=lambda item: -item[1])
+        return results
+
+
+class TranslationMemory:
+    """
+    模糊匹配的翻译记忆
+    OCR 对同一句话的识别结果经常相差一两个字符（l/1、多余的标点、漏掉的空格），
+    精确匹配的翻译缓存无法命中；相似度达到阈值时直接返回已有译文，不再请求 API
+    """
+    def __init__(self, threshold=0.9, min_length=8, max_entries=200000):
+        """
+        threshold: 相似度阈值 (0-1)
+        min_length: 比较键短于该长度的文本不做模糊匹配（短句差一个字符意思可能完全不同）
+        max_entries: 每个语言对的最大条目数，超出时丢弃最早的四分之一并重建索引
+        """
+        self.threshold = threshold
+        self.min_length = min_length
+        self.max_entries = max_entries
+        self._indexes = {}  # (from_lang, to_lang) -> TMIndex
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.score_total = 0.0
+
+    def configure(self, tm_cfg):
+        self.threshold = tm_cfg.get("threshold", self.threshold)
+        self.min_length = tm_cfg.get("min_length", self.min_length)
+        self.max_entries = tm_cfg.get("max_entries", self.max_entries)
+
+    def add(self, from_lang, to_lang, source, target):
+        key = tm_key(source)
+        if len(key) < self.min_length:
+            return
+        with self._lock:
+            index = self._indexes.get((from_lang, to_lang))
+            if index is None:
+                index = self._indexes[(from_lang, to_lang)] = TMIndex()
+            index.add(key, source, target)
+            if len(index) > self.max_entries:
+                self._indexes[(from_lang, to_lang)] = self._rebuild(index, len(index) - self.max_entries * 3 // 4)
+
+    def _rebuild(self, index, drop):
+        logger.info(f"翻译记忆超过 {self.max_entries} 条，丢弃最早的 {drop} 条")
+        rebuilt = TMIndex(index.q)
+        for key, source, target in zip(index.keys[drop:], index.sources[drop:], index.targets[drop:]):
+            rebuilt.add(key, source, target)
+        return rebuilt
+
+    def lookup(self, from_lang, to_lang, text):
+        """
+        查询相似的原文，返回 (译文, 相似度, 匹配到的原文)，没有达到阈值的条目时返回 None
+        """
+        key = tm_key(text)
+        if len(key) < self.min_length:
+            return None
+        with self._lock:
+            index = self._indexes.get((from_lang, to_lang))
+            matches = index.search(key, self.threshold) if index is not None else []
+            text_numbers, text_end = numbers(text), sentence_end(text)
+            for entry, score in matches:
+                # 编辑距离允许的范围内也不能改变数字和句末语气
+                source = index.sources[entry]
+                if numbers(source) == text_numbers and sentence_end(source) == text_end:
+                    self.hits += 1
+                    self.score_total += score
+                    return index.targets[entry], score, index.sources[entry]
+            self.misses += 1
+            return None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": sum(len(index) for index in self._indexes.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_score": self.score_total / self.hits if self.hits else 0.0,
+        }
@@ -1,32 +1,137 @@
 # utils_translate.py
-import json
 import random
 import hashlib
-import sys
 import time
+import threading
 import hmac
+import re
 import base64
+import logging
 import urllib.parse
-from pathlib import Path
 
 import requests
-from utils.logger import logger
+from utils.logger import logger, log_event, log_text
+from utils.utils_config import ENGINE_REQUIRED_KEYS, config_path, config_service
+from utils.utils_cache import TranslationCache, normalize_text
+from utils.utils_http import http_pool
+from utils.utils_metrics import metrics
+from utils.utils_ratelimit import rate_limiter, SingleFlight
+from utils.utils_router import router
+from utils.utils_tm import TranslationMemory
+from utils.utils_glossary import Glossary, glossary_store
+
+
+# 翻译失败时返回文本的前缀，此类结果不会写入缓存
+TRANSLATE_ERROR_PREFIX = "[翻译错误]"
+# 接口限流（或本地排队超时）时返回的文本
+RATE_LIMITED_ERROR = f"{TRANSLATE_ERROR_PREFIX} 请求过于频繁"
+# 所有引擎都处于熔断状态时返回的文本
+ENGINE_UNAVAILABLE_ERROR = f"{TRANSLATE_ERROR_PREFIX} 翻译引擎暂不可用"
+# 等待其他调用方翻译相同片段超时（该请求卡住）时返回的文本
+COALESCE_TIMEOUT_ERROR = f"{TRANSLATE_ERROR_PREFIX} 等待翻译结果超时"
+# 接口返回限流错误后的重试次数
+RATE_LIMIT_RETRIES = 2
+
+# 各引擎接口地址（基准测试时替换为本地桩服务）
+ENGINE_ENDPOINTS = {
+    "baidu": "https://fanyi-api.baidu.com/api/trans/vip/translate",
+    "google": "https://translation.googleapis.com/language/translate/v2",
+    "youdao": "https://openapi.youdao.com/api",
+    "deepl": "https://api-free.deepl.com/v2/translate",
+    "papago": "https://openapi.naver.com/v1/papago/n2mt",
+}
+
+
+# 配置文件修改后自动重新加载（实时生效），未修改时直接返回已解析的配置
+def load_config():
+    return config_service.get()
 
 
-# 获取配置文件路径（源码运行 / 打包运行 均可）
-def get_config_path():
-    return (Path(sys.executable).parent if getattr(sys, "frozen", False)
-            else Path.cwd()) / "config" / "api_config.json"
+def is_translate_error(text):
+    return text.startswith(TRANSLATE_ERROR_PREFIX)
 
 
-config_path = get_config_path()
+_translation_cache = None
+_cache_failed = False
+_cache_lock = threading.Lock()
 
 
-# 每次调用重新读取 JSON（实时生效）
-def load_config():
-    return json.load(config_path.open("r", encoding="utf-8"))
+def get_translation_cache(config):
+    """
+    获取全局翻译缓存，首次调用时按配置创建
+    配置中 cache.enabled 为 false 时返回 None
+    """
+    global _translation_cache, _cache_failed
+    cache_cfg = config.get("cache", {})
+    if not cache_cfg.get("enabled", True) or _cache_failed:
+        return None
+    with _cache_lock:
+        if _translation_cache is None and not _cache_failed:
+            try:
+                _translation_cache = TranslationCache(
+                    config_path.parent.parent / cache_cfg.get("path", "cache/translate_cache.db"),
+                    memory_size=cache_cfg.get("memory_size", 2048),
+                    disk_size=cache_cfg.get("disk_size", 200000),
+                    ttl=cache_cfg.get("ttl_days", 30) * 24 * 3600
+                )
+            except Exception as e:
+                logger.error(f"翻译缓存初始化失败，将不使用缓存: {e}", exc_info=True)
+                _cache_failed = True
+    return _translation_cache
+
+
+_translation_memory = None
+_tm_lock = threading.Lock()
+
+
+def get_translation_memory(config):
+    """
+    获取全局翻译记忆，配置中 tm.enabled 为 false 时返回 None
+    首次创建时在后台线程中从磁盘翻译缓存预加载，加载完成前只包含新翻译的句子
+    """
+    global _translation_memory
+    tm_cfg = config.get("tm", {})
+    if not tm_cfg.get("enabled", True):
+        return None
+    with _tm_lock:
+        if _translation_memory is None:
+            _translation_memory = TranslationMemory()
+            _translation_memory.configure(tm_cfg)
+            cache = get_translation_cache(config)
+            if cache is not None:
+                threading.Thread(target=_preload_memory, args=(_translation_memory, cache),
+                                 name="tm-preload", daemon=True).start()
+        else:
+            _translation_memory.configure(tm_cfg)
+        return _translation_memory
+
+
+def _preload_memory(memory, cache):
+    start = time.perf_counter()
+    try:
+        entries = cache.entries(memory.max_entries)
+        for from_lang, to_lang, src, dst in entries:
+            memory.add(from_lang, to_lang, src, dst)
+    except Exception:
+        logger.error("翻译记忆预加载失败", exc_info=True)
+        return
+    logger.info(f"翻译记忆已加载 {len(entries)} 条 ({time.perf_counter() - start:.1f}s)")
+
+
+def get_glossary(config, from_lang, to_lang):
+    """
+    当前游戏的术语表（config/glossary/<game>.json 中该语言对的部分）
+    未启用或没有设置游戏时返回 None
+    """
+    glossary_cfg = config.get("glossary", {})
+    game = glossary_cfg.get("game")
+    if not glossary_cfg.get("enabled", True) or not game:
+        return None
+    path = config_path.parent.parent / glossary_cfg.get("dir", "config/glossary") / f"{game}.json"
+    return glossary_store.get(path, from_lang, to_lang)
 
 
+@metrics.timed("engine.baidu")
 def baidu_translate(text, from_lang="en", to_lang="zh", appid=None, secret=None):
     """
     调用百度翻译 API 翻译文本
@@ -39,8 +144,8 @@ def baidu_translate(text, from_lang="en", to_lang="zh", appid=None, secret=None)
     sign = hashlib.md5(f"{appid}{text}{salt}{secret}".encode()).hexdigest()
 
     try:
-        response = requests.get(
-            "https://fanyi-api.baidu.com/api/trans/vip/translate",
+        response = http_pool.session("baidu").get(
+            ENGINE_ENDPOINTS["baidu"],
             params={
                 'q': text,
                 'from': from_lang,
@@ -49,19 +154,24 @@ def baidu_translate(text, from_lang="en", to_lang="zh", appid=None, secret=None)
                 'salt': salt,
                 'sign': sign
             },
-            timeout=5,
+            timeout=http_pool.timeout,
             proxies={"http": None, "https": None}  # 解决 ProxyError
         )
 
         response.raise_for_status()
         data = response.json()
 
+        if data.get("error_code") == "54003":
+            logger.warning("百度翻译访问频率受限(54003)")
+            return RATE_LIMITED_ERROR
+
         if "trans_result" not in data:
             logger.error(f"翻译 API 返回格式异常: {data}")
             return "[翻译错误] API返回不完整"
 
-        dst = data["trans_result"][0]["dst"]
-        logger.info(f"翻译成功: {text} → {dst}")
+        # 文本含换行时百度按行返回多条结果
+        dst = "\n".join(item["dst"] for item in data["trans_result"])
+        log_event("translate.ok", engine="baidu", src=log_text(text), dst=log_text(dst))
         return dst
 
     except requests.exceptions.ProxyError as e:
@@ -81,13 +191,14 @@ def baidu_translate(text, from_lang="en", to_lang="zh", appid=None, secret=None)
         return f"[翻译错误] {e}"
 
 
+@metrics.timed("engine.google")
 def google_translate(text, from_lang="en", to_lang="zh", api_key=None):
     """
         调用 Google 翻译 API 翻译文本
         """
     try:
-        response = requests.post(
-            "https://translation.googleapis.com/language/translate/v2",
+        response = http_pool.session("google").post(
+            ENGINE_ENDPOINTS["google"],
             json={
                 "q": text,
                 "source": from_lang,
@@ -95,7 +206,7 @@ def google_translate(text, from_lang="en", to_lang="zh", api_key=None):
                 "format": "text",
                 "key": api_key
             },
-            timeout=5,
+            timeout=http_pool.timeout,
             proxies={"http": None, "https": None}
         )
 
@@ -107,7 +218,7 @@ def google_translate(text, from_lang="en", to_lang="zh", api_key=None):
             return "[翻译错误] API返回不完整"
 
         dst = data["data"]["translations"][0]["translatedText"]
-        logger.info(f"谷歌翻译成功: {text} → {dst}")
+        log_event("translate.ok", engine="google", src=log_text(text), dst=log_text(dst))
         return dst
 
     except requests.exceptions.ProxyError as e:
@@ -127,6 +238,7 @@ def google_translate(text, from_lang="en", to_lang="zh", api_key=None):
         return f"[翻译错误] {e}"
 
 
+@metrics.timed("engine.youdao")
 def youdao_translate(text, from_lang="en", to_lang="zh", app_key=None, app_secret=None):
     """
         调用有道翻译 API 翻译文本
@@ -136,8 +248,8 @@ def youdao_translate(text, from_lang="en", to_lang="zh", app_key=None, app_secre
     sign = hashlib.md5(sign_str.encode()).hexdigest()
 
     try:
-        response = requests.get(
-            "https://openapi.youdao.com/api",
+        response = http_pool.session("youdao").get(
+            ENGINE_ENDPOINTS["youdao"],
             params={
                 "q": text,
                 "from": from_lang,
@@ -146,7 +258,7 @@ def youdao_translate(text, from_lang="en", to_lang="zh", app_key=None, app_secre
                 "salt": salt,
                 "sign": sign
             },
-            timeout=5,
+            timeout=http_pool.timeout,
             proxies={"http": None, "https": None}
         )
 
@@ -158,7 +270,7 @@ def youdao_translate(text, from_lang="en", to_lang="zh", app_key=None, app_secre
             return "[翻译错误] API返回不完整"
 
         dst = data["translation"][0]
-        logger.info(f"有道翻译成功: {text} → {dst}")
+        log_event("translate.ok", engine="youdao", src=log_text(text), dst=log_text(dst))
         return dst
 
     except requests.exceptions.ProxyError as e:
@@ -178,6 +290,7 @@ def youdao_translate(text, from_lang="en", to_lang="zh", app_key=None, app_secre
         return f"[翻译错误] {e}"
 
 
+@metrics.timed("engine.tencent")
 def tencent_translate(text, from_lang="en", to_lang="zh", secret_id=None, secret_key=None):
     endpoint = "tmt.tencentcloudapi.com"
     service = "tmt"
@@ -208,7 +321,7 @@ def tencent_translate(text, from_lang="en", to_lang="zh", secret_id=None, secret
     params["Signature"] = signature
 
     try:
-        r = requests.get(f"https://{endpoint}/", params=params, timeout=5)
+        r = http_pool.session("tencent").get(f"https://{endpoint}/", params=params, timeout=http_pool.timeout)
         r.raise_for_status()
         data = r.json()
         return data.get("Response", {}).get("TargetText", "[翻译错误] API返回不完整")
@@ -217,13 +330,14 @@ def tencent_translate(text, from_lang="en", to_lang="zh", secret_id=None, secret
         return f"[翻译错误] {e}"
 
 
+@metrics.timed("engine.deepl")
 def deepl_translate(text, from_lang="EN", to_lang="ZH", api_key=None):
     try:
-        r = requests.post(
-            "https://api-free.deepl.com/v2/translate",
+        r = http_pool.session("deepl").post(
+            ENGINE_ENDPOINTS["deepl"],
             data={"text": text, "source_lang": from_lang, "target_lang": to_lang},
             headers={"Authorization": f"DeepL-Auth-Key {api_key}"},
-            timeout=5
+            timeout=http_pool.timeout
         )
         r.raise_for_status()
         data = r.json()
@@ -233,17 +347,18 @@ def deepl_translate(text, from_lang="EN", to_lang="ZH", api_key=None):
         return f"[翻译错误] {e}"
 
 
+@metrics.timed("engine.papago")
 def papago_translate(text, from_lang="en", to_lang="ko", client_id=None, client_secret=None):
     try:
         headers = {
             "X-Naver-Client-Id": client_id,
             "X-Naver-Client-Secret": client_secret
         }
-        r = requests.post(
-            "https://openapi.naver.com/v1/papago/n2mt",
+        r = http_pool.session("papago").post(
+            ENGINE_ENDPOINTS["papago"],
             data={"source": from_lang, "target": to_lang, "text": text},
             headers=headers,
-            timeout=5
+            timeout=http_pool.timeout
         )
         r.raise_for_status()
         return r.json()["message"]["result"]["translatedText"]
@@ -252,13 +367,520 @@ def papago_translate(text, from_lang="en", to_lang="ko", client_id=None, client_
         return f"[翻译错误] {e}"
 
 
+# -------------------- 批量翻译 --------------------
+# 句子结束符：中文标点后直接断句，英文句号/问号/感叹号后需跟空白（避免拆开 3.14、v1.2）
+SEGMENT_PATTERN = re.compile(r'(?<=[。！？；…])|(?<=[.!?;])\s+')
+
+
+# 行尾为这些字符时，下一行是同一句被 OCR 折行后的后半部分
+CONTINUATION_ENDS = ",，、"
+
+
+def _continues(line, next_line):
+    """next_line 是否接着 line 的句子（行尾是逗号，或下一行以小写字母开头）"""
+    return line[-1] in CONTINUATION_ENDS or next_line[0].islower()
+
+
+def split_segments(text):
+    """
+    将 OCR 文本按句拆分为翻译片段
+    没有句末标点的行（菜单、界面标签、物品列表）各自为一段，只改动一行时只请求这一行；
+    被 OCR 折成多行的句子先合并为一行再断句：百度批量接口按换行拆分结果，片段内的换行会让返回条数对不上
+    """
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        if lines and _continues(lines[-1], line):
+            # 中文折行直接拼接，英文以空格拼接
+            lines[-1] += ("" if ord(lines[-1][-1]) > 0x2E7F else " ") + line
+        else:
+            lines.append(line)
+    return [seg.strip() for line in lines for seg in SEGMENT_PATTERN.split(line) if seg and seg.strip()]
+
+
+# 批量接口拆分为请求构造和响应解析两部分，同步（requests）和异步（aiohttp）调用共用
+def baidu_batch_request(texts, from_lang="en", to_lang="zh", appid=None, secret=None):
+    """
+    百度翻译批量接口：多段文本以换行拼接为一个 q，trans_result 按行返回
+    """
+    query = "\n".join(texts)
+    salt = random.randint(32768, 65536)
+    sign = hashlib.md5(f"{appid}{query}{salt}{secret}".encode()).hexdigest()
+    return "POST", ENGINE_ENDPOINTS["baidu"], {
+        "data": {
+            'q': query,
+            'from': from_lang,
+            'to': to_lang,
+            'appid': appid,
+            'salt': salt,
+            'sign': sign
+        }
+    }
+
+
+def google_batch_request(texts, from_lang="en", to_lang="zh", api_key=None):
+    """
+    谷歌翻译批量接口：q 传列表，translations 按顺序返回
+    """
+    return "POST", ENGINE_ENDPOINTS["google"], {
+        "json": {
+            "q": list(texts),
+            "source": from_lang,
+            "target": to_lang,
+            "format": "text",
+            "key": api_key
+        }
+    }
+
+
+def deepl_batch_request(texts, from_lang="EN", to_lang="ZH", api_key=None):
+    """
+    DeepL 批量接口：重复的 text 参数，translations 按顺序返回
+    """
+    return "POST", ENGINE_ENDPOINTS["deepl"], {
+        "data": [("text", t) for t in texts] + [("source_lang", from_lang), ("target_lang", to_lang)],
+        "headers": {"Authorization": f"DeepL-Auth-Key {api_key}"}
+    }
+
+
+def build_batch_request(config, engine, texts, from_lang="en", to_lang="zh"):
+    """
+    返回 (method, url, kwargs)，引擎没有批量接口时返回 None
+    """
+    if engine == "baidu":
+        baidu_cfg = config["baidu_translate"]
+        return baidu_batch_request(texts, from_lang, to_lang, baidu_cfg["appid"], baidu_cfg["secret"])
+    elif engine == "google":
+        google_cfg = config["google_translate"]
+        return google_batch_request(texts, from_lang, to_lang, google_cfg["api_key"])
+    elif engine == "deepl":
+        deepl_cfg = config["deepl_translate"]
+        return deepl_batch_request(texts, from_lang, to_lang, deepl_cfg["api_key"])
+    return None
+
+
+def parse_batch_response(engine, data, texts):
+    """
+    解析批量接口返回的 JSON，返回与 texts 顺序一致的译文列表；格式异常时返回 None
+    """
+    if engine == "baidu":
+        if data.get("error_code") == "54003":
+            logger.warning("百度批量翻译访问频率受限(54003)")
+            return [RATE_LIMITED_ERROR] * len(texts)
+        results = [item["dst"] for item in data.get("trans_result") or []]
+    elif engine == "google":
+        results = [item["translatedText"] for item in data.get("data", {}).get("translations") or []]
+    elif engine == "deepl":
+        results = [item["text"] for item in data.get("translations") or []]
+    else:
+        return None
+    if len(results) != len(texts):
+        logger.error(f"{engine} 批量翻译返回格式异常: {data}")
+        return None
+    return results
+
+
+def request_batch(engine, texts, request):
+    """
+    同步发送批量请求，失败时每段都返回错误文本
+    request: build_batch_request 的返回值
+    """
+    method, url, kwargs = request
+    try:
+        response = http_pool.session(engine).request(
+            method, url,
+            timeout=http_pool.timeout,
+            proxies={"http": None, "https": None},
+            **kwargs
+        )
+        response.raise_for_status()
+        results = parse_batch_response(engine, response.json(), texts)
+        if results is None:
+            return ["[翻译错误] API返回不完整"] * len(texts)
+        log_event("translate.batch_ok", engine=engine, segments=len(texts))
+        return results
+
+    except requests.exceptions.Timeout as e:
+        logger.error(f"{engine} 批量翻译超时: {e}", exc_info=True)
+        return ["[翻译错误] 请求超时"] * len(texts)
+
+    except Exception as e:
+        logger.error(f"{engine} 批量翻译错误: {e}", exc_info=True)
+        return [f"[翻译错误] {e}"] * len(texts)
+
+
+@metrics.timed("engine.baidu")
+def baidu_translate_batch(texts, from_lang="en", to_lang="zh", appid=None, secret=None):
+    return request_batch("baidu", texts, baidu_batch_request(texts, from_lang, to_lang, appid, secret))
+
+
+@metrics.timed("engine.google")
+def google_translate_batch(texts, from_lang="en", to_lang="zh", api_key=None):
+    return request_batch("google", texts, google_batch_request(texts, from_lang, to_lang, api_key))
+
+
+@metrics.timed("engine.deepl")
+def deepl_translate_batch(texts, from_lang="EN", to_lang="ZH", api_key=None):
+    return request_batch("deepl", texts, deepl_batch_request(texts, from_lang, to_lang, api_key))
+
+
+# -------------------- 限流与请求合并 --------------------
+_inflight = SingleFlight()
+
+
+def coalesce_timeout(config):
+    """
+    等待其他调用方翻译相同片段的最长时间(秒)：
+    限流排队上限 + 每个候选引擎每次尝试的连接和读取超时
+    """
+    http_cfg = config.get("http", {})
+    per_request = http_cfg.get("connect_timeout", 3) + http_cfg.get("read_timeout", 5)
+    engines = 1 + len(config.get("router", {}).get("fallbacks", []))
+    max_wait = config.get("rate_limit", {}).get("max_wait", 10)
+    return max_wait + per_request * engines * (RATE_LIMIT_RETRIES + 1)
+
+
+def abandon_segment(engine, from_lang, to_lang, seg, future):
+    """等待相同片段的结果超时：放弃卡住的请求（之后重新请求），本次返回错误文本"""
+    logger.warning(f"等待相同片段的翻译结果超时: {log_text(seg)}")
+    metrics.inc("translate.coalesce_timeout")
+    _inflight.abandon((engine, from_lang, to_lang, normalize_text(seg)), future)
+    return COALESCE_TIMEOUT_ERROR
+
+
+def is_rate_limited(result):
+    if isinstance(result, list):
+        return RATE_LIMITED_ERROR in result
+    return result == RATE_LIMITED_ERROR
+
+
+def call_rate_limited(engine, func, *args):
+    """
+    按引擎令牌桶排队后调用 func
+    接口返回限流错误时暂停该引擎并重试；排队超过 rate_limit.max_wait 时放弃，返回 None
+    """
+    result = None
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        if not rate_limiter.acquire(engine):
+            logger.warning(f"{engine} 请求排队超时，放弃本次翻译")
+            metrics.inc(f"engine.{engine}.throttled")
+            return None
+        result = func(*args)
+        if not is_rate_limited(result):
+            return result
+        metrics.inc(f"engine.{engine}.rate_limited")
+        rate_limiter.penalize(engine)
+    return result
+
+
+BATCH_ENGINES = ("baidu", "google", "deepl")
+
+
+def translate_batch_with_engine(config, engine, texts, from_lang="en", to_lang="zh"):
+    """
+    一次请求翻译多段文本（不经过缓存），返回与 texts 顺序一致的列表
+    不支持批量的引擎逐段调用
+    """
+    if len(texts) == 1:
+        return [translate_with_engine(config, engine, texts[0], from_lang, to_lang)]
+    if engine not in BATCH_ENGINES:
+        return [translate_with_engine(config, engine, t, from_lang, to_lang) for t in texts]
+    results = call_rate_limited(engine, _request_batch, config, engine, texts, from_lang, to_lang)
+    return results if results is not None else [RATE_LIMITED_ERROR] * len(texts)
+
+
+def _request_batch(config, engine, texts, from_lang, to_lang):
+    if engine == "baidu":
+        baidu_cfg = config["baidu_translate"]
+        return baidu_translate_batch(texts, from_lang, to_lang, baidu_cfg["appid"], baidu_cfg["secret"])
+    elif engine == "google":
+        google_cfg = config["google_translate"]
+        return google_translate_batch(texts, from_lang, to_lang, google_cfg["api_key"])
+    elif engine == "deepl":
+        deepl_cfg = config["deepl_translate"]
+        return deepl_translate_batch(texts, from_lang, to_lang, deepl_cfg["api_key"])
+
+
+# -------------------- 引擎路由 --------------------
+def _engine_configured(config, engine):
+    if engine not in ENGINE_REQUIRED_KEYS:
+        return False
+    section, keys = ENGINE_REQUIRED_KEYS[engine]
+    engine_cfg = config.get(section)
+    return isinstance(engine_cfg, dict) and all(engine_cfg.get(key) for key in keys)
+
+
+def routed_engines(config, engine):
+    """主引擎 + 已配置凭据的备用引擎"""
+    router.configure(config.get("router", {}))
+    return [engine] + [e for e in router.fallbacks if e != engine and _engine_configured(config, e)]
+
+
+def batch_failed(results):
+    """
+    True: 引擎调用失败；False: 成功
+    None: 本地令牌桶排队超时（请求没有发出），不算引擎失败，不应触发熔断
+    """
+    if results is None:
+        return True
+    if all(result == RATE_LIMITED_ERROR for result in results):
+        return None
+    return all(is_translate_error(result) for result in results)
+
+
+def translate_routed(config, engine, texts, from_lang="en", to_lang="zh"):
+    """
+    经引擎路由批量翻译（不经过缓存），返回 (实际使用的引擎, 结果列表)
+    主引擎失败或熔断时依次尝试 router.fallbacks 中已配置凭据的备用引擎
+    """
+    engines = routed_engines(config, engine)
+    used, results = router.route(
+        engines,
+        lambda candidate: translate_batch_with_engine(config, candidate, texts, from_lang, to_lang),
+        batch_failed
+    )
+    if used is None:
+        logger.warning("所有翻译引擎均处于熔断状态")
+        return engine, [ENGINE_UNAVAILABLE_ERROR] * len(texts)
+    if results is None:
+        return used, [f"{TRANSLATE_ERROR_PREFIX} 翻译引擎调用异常"] * len(texts)
+    if used != engine:
+        logger.info(f"由备用引擎 {used} 完成翻译: {len(texts)} 段")
+    return used, results
+
+
 def translate(text, from_lang="en", to_lang="zh"):
     """
     统一翻译接口
     engine: "baidu", "google", "youdao", "tencent", "deepl", "papago"
+    先查询翻译缓存，未命中时才调用远程 API
+    """
+    return translate_segments([text], from_lang, to_lang)[0]
+
+
+def translate_segments(segments, from_lang="en", to_lang="zh", on_result=None, chunk_size=0):
+    """
+    批量翻译多个片段
+    重复片段只翻译一次，缓存命中的片段不再请求，
+    其他线程正在翻译的相同片段等待其结果，
+    其余片段合并为一次批量请求，结果按原顺序返回
+    安装了 aiohttp 且 async.enabled 时在异步引擎层的事件循环上执行
+    on_result: on_result(序号, 译文)，每个片段的译文一到就回调（逐段显示用），缓存命中的片段最先回调
+    chunk_size: 大于 0 时需要请求的片段每 chunk_size 个一组并发请求，先返回的组先回调（仅异步引擎层，
+        限流的引擎分组数不超过其突发数）
     """
     config = load_config()
     engine = config.get("engine").lower()
+    http_pool.configure(config.get("http", {}))
+    rate_limiter.configure(config.get("rate_limit", {}))
+
+    from utils import utils_translate_async
+    if utils_translate_async.async_enabled(config):
+        return utils_translate_async.engine_loop.run(
+            utils_translate_async.translate_segments_async(segments, from_lang, to_lang, on_result, chunk_size))
+
+    emit = SegmentEmitter(segments, on_result)
+    translated, pending, waiting = begin_segments(config, engine, segments, from_lang, to_lang)
+    emit(translated)
+    if pending:
+        # 认领的片段无论成功失败都必须 resolve，否则等待相同片段的调用方会一直阻塞
+        try:
+            texts, mappings = protect_segments(config, pending, from_lang, to_lang)
+            used, results = translate_routed(config, engine, texts, from_lang, to_lang)
+            results = restore_segments(results, mappings)
+            finish_segments(config, used, from_lang, to_lang, pending, results, translated)
+        except BaseException as e:
+            abort_segments(pending, e)
+            raise
+        emit(translated)
+
+    deadline = time.monotonic() + coalesce_timeout(config)
+    for seg, future in waiting:
+        try:
+            result = future.result(max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            result = abandon_segment(engine, from_lang, to_lang, seg, future)
+        translated[normalize_text(seg)] = result
+        emit(translated)
+    return [translated[normalize_text(seg)] for seg in segments]
+
+
+class SegmentEmitter:
+    """
+    逐段回调：每次有新的译文时调用，把已有译文但还没回调过的片段按序号交给 on_result
+    重复的片段（归一化后相同）各自回调一次
+    """
+    def __init__(self, segments, on_result):
+        self.on_result = on_result
+        self._indexes = {}
+        if on_result is not None:
+            for index, seg in enumerate(segments):
+                self._indexes.setdefault(normalize_text(seg), []).append(index)
+
+    def __call__(self, translated):
+        if not self._indexes:
+            return
+        for key in [key for key in self._indexes if key in translated]:
+            for index in self._indexes.pop(key):
+                self.on_result(index, translated[key])
+
+
+def chunk_segments(pending, chunk_size, max_chunks=None):
+    """
+    把需要请求的片段按 chunk_size 分组（0 为不分组）
+    max_chunks: 分组数上限（限流引擎的突发数），超出时加大每组的片段数，不让分组在限流队列中排队
+    """
+    if chunk_size > 0 and max_chunks:
+        chunk_size = max(chunk_size, -(-len(pending) // max_chunks))
+    if chunk_size <= 0 or len(pending) <= chunk_size:
+        return [pending]
+    return [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+
+def begin_segments(config, engine, segments, from_lang, to_lang):
+    """
+    去重并查询缓存，再认领未命中的片段
+    返回 (translated, pending, waiting)：
+      translated: 归一化文本 -> 已有译文
+      pending: [(片段, flight_key)] 需要由调用方请求，完成后必须调用 finish_segments / abort_segments
+      waiting: [(片段, Future)] 正在被其他调用方翻译，等待其结果即可
+    """
+    cache = get_translation_cache(config)
+
+    # 去重（按归一化文本），保持首次出现的顺序
+    unique = {}
+    for seg in segments:
+        unique.setdefault(normalize_text(seg), seg)
+
+    # 完全由术语组成的片段（物品名、界面标签）直接由术语表给出译文
+    glossary = get_glossary(config, from_lang, to_lang)
+    translated = {}
+    misses = []
+    local = 0
+    for key, seg in unique.items():
+        if glossary is not None:
+            result = glossary.translate_full(seg)
+            if result is not None:
+                translated[key] = result
+                local += 1
+                continue
+        cached = cache.get(engine, from_lang, to_lang, seg) if cache is not None else None
+        if cached is not None:
+            translated[key] = cached
+        else:
+            misses.append(seg)
+
+    if local:
+        metrics.inc("glossary.hit", local)
+    metrics.inc("cache.hit", len(unique) - len(misses) - local)
+    metrics.inc("cache.miss", len(misses))
+
+    # 精确缓存未命中时查询翻译记忆（OCR 误差导致的近似句子）
+    memory = get_translation_memory(config)
+    if memory is not None and misses:
+        remaining = []
+        for seg in misses:
+            match = memory.lookup(from_lang, to_lang, seg)
+            if match is None:
+                remaining.append(seg)
+                continue
+            dst, score, source = match
+            translated[normalize_text(seg)] = dst
+            log_event("tm.hit", score=score, src=log_text(seg), match=log_text(source))
+        metrics.inc("tm.hit", len(misses) - len(remaining))
+        metrics.inc("tm.miss", len(remaining))
+        misses = remaining
+    # 相同片段正在被其他调用方翻译时等待其结果，不重复请求
+    pending, waiting = [], []
+    for seg in misses:
+        flight_key = (engine, from_lang, to_lang, normalize_text(seg))
+        future, leader = _inflight.claim(flight_key)
+        if leader:
+            pending.append((seg, flight_key))
+        else:
+            waiting.append((seg, future))
+    if waiting:
+        metrics.inc("translate.coalesced", len(waiting))
+    if pending:
+        log_event("translate.segments", total=len(segments), unique=len(unique), requested=len(pending))
+    return translated, pending, waiting
+
+
+def protect_segments(config, pending, from_lang, to_lang):
+    """
+    把片段中的术语替换为占位符，引擎只翻译术语以外的部分
+    返回 (送往引擎的文本, 各片段的占位符映射)，映射交给 restore_segments
+    """
+    segments = [seg for seg, _ in pending]
+    glossary = get_glossary(config, from_lang, to_lang)
+    if glossary is None:
+        return segments, [None] * len(segments)
+    protected = [glossary.protect(seg) for seg in segments]
+    return [text for text, _ in protected], [mapping for _, mapping in protected]
+
+
+def restore_segments(results, mappings):
+    """把译文中的占位符换回术语译文；引擎丢掉了占位符时记录日志"""
+    restored = []
+    for result, mapping in zip(results, mappings):
+        if mapping and not is_translate_error(result):
+            result, lost = Glossary.restore(result, mapping)
+            if lost:
+                metrics.inc("glossary.lost", lost)
+                log_event("glossary.lost", level=logging.WARNING, lost=lost, dst=log_text(result))
+        restored.append(result)
+    return restored
+
+
+def finish_segments(config, engine, from_lang, to_lang, pending, results, translated):
+    """
+    写入缓存和翻译记忆（错误结果除外），并把结果交给等待相同片段的调用方
+    engine 为实际完成翻译的引擎：备用引擎的译文缓存在备用引擎名下，不会当作主引擎的缓存命中
+    """
+    cache = get_translation_cache(config)
+    memory = get_translation_memory(config)
+    errors = 0
+    for (seg, flight_key), result in zip(pending, results):
+        translated[normalize_text(seg)] = result
+        if is_translate_error(result):
+            errors += 1
+        else:
+            if cache is not None:
+                cache.put(engine, from_lang, to_lang, seg, result)
+            if memory is not None:
+                memory.add(from_lang, to_lang, seg, result)
+        _inflight.resolve(flight_key, result)
+    if errors:
+        metrics.inc(f"engine.{engine}.error", errors)
+
+
+def abort_segments(pending, error):
+    for _, flight_key in pending:
+        _inflight.resolve(flight_key, error=error)
+
+
+def translate_text(text, from_lang="en", to_lang="zh"):
+    """
+    按句拆分 OCR 文本后批量翻译，译文按原顺序逐行拼接
+    对话框只变化一部分时，只有变化的句子会请求 API
+    """
+    segments = split_segments(text)
+    if not segments:
+        return translate(text, from_lang, to_lang)
+    return '\n'.join(translate_segments(segments, from_lang, to_lang))
+
+
+def translate_with_engine(config, engine, text, from_lang="en", to_lang="zh"):
+    """
+    直接调用指定引擎翻译（不经过缓存，经过限流）
+    """
+    result = call_rate_limited(engine, _request_single, config, engine, text, from_lang, to_lang)
+    return result if result is not None else RATE_LIMITED_ERROR
+
+
+def _request_single(config, engine, text, from_lang, to_lang):
     if engine == "baidu":
         baidu_cfg = config["baidu_translate"]
         return baidu_translate(text, from_lang, to_lang, baidu_cfg["appid"], baidu_cfg["secret"])
@@ -0,0 +1,300 @@
+# utils_translate_async.py
+import asyncio
+import threading
+import time
+from utils.logger import logger, log_event
+from utils.utils_cache import normalize_text
+from utils.utils_http import http_pool
+from utils.utils_metrics import metrics
+from utils.utils_ratelimit import rate_limiter
+from utils.utils_router import router
+from utils import utils_translate as translate_sync
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+def async_enabled(config):
+    """安装了 aiohttp 且 async.enabled 不为 false 时使用异步引擎层"""
+    return aiohttp is not None and config.get("async", {}).get("enabled", True)
+
+
+class AsyncEngineLoop:
+    """
+    异步翻译引擎层的事件循环
+    在一个后台线程上运行，所有异步翻译共用；每个引擎一个 aiohttp 会话（共享连接池），
+    任意线程都可以通过 submit / run 提交协程
+    """
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._sessions = {}  # engine -> (pool_size, ClientSession)，只在事件循环线程中访问
+        self._lock = threading.Lock()
+
+    def loop(self):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name="translate-loop", daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+                    logger.info("异步翻译事件循环已启动")
+        return self._loop
+
+    def submit(self, coro):
+        """返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop())
+
+    def run(self, coro, timeout=None):
+        """在事件循环上执行协程并阻塞等待结果（不能在事件循环线程中调用）"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("不能在异步翻译事件循环线程中同步等待")
+        return self.submit(coro).result(timeout)
+
+    def session(self, engine):
+        """获取引擎的 aiohttp 会话，连接池大小变化时重建（只能在事件循环线程中调用）"""
+        entry = self._sessions.get(engine)
+        if entry is not None and entry[0] == http_pool.pool_size and not entry[1].closed:
+            return entry[1]
+        if entry is not None:
+            asyncio.ensure_future(entry[1].close())
+        connect_timeout, read_timeout = http_pool.timeout
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=http_pool.pool_size),
+            timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        )
+        self._sessions[engine] = (http_pool.pool_size, session)
+        return session
+
+    async def _close_sessions(self):
+        for _, session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+    def close(self):
+        if self._loop is None:
+            return
+        self.run(self._close_sessions())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2)
+        self._loop.close()
+        self._loop = self._thread = None
+
+
+engine_loop = AsyncEngineLoop()
+
+
+# -------------------- 引擎请求 --------------------
+async def _request_batch(engine, texts, request):
+    """异步发送批量请求，失败时每段都返回错误文本"""
+    method, url, kwargs = request
+    start = time.perf_counter()
+    try:
+        async with engine_loop.session(engine).request(method, url, **kwargs) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+        results = translate_sync.parse_batch_response(engine, data, texts)
+        if results is None:
+            results = ["[翻译错误] API返回不完整"] * len(texts)
+        else:
+            log_event("translate.batch_ok", engine=engine, segments=len(texts), mode="async")
+    except asyncio.TimeoutError as e:
+        logger.error(f"{engine} 异步批量翻译超时: {e}")
+        results = ["[翻译错误] 请求超时"] * len(texts)
+    except Exception as e:
+        logger.error(f"{engine} 异步批量翻译错误: {e}", exc_info=True)
+        results = [f"[翻译错误] {e}"] * len(texts)
+    metrics.observe(f"engine.{engine}", (time.perf_counter() - start) * 1000)
+    return results
+
+
+async def translate_batch_async(config, engine, texts, from_lang="en", to_lang="zh"):
+    """
+    异步批量翻译（经过限流，不经过缓存），返回与 texts 顺序一致的列表
+    没有批量接口的引擎在线程池中调用同步接口
+    """
+    if translate_sync.build_batch_request(config, engine, texts, from_lang, to_lang) is None:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, translate_sync.translate_batch_with_engine, config, engine, texts, from_lang, to_lang)
+
+    results = None
+    for attempt in range(translate_sync.RATE_LIMIT_RETRIES + 1):
+        wait = rate_limiter.reserve(engine)
+        if wait is None:
+            logger.warning(f"{engine} 请求排队超时，放弃本次翻译")
+            metrics.inc(f"engine.{engine}.throttled")
+            return [translate_sync.RATE_LIMITED_ERROR] * len(texts)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        # 每次重试重新签名（百度的 salt/sign）
+        request = translate_sync.build_batch_request(config, engine, texts, from_lang, to_lang)
+        results = await _request_batch(engine, texts, request)
+        if not translate_sync.is_rate_limited(results):
+            return results
+        metrics.inc(f"engine.{engine}.rate_limited")
+        rate_limiter.penalize(engine)
+    return results
+
+
+# -------------------- 引擎路由 --------------------
+async def _routed_call(engine, config, texts, from_lang, to_lang):
+    if not router.begin(engine):
+        return engine, None, False
+    start = time.perf_counter()
+    try:
+        results = await translate_batch_async(config, engine, texts, from_lang, to_lang)
+        verdict = translate_sync.batch_failed(results)
+    except Exception as e:
+        logger.error(f"翻译引擎 {engine} 调用异常: {e}", exc_info=True)
+        results, verdict = None, True
+    if verdict is None:
+        router.release(engine)
+        return engine, results, False
+    router.record(engine, (time.perf_counter() - start) * 1000, not verdict)
+    return engine, results, not verdict
+
+
+async def _hedged(primary, backup, config, texts, from_lang, to_lang):
+    pending = {asyncio.ensure_future(_routed_call(primary, config, texts, from_lang, to_lang))}
+    done, pending = await asyncio.wait(pending, timeout=router.hedge_delay(primary))
+    backup_sent = False
+    last = None
+    while True:
+        for task in done:
+            last = task.result()
+            if last[2]:
+                if last[0] == backup:
+                    metrics.inc("router.hedge_won")
+                return last
+        if not backup_sent:
+            if not done:
+                logger.info(f"{primary} 超过 p95 延迟未返回，向 {backup} 发送对冲请求")
+                metrics.inc("router.hedged")
+            pending.add(asyncio.ensure_future(_routed_call(backup, config, texts, from_lang, to_lang)))
+            backup_sent = True
+        if not pending:
+            return last
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+
+async def translate_routed_async(config, engine, texts, from_lang="en", to_lang="zh"):
+    """translate_routed 的异步版本：熔断、备用引擎切换和对冲请求，返回 (实际使用的引擎, 结果列表)"""
+    order = router.candidates(translate_sync.routed_engines(config, engine))
+    if not order:
+        logger.warning("所有翻译引擎均处于熔断状态")
+        return engine, [translate_sync.ENGINE_UNAVAILABLE_ERROR] * len(texts)
+
+    used = results = None
+    if router.hedge and len(order) > 1:
+        used, results, ok = await _hedged(order[0], order[1], config, texts, from_lang, to_lang)
+        order = [] if ok else order[2:]
+    else:
+        ok = False
+
+    for index, candidate in enumerate(order):
+        if index > 0:
+            logger.warning(f"切换到备用翻译引擎: {candidate}")
+            metrics.inc("router.failover")
+        used, results, ok = await _routed_call(candidate, config, texts, from_lang, to_lang)
+        if ok:
+            break
+
+    if results is None:
+        return used or engine, [f"{translate_sync.TRANSLATE_ERROR_PREFIX} 翻译引擎调用异常"] * len(texts)
+    if ok and used != engine:
+        logger.info(f"由备用引擎 {used} 完成翻译: {len(texts)} 段")
+    return used, results
+
+
+# -------------------- 异步翻译接口 --------------------
+async def _begin_segments(config, engine, segments, from_lang, to_lang):
+    """在线程池中查询缓存(SQLite)和翻译记忆，不阻塞事件循环；等待期间被取消时释放已认领的片段"""
+    future = asyncio.get_running_loop().run_in_executor(
+        None, translate_sync.begin_segments, config, engine, segments, from_lang, to_lang)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        future.add_done_callback(_abort_claimed)
+        raise
+
+
+def _abort_claimed(future):
+    if not future.cancelled() and future.exception() is None:
+        translate_sync.abort_segments(future.result()[1], asyncio.CancelledError())
+
+
+async def _request_segments(config, engine, pending, from_lang, to_lang, translated):
+    # 认领的片段无论成功失败都必须 resolve，否则等待相同片段的调用方会一直阻塞
+    try:
+        texts, mappings = translate_sync.protect_segments(config, pending, from_lang, to_lang)
+        used, results = await translate_routed_async(config, engine, texts, from_lang, to_lang)
+        results = translate_sync.restore_segments(results, mappings)
+        # 写缓存(SQLite)和翻译记忆在线程池中进行，不阻塞事件循环上的其它请求
+        await asyncio.get_running_loop().run_in_executor(
+            None, translate_sync.finish_segments, config, used, from_lang, to_lang, pending, results, translated)
+    except BaseException as e:
+        translate_sync.abort_segments(pending, e)
+        raise
+
+
+async def translate_segments_async(segments, from_lang="en", to_lang="zh", on_result=None, chunk_size=0):
+    """
+    translate_segments 的异步版本（缓存、去重、请求合并与同步接口共用）
+    on_result / chunk_size 见 translate_segments：分组后各组并发请求，每组返回时回调该组的译文
+    """
+    config = translate_sync.load_config()
+    engine = config.get("engine").lower()
+    http_pool.configure(config.get("http", {}))
+    rate_limiter.configure(config.get("rate_limit", {}))
+
+    emit = translate_sync.SegmentEmitter(segments, on_result)
+    translated, pending, waiting = await _begin_segments(config, engine, segments, from_lang, to_lang)
+    emit(translated)
+
+    async def request(chunk):
+        await _request_segments(config, engine, chunk, from_lang, to_lang, translated)
+        emit(translated)
+
+    if pending:
+        chunk_size = chunk_size if on_result is not None else 0
+        chunks = translate_sync.chunk_segments(pending, chunk_size, rate_limiter.burst(engine))
+        if len(chunks) == 1:
+            await request(chunks[0])
+        else:
+            await asyncio.gather(*(request(chunk) for chunk in chunks))
+
+    deadline = time.monotonic() + translate_sync.coalesce_timeout(config)
+    for seg, future in waiting:
+        try:
+            # shield: 超时只放弃等待，不能取消其他调用方共用的 Future
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                            max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            result = translate_sync.abandon_segment(engine, from_lang, to_lang, seg, future)
+        translated[normalize_text(seg)] = result
+        emit(translated)
+    return [translated[normalize_text(seg)] for seg in segments]
+
+
+async def translate_text_async(text, from_lang="en", to_lang="zh"):
+    segments = translate_sync.split_segments(text)
+    if not segments:
+        return (await translate_segments_async([text], from_lang, to_lang))[0]
+    return '\n'.join(await translate_segments_async(segments, from_lang, to_lang))
+
+
+async def _translate_all(texts, from_lang, to_lang):
+    return await asyncio.gather(*(translate_text_async(text, from_lang, to_lang) for text in texts))
+
+
+def translate_many(texts, from_lang="en", to_lang="zh"):
+    """
+    同步接口：在事件循环上并发翻译多段 OCR 文本（多区域 / 批量处理），结果按原顺序返回
+    未安装 aiohttp 时在调用线程中依次翻译
+    """
+    if not async_enabled(translate_sync.load_config()):
+        return [translate_sync.translate_text(text, from_lang, to_lang) for text in texts]
+    return engine_loop.run(_translate_all(list(texts), from_lang, to_lang))